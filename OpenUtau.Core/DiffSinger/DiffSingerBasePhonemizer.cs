@@ -31,6 +31,10 @@ public abstract class DiffSingerBasePhonemizer : MachineLearningPhonemizer
         protected virtual string GetDictionaryName()=>"dsdict.yaml";
 
         public override void SetSinger(USinger singer) {
+            if (this.singer == singer && linguisticModel != null && durationModel != null) {
+                // Already set up for this singer; keep the loaded models instead of reloading them for every request.
+                return;
+            }
             this.singer = singer;
             if(singer==null){
                 return;
@@ -1,30 +1,26 @@
-from openai import OpenAI
 import re
 import json
-import helpers
-import openai
-import boto3
-import botocore
 import os
-from botocore.exceptions import ClientError
-from helpers import download_file_from_s3, wait_for_file
+from static_assets import get_static_assets
+from gpt_client import get_gpt_client
+from completion_cache import completion_key, get_completion_cache
+from syllable_cache import get_syllable_cache, normalize_word
+from syllable_engine import get_syllable_engine
 
 REGION_NAME = os.getenv('REGION_NAME')
 BUCKET_NAME = os.getenv('BUCKET_NAME')
 
-s3_client = boto3.client('s3', region_name=REGION_NAME)
 
 SYSTEM_PROMPT = """"""
 
 
 def get_system_prompt(name, reason):
     
-    if wait_for_file(BUCKET_NAME, "system_prompt.txt", s3_client):
-        download_file_from_s3(BUCKET_NAME, "system_prompt.txt", "/tmp/system_prompt.txt")
-        
     try:
-        with open("/tmp/system_prompt.txt", "r") as file:
-            SYSTEM_PROMPT = file.read()
+        # Held in memory and revalidated against S3 at most once per STATIC_ASSET_TTL
+        SYSTEM_PROMPT = get_static_assets().get_text("system_prompt.txt")
+        if SYSTEM_PROMPT is None:
+            raise FileNotFoundError("system_prompt.txt")
             
 
         # Print the content (optional, for debugging purposes)
@@ -32,7 +28,7 @@ def get_system_prompt(name, reason):
         # print(SYSTEM_PROMPT)
 
     except FileNotFoundError:
-        print("The file /tmp/system_prompt.txt was not found.")
+        print("The file system_prompt.txt was not found in S3.")
     except Exception as e:
         print(f"An error occurred: {e}")
         
@@ -42,7 +38,7 @@ def get_system_prompt(name, reason):
 
 class LyricsJSONAndTextGenerator:
     def __init__(self, api_key, bpm=100, time_signature=4, initial_offset=0.5):
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_gpt_client(api_key)
         self.bpm = bpm
         self.time_signature = time_signature
         self.initial_offset = initial_offset
@@ -87,7 +83,7 @@ class LyricsJSONAndTextGenerator:
             f""
         )
 
-        response = self.client.chat.completions.create(
+        response = self.client.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.9,
@@ -168,7 +164,7 @@ class VideoLyricsJSONGenerator:
 
 # class VideoLyricsJSONGenerator:
 #     def __init__(self, api_key, bpm=94, time_signature=4, start_offset=5.106):
-#         self.client = OpenAI(api_key=api_key)
+#         self.client = openai_client(api_key)
 #         self.bpm = bpm
 #         self.time_signature = time_signature
 #         self.start_offset = start_offset
@@ -263,8 +259,7 @@ class VideoLyricsJSONGenerator:
     
 class AgentForLyricGeneration:
     def __init__(self, api_key, model="gpt-4o-mini"):
-        self.client = OpenAI(api_key=api_key)
-        self.client.api_key = api_key
+        self.client = get_gpt_client(api_key)
         self.model = model
 
     def generate_similar_lyrics(self, original_lyrics):
@@ -274,7 +269,7 @@ class AgentForLyricGeneration:
             "Ensure each line maintains the poetic style of the original."
         )
 
-        response = self.client.chat.completions.create(
+        response = self.client.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -289,12 +284,10 @@ class AgentForLyricGeneration:
 class AgentForLineAdjustment:
     def __init__(self, api_key, model="gpt-4o-mini"):
         """Initialize the agent with the API key and model."""
-        self.client = OpenAI(api_key=api_key)
-        self.client.api_key = api_key
+        self.client = get_gpt_client(api_key)
         self.model = model
 
-    def request_adjustment(self, line, action, context=""):
-        """Query GPT to adjust a line with specific instructions."""
+    def _adjustment_request(self, line, action, context=""):
         prompt = (
             f"Here is a verse from a song for context:\n"
             f"{context}\n\n"
@@ -303,7 +296,7 @@ class AgentForLineAdjustment:
             f"Please provide a new line that fits this context and follows the action."
         )
 
-        response = self.client.chat.completions.create(
+        return dict(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -313,21 +306,51 @@ class AgentForLineAdjustment:
             presence_penalty=0
         )
 
+    def request_adjustment(self, line, action, context=""):
+        """Query GPT to adjust a line with specific instructions."""
+        response = self.client.create(**self._adjustment_request(line, action, context))
         return response.choices[0].message.content.strip()
+
+    def request_adjustments(self, adjustments):
+        """Adjust several lines at once; ``adjustments`` holds ``(line, action, context)`` tuples."""
+        responses = self.client.create_many([self._adjustment_request(*adjustment) for adjustment in adjustments])
+        return [response.choices[0].message.content.strip() for response in responses]
+
 class LyricGPTAgent:
-    def __init__(self, api_key, model="gpt-4o-mini"):
-        self.client = openai.OpenAI(api_key=api_key)
-        self.client.api_key = api_key
+    def __init__(self, api_key, model="gpt-4o-mini", cache=None):
+        self.client = get_gpt_client(api_key)
         self.model = model
+        self.cache = cache if cache is not None else get_completion_cache()
 
-    def generate_lyrics(self, prompt):
-        response = self.client.chat.completions.create(
+    def _lyrics_request(self, prompt):
+        return dict(
             model=self.model,
             messages=[{"role": "system", "content": "You are a creative assistant who writes song lyrics."},
                       {"role": "user", "content": prompt}]
         )
+
+    def generate_lyrics(self, prompt):
+        response = self.client.create(**self._lyrics_request(prompt))
         return response.choices[0].message.content.strip()
 
+    def generate_lyrics_many(self, prompts, scope=None, fresh=False):
+        """Run independent lyric prompts concurrently; results are in prompt order.
+
+        A prompt answered before (same request and ``scope``) comes from the
+        completion cache; ``fresh`` skips the lookup to get new lyrics.
+        """
+        requests = [self._lyrics_request(prompt) for prompt in prompts]
+        keys = [completion_key(request, scope) for request in requests]
+        lyrics = [None if fresh else self.cache.get(key) for key in keys]
+        missing = [index for index, text in enumerate(lyrics) if text is None]
+        if len(missing) < len(lyrics):
+            print(f"Reusing {len(lyrics) - len(missing)} of {len(lyrics)} cached lyric completions")
+        responses = self.client.create_many([requests[index] for index in missing])
+        for index, response in zip(missing, responses):
+            lyrics[index] = response.choices[0].message.content.strip()
+            self.cache.put(keys[index], lyrics[index], model=self.model)
+        return lyrics
+
     def create_first_four_lines(self, name, reason):
         SYSTEM_PROMPT = get_system_prompt(name, reason)
         return (
@@ -418,7 +441,7 @@ class LyricGPTAgent:
             "7. When you can add 'the' to make a 4 syllable line a 5 syllable line, then do it."
         )
 
-    def get_jingle_clone(self, name, reason):
+    def get_jingle_clone(self, name, reason, fresh=False):
         # prompt1 = self.create_first_four_lines(name, reason)
         # verse1 = self.generate_lyrics (prompt1)
         # prompt2 = self.create_second_four_lines(verse1)
@@ -426,8 +449,10 @@ class LyricGPTAgent:
         
         # verse = verse1 + "\n" + verse2
         versePrompt = self.create_a_verse (name, reason)
-        verse = self.generate_lyrics (versePrompt)
-        chorus = self.generate_lyrics (self.create_a_chorus (verse, reason))
+        # The chorus prompt does not embed the verse text, so both are written at the same time
+        chorusPrompt = self.create_a_chorus (None, reason)
+        # The chorus prompt doesn't contain the name or reason, so they scope the cached completions
+        verse, chorus = self.generate_lyrics_many([versePrompt, chorusPrompt], scope=[name, reason], fresh=fresh)
         
 #         chorus = """Jingle Bells Jingle Bells
 # Jingle all the way
@@ -442,42 +467,113 @@ class LyricGPTAgent:
         jingle = jingle.replace("'", "").replace(",", "")
         return jingle
 
+SYLLABLE_RULES = (
+    "For the words Jingle Bells, assume the word Bells is always 2 syllables."
+    "The 's at the end of a contracted word like 'it's' is not counted as a syllable."
+    "John's is counted as 1 syllable. Chris's is counted as 2 syllables."
+    "Be intelligent when assigning syllables."
+    "'every' is 2 syllables. A contraction like you're is 1 syllable. you are is 2 syllables."
+    "ious words like 'delicious' are 3 syllables. 'ious' is 1 syllable."
+    "Elizabeth is 3 syllables as the a isn't pronounced in it."
+    "today is 2 syllables. don't split today into to and day in output. today(2) is correct."
+    "holiday is 3 syllables."
+)
+
+# Structured output for the batched request: one entry per word
+SYLLABLE_WORDS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "words": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "word": {"type": "string"},
+                    "syllables": {"type": "integer"}
+                },
+                "required": ["word", "syllables"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["words"],
+    "additionalProperties": False
+}
+MAX_SYLLABLES_PER_WORD = 9
+# Requests per sheet: the first, then retries for the words it left malformed or unanswered
+SYLLABLE_REQUEST_ATTEMPTS = 2
+
+
 class SyllableCountGPTAgent:
-    def __init__(self, api_key, model="gpt-4o-mini"):
-        self.client = openai.OpenAI(api_key=api_key)
-        self.client.api_key = api_key
+    def __init__(self, api_key, model="gpt-4o-mini", cache=None, engine=None):
+        self.client = get_gpt_client(api_key)
         self.model = model
+        # Word counts seen in earlier responses, then the offline engine, are consulted before GPT
+        self.cache = cache if cache is not None else get_syllable_cache()
+        self.engine = engine if engine is not None else get_syllable_engine()
 
     def count_syllables_in_line(self, line):
-        prompt = (
-            "You will be given a line of lyrics. For each word, return the word followed by its syllable count "
-            "in the format: word(syllable_count). Ensure each syllable count is accurate.\n\n"
-            f"Lyrics line: \"{line}\"\n"
-            "Return the formatted output in one line, like: word1(2) word2(1) word3(3) ..."
-            "For the words Jingle Bells, assume the word Bells is always 2 syllables."
-            "The 's at the end of a contracted word like 'it's' is not counted as a syllable."
-            "John's is counted as 1 syllable. Chris's is counted as 2 syllables."
-            "Be intelligent when assigning syllables."
-            "'every' is 2 syllables. A contraction like you're is 1 syllable. you are is 2 syllables."
-            "ious words like 'delicious' are 3 syllables. 'ious' is 1 syllable."
-            "Elizabeth is 3 syllables as the a isn't pronounced in it."
-            "today is 2 syllables. don't split today into to and day in output. today(2) is correct."
-            "holiday is 3 syllables."
-        )
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=500,
-            top_p=1,
-            frequency_penalty=0,
-            presence_penalty=0
-        )
-
-        formatted_output = response.choices[0].message.content.strip()
-
-        return formatted_output
+        """``word(n)`` text for ``line``; see ``count_syllables_in_each_line``."""
+        return self.count_syllables_in_each_line([line])[0]
+
+    def count_syllables_in_each_line(self, lines):
+        """``word(n)`` text for every line, built word by word.
+
+        The offline engine counts the whole sheet (``SyllableEngine.count_lines``);
+        only words it is not confident about are looked up in the cache or sent
+        to GPT, all in one request (see ``_resolve``).
+        """
+        line_results = self.engine.count_lines(lines)
+        counts = self._resolve(result for results in line_results for result in results)
+        return [
+            " ".join(f"{result.word}({counts.get(normalize_word(result.word), result.count)})" for result in results)
+            for results in line_results
+        ]
+
+    def count_words(self, words):
+        """``{normalized word: syllables}`` for every distinct word, with as few GPT requests as possible."""
+        keys = list(dict.fromkeys(key for key in map(normalize_word, words) if key))
+        return self._resolve(self.engine.count_word(key) for key in keys)
+
+    def _resolve(self, results):
+        """``{normalized word: syllables}`` for the engine's ``SyllableCount`` results.
+
+        Confident counts are used as they are. The rest come from the cache,
+        or go out together in one word-level request. Words it leaves malformed
+        or unanswered are asked again, up to ``SYLLABLE_REQUEST_ATTEMPTS``
+        requests in all, and any still unanswered keep the offline estimate.
+        """
+        counts = {}
+        uncertain = {}
+        for result in results:
+            key = normalize_word(result.word)
+            if not key or key in counts or key in uncertain:
+                continue
+            if result.confident:
+                counts[key] = result.count
+            else:
+                uncertain[key] = result.count
+        cached = self.cache.get_many(uncertain)
+        counts.update(cached)
+        estimates = {key: count for key, count in uncertain.items() if key not in cached}
+        total = len(counts) + len(estimates)
+        if total:
+            print(f"{total - len(estimates)} of {total} words counted without GPT")
+        if estimates:
+            learned = {}
+            for _ in range(SYLLABLE_REQUEST_ATTEMPTS):
+                pending = [key for key in estimates if key not in learned]
+                if not pending:
+                    break
+                try:
+                    learned.update(self.count_syllables_in_words(pending))
+                except Exception as e:
+                    print(f"Grouped syllable request failed, using offline estimates: {e}")
+                    break
+            self.cache.put_many(learned)
+            counts.update(estimates)
+            counts.update(learned)
+        return counts
 
     def get_syllable_count_from_response(self, formatted_line):
         words_with_counts = re.findall(r'(\b\w+\b)\((\d+)\)', formatted_line)
@@ -492,16 +588,64 @@ class SyllableCountGPTAgent:
         return syllable_dict
 
 
+    def count_syllables_in_words(self, words):
+        """Count syllables for every word in one structured-output request.
+
+        Returns ``{word: syllables}`` holding only the entries that passed
+        validation; ``_resolve`` asks again for the rest.
+        """
+        word_list = "\n".join(words)
+        prompt = (
+            "You will be given words from song lyrics, one per line. For every word, give the number of "
+            "syllables it has when sung. Keep each word exactly as written and return one entry per word. "
+            "Ensure each syllable count is accurate.\n\n"
+            f"Words:\n{word_list}\n\n"
+            + SYLLABLE_RULES
+        )
+
+        response = self.client.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=100 + 20 * len(words),
+            top_p=1,
+            frequency_penalty=0,
+            presence_penalty=0,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "syllable_counts", "strict": True, "schema": SYLLABLE_WORDS_SCHEMA}
+            }
+        )
+        entries = json.loads(response.choices[0].message.content)["words"]
+
+        expected = set(words)
+        counts = {}
+        for entry in entries:
+            word = normalize_word(entry.get("word", ""))
+            count = entry.get("syllables")
+            if word in expected and word not in counts and self._is_valid_word_count(count):
+                counts[word] = count
+        return counts
+
+    @staticmethod
+    def _is_valid_word_count(count):
+        """A word's result is usable when it is a plausible whole number of syllables."""
+        return isinstance(count, int) and not isinstance(count, bool) and 1 <= count <= MAX_SYLLABLES_PER_WORD
+
     def request_syllable_counts(self, lyrics):
+        """Return ``(total_counts, formatted_lines)`` for the lyric lines.
+
+        Words in the syllable cache or confidently counted by the offline
+        engine are answered locally; the rest of the sheet's words go out in
+        one structured request (see ``count_syllables_in_each_line``).
+        ``formatted_lines`` are always ``word(n)`` strings.
+        """
+        formatted_lines = self.count_syllables_in_each_line(lyrics)
+
         # Get syllable counts for each line in the lyrics
         total_counts = []
-        formatted_lines = []
-        for line in lyrics:
-            formatted_line = self.count_syllables_in_line(line)
-            formatted_lines.append(formatted_line)
-            syllable_dict = self.get_syllable_count_from_response(formatted_line)
-            print (f"Syllable Dict: {syllable_dict}")
-            total_count = sum(syllable_dict.values())
+        for line, formatted_line in zip(lyrics, formatted_lines):
+            total_count = sum(int(count) for count in re.findall(r"\((\d+)\)", formatted_line))
             total_counts.append(total_count)
             print (f"Line: {line} has {total_count} syllables")
                         
@@ -0,0 +1,193 @@
+"""Single-archive asset bundles for voicebanks and dependencies.
+
+A bundle is a ``.tar.gz`` whose first member is ``MANIFEST.json``:
+
+    {"version": 1, "files": {"<relative path>": {"size": <bytes>, "sha256": "<hex>"}}}
+
+followed by the files themselves. Workers stream a bundle straight from S3
+through gzip and tar into the target directory (no intermediate archive on
+disk) and verify every file against the manifest.
+
+Build one with:
+
+    python asset_bundle.py build <source_dir> <bundle.tar.gz> [--upload <bucket> <key>]
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import tarfile
+import hashlib
+import logging
+import argparse
+
+logger = logging.getLogger()
+
+MANIFEST_NAME = "MANIFEST.json"
+BUNDLE_VERSION = 1
+ETAG_MARKER = ".bundle_etag"
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class BundleError(Exception):
+    """Raised when a bundle is malformed, unsafe or does not match its manifest."""
+
+
+def _sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_bundle(source_dir, bundle_path):
+    """Pack ``source_dir`` into ``bundle_path`` with a manifest first; return the manifest."""
+    files = {}
+    for root, dirs, names in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            relative_path = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            files[relative_path] = {"size": os.path.getsize(path), "sha256": _sha256_of(path)}
+    manifest = {"version": BUNDLE_VERSION, "files": files}
+
+    with tarfile.open(bundle_path, "w:gz") as tar:
+        manifest_bytes = json.dumps(manifest, indent=1).encode("utf-8")
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(manifest_bytes)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(manifest_bytes))
+        for relative_path in files:
+            tar.add(os.path.join(source_dir, relative_path), arcname=relative_path, recursive=False)
+    return manifest
+
+
+def _safe_target(dest_dir, name):
+    """Resolve a member name inside ``dest_dir``, refusing absolute paths and ``..`` escapes."""
+    if not name or name.startswith("/") or "\\" in name:
+        raise BundleError(f"Unsafe path in bundle: {name!r}")
+    target = os.path.realpath(os.path.join(dest_dir, name))
+    if os.path.commonpath([target, os.path.realpath(dest_dir)]) != os.path.realpath(dest_dir):
+        raise BundleError(f"Path escapes the destination: {name!r}")
+    return target
+
+
+def extract_bundle(fileobj, dest_dir):
+    """Stream-extract a bundle from a readable ``fileobj`` into ``dest_dir`` and verify it.
+
+    ``fileobj`` is read sequentially once (``r|gz``), so an S3 response body
+    can be passed directly. Returns the manifest.
+    """
+    manifest = None
+    seen = set()
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+        for member in tar:
+            if manifest is None:
+                if member.name != MANIFEST_NAME or not member.isfile():
+                    raise BundleError(f"{MANIFEST_NAME} must be the first member, found {member.name!r}")
+                manifest = json.load(tar.extractfile(member))
+                if manifest.get("version") != BUNDLE_VERSION:
+                    raise BundleError(f"Unsupported bundle version {manifest.get('version')}")
+                continue
+
+            if member.isdir():
+                os.makedirs(_safe_target(dest_dir, member.name), exist_ok=True)
+                continue
+            if not member.isfile():
+                raise BundleError(f"Unsupported member type for {member.name!r}")
+            expected = manifest["files"].get(member.name)
+            if expected is None:
+                raise BundleError(f"{member.name!r} is not listed in the manifest")
+
+            target = _safe_target(dest_dir, member.name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            digest = hashlib.sha256()
+            size = 0
+            source = tar.extractfile(member)
+            with open(target, "wb") as out:
+                for block in iter(lambda: source.read(COPY_BUFFER_SIZE), b""):
+                    digest.update(block)
+                    size += len(block)
+                    out.write(block)
+            if size != expected["size"] or digest.hexdigest() != expected["sha256"]:
+                raise BundleError(f"Checksum mismatch for {member.name!r}")
+            seen.add(member.name)
+
+    if manifest is None:
+        raise BundleError("Empty bundle")
+    missing = set(manifest["files"]) - seen
+    if missing:
+        raise BundleError(f"{len(missing)} file(s) from the manifest are missing, e.g. {sorted(missing)[0]!r}")
+    return manifest
+
+
+def sync_bundle_from_s3(s3_client, bucket, key, dest_dir):
+    """Install the bundle at ``s3://bucket/key`` into ``dest_dir`` unless it is already current.
+
+    The bundle's ETag is remembered in ``dest_dir``; a warm worker only does a
+    HEAD request. A new bundle is extracted into a staging directory and
+    swapped in, so ``dest_dir`` is never left half-written. Returns True when
+    the bundle was (re)installed.
+    """
+    etag = s3_client.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+    marker_path = os.path.join(dest_dir, ETAG_MARKER)
+    try:
+        with open(marker_path, "r", encoding="utf-8") as f:
+            if f.read().strip() == etag:
+                return False
+    except OSError:
+        pass
+
+    start = time.monotonic()
+    staging_dir = f"{dest_dir.rstrip('/')}.staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    try:
+        body = s3_client.get_object(Bucket=bucket, Key=key, IfMatch=etag)["Body"]
+        manifest = extract_bundle(body, staging_dir)
+        with open(os.path.join(staging_dir, ETAG_MARKER), "w", encoding="utf-8") as f:
+            f.write(etag)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    previous_dir = f"{dest_dir.rstrip('/')}.previous"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(dest_dir):
+        os.replace(dest_dir, previous_dir)
+    os.replace(staging_dir, dest_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    logger.info(
+        f"Installed bundle s3://{bucket}/{key} ({len(manifest['files'])} files) "
+        f"into {dest_dir} in {time.monotonic() - start:.2f} seconds"
+    )
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build OpenUtau asset bundles.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Pack a directory into a bundle")
+    build.add_argument("source_dir")
+    build.add_argument("bundle_path")
+    build.add_argument("--upload", nargs=2, metavar=("BUCKET", "KEY"), help="Upload the bundle to S3 afterwards")
+    args = parser.parse_args(argv)
+
+    manifest = build_bundle(args.source_dir, args.bundle_path)
+    total_size = sum(entry["size"] for entry in manifest["files"].values())
+    print(f"Built {args.bundle_path}: {len(manifest['files'])} files, {total_size / 1024 / 1024:.1f} MB")
+    if args.upload:
+        from aws_clients import get_client
+        bucket, key = args.upload
+        get_client("s3").upload_file(args.bundle_path, bucket, key)
+        print(f"Uploaded to s3://{bucket}/{key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass
+from aws_clients import get_client
+from s3_sync import MB, download_objects, list_objects
+
+logger = logging.getLogger()
+
+MANIFEST_FILENAME = ".asset_manifest.json"
+
+
+@dataclass
+class SyncReport:
+    """What one prefix sync did and how long it took."""
+    prefix: str
+    listed: int = 0
+    downloaded: int = 0
+    removed: int = 0
+    bytes_downloaded: int = 0
+    seconds: float = 0.0
+    transfer_seconds: float = 0.0
+
+    def summary(self):
+        throughput = self.bytes_downloaded / MB / self.transfer_seconds if self.transfer_seconds else 0.0
+        return (
+            f"{self.prefix}: {self.listed} objects, {self.downloaded} downloaded "
+            f"({self.bytes_downloaded / MB:.1f} MB at {throughput:.1f} MB/s), "
+            f"{self.removed} removed in {self.seconds:.2f} seconds"
+        )
+
+
+class AssetCache:
+    """Local mirror of S3 prefixes that survives warm Lambda invocations.
+
+    A manifest next to the files records the key, ETag and size of every
+    object that has been downloaded. A sync lists the prefix once and only
+    downloads objects whose ETag or size changed (or whose local copy is
+    missing); objects deleted from S3 are removed locally.
+    """
+
+    def __init__(self, bucket, local_base, s3_client=None):
+        self.bucket = bucket
+        self.local_base = local_base
+        self.s3_client = s3_client or get_client("s3")
+        self.manifest_path = os.path.join(local_base, MANIFEST_FILENAME)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable asset manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _save_manifest(self):
+        os.makedirs(self.local_base, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _is_current(self, obj, local_path):
+        cached = self.manifest.get(obj.key)
+        if cached is None or cached["etag"] != obj.etag or cached["size"] != obj.size:
+            return False
+        try:
+            return os.path.getsize(local_path) == obj.size
+        except OSError:
+            return False
+
+    def sync(self, prefix, local_dir):
+        """Bring ``local_dir`` in line with ``s3://bucket/prefix`` and return a ``SyncReport``."""
+        start = time.monotonic()
+        report = SyncReport(prefix=prefix)
+        remote_objects = {obj.key: obj for obj in list_objects(self.s3_client, self.bucket, prefix)}
+        report.listed = len(remote_objects)
+        if not remote_objects:
+            # Keep whatever is cached rather than wiping it on an empty listing
+            logger.error(f"No files found in folder {prefix} in bucket {self.bucket}.")
+            report.seconds = time.monotonic() - start
+            return report
+
+        def record(obj, local_path):
+            self.manifest[obj.key] = {"etag": obj.etag, "size": obj.size, "path": local_path}
+            report.downloaded += 1
+            report.bytes_downloaded += obj.size
+
+        changed = []
+        for key, obj in remote_objects.items():
+            local_path = os.path.join(local_dir, os.path.relpath(key, prefix))
+            if not self._is_current(obj, local_path):
+                changed.append((obj, local_path))
+
+        try:
+            if changed:
+                # Files land as .part and are renamed into place, so a half-written file is never cached
+                stats = download_objects(
+                    self.s3_client, self.bucket, changed, label=f"Sync {prefix}", on_complete=record
+                )
+                report.transfer_seconds = stats.seconds
+
+            # Drop local copies of objects that no longer exist under the prefix
+            for key in [key for key in self.manifest if key.startswith(prefix) and key not in remote_objects]:
+                try:
+                    os.remove(self.manifest[key]["path"])
+                except OSError:
+                    pass
+                del self.manifest[key]
+                report.removed += 1
+        finally:
+            # Record whatever was fetched, even if a later download failed
+            if report.downloaded or report.removed:
+                self._save_manifest()
+        report.seconds = time.monotonic() - start
+        return report
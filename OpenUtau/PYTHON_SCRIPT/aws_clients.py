@@ -0,0 +1,66 @@
+import os
+import threading
+
+# One boto3 session and one client per (service, region) for the whole process.
+# boto3 clients are thread-safe once built, but building them (and the session)
+# is not, so creation happens under a lock. boto3 itself is only imported on
+# first use.
+
+# Concurrent S3 object transfers, and ranged GETs per large object within each (see s3_sync)
+S3_TRANSFER_WORKERS = int(os.getenv("S3_SYNC_MAX_WORKERS", "10"))
+TRANSFER_MAX_CONCURRENCY = int(os.getenv("S3_TRANSFER_MAX_CONCURRENCY", "8"))
+# Connections the transfers can hold at once
+MAX_TRANSFER_CONNECTIONS = S3_TRANSFER_WORKERS * TRANSFER_MAX_CONCURRENCY
+# Enough connections for every S3 transfer worker's multipart parts, plus headroom for the job threads
+MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", str(MAX_TRANSFER_CONNECTIONS + 16)))
+RETRY_MODE = os.getenv("AWS_RETRY_MODE", "standard")
+MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+
+
+def _client_config():
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS},
+        tcp_keepalive=True,
+        connect_timeout=10,
+        read_timeout=60
+    )
+
+
+def get_session():
+    """Return the process-wide boto3 session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3
+            _session = boto3.session.Session()
+        return _session
+
+
+def get_client(service_name, region_name=None):
+    """Return the shared client for ``service_name``; defaults to the ``REGION_NAME`` region."""
+    region_name = region_name or os.getenv("REGION_NAME")
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    session = get_session()
+    with _lock:
+        if key not in _clients:
+            _clients[key] = session.client(service_name, region_name=region_name, config=_client_config())
+        return _clients[key]
+
+
+def s3_client():
+    return get_client("s3")
+
+
+def sqs_client():
+    return get_client("sqs")
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from aws_clients import get_client
+
+logger = logging.getLogger()
+
+COMPLETION_CACHE_ENABLED = os.getenv("COMPLETION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPLETION_CACHE_DIR = os.getenv("COMPLETION_CACHE_DIR", "/tmp/completion_cache")
+# S3 prefix of the tier shared by workers (in BUCKET_NAME); unset keeps the cache local
+COMPLETION_CACHE_S3_PREFIX = os.getenv("COMPLETION_CACHE_S3_PREFIX")
+COMPLETION_CACHE_TTL = float(os.getenv("COMPLETION_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def completion_key(request, scope=None):
+    """Content address of a chat completion request.
+
+    The hash covers the model, the messages and every sampling parameter in
+    ``request`` (the keyword arguments for ``chat.completions.create``), plus
+    an optional ``scope`` for prompts that do not spell out all of their
+    inputs.
+    """
+    payload = json.dumps({"request": request, "scope": scope}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Completion texts by request fingerprint, on local disk and optionally in S3.
+
+    A local miss falls through to the S3 tier (when ``s3_prefix`` is set)
+    and an S3 hit is copied to disk. Entries older than ``ttl`` seconds are
+    treated as misses. With ``enabled`` off every lookup misses and nothing
+    is stored.
+    """
+
+    def __init__(self, local_dir=COMPLETION_CACHE_DIR, bucket=None, s3_prefix=COMPLETION_CACHE_S3_PREFIX,
+                 ttl=COMPLETION_CACHE_TTL, enabled=COMPLETION_CACHE_ENABLED, s3_client=None):
+        self.local_dir = local_dir
+        self.bucket = bucket
+        self.s3_prefix = s3_prefix.rstrip("/") if bucket and s3_prefix else None
+        self.ttl = ttl
+        self.enabled = enabled
+        self.s3_client = s3_client
+        self.hits = 0
+        self.misses = 0
+
+    def _client(self):
+        return self.s3_client or get_client("s3")
+
+    def _local_path(self, key):
+        return os.path.join(self.local_dir, key[:2], f"{key}.json")
+
+    def _s3_key(self, key):
+        return f"{self.s3_prefix}/{key}.json"
+
+    def _is_fresh(self, entry):
+        return time.time() - entry.get("created_at", 0) < self.ttl
+
+    def _write_local(self, key, entry):
+        path = self._local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def _read_local(self, key):
+        try:
+            with open(self._local_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_s3(self, key):
+        if not self.s3_prefix:
+            return None
+        try:
+            response = self._client().get_object(Bucket=self.bucket, Key=self._s3_key(key))
+            return json.loads(response["Body"].read())
+        except Exception as e:  # NoSuchKey is the usual miss; any other failure only costs a miss too
+            logger.debug(f"Completion cache S3 miss for {key}: {e}")
+            return None
+
+    def get(self, key):
+        """The cached completion text for ``key``, or None."""
+        if not self.enabled:
+            return None
+        entry = self._read_local(key)
+        if entry is None or not self._is_fresh(entry):
+            entry = self._read_s3(key)
+            if entry is not None and self._is_fresh(entry):
+                self._write_local(key, entry)
+        if entry is None or not self._is_fresh(entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["content"]
+
+    def put(self, key, content, model=None):
+        if not self.enabled:
+            return
+        entry = {"created_at": time.time(), "model": model, "content": content}
+        try:
+            self._write_local(key, entry)
+        except OSError as e:
+            logger.warning(f"Completion cache write failed for {key}: {e}")
+        if self.s3_prefix:
+            try:
+                self._client().put_object(
+                    Bucket=self.bucket, Key=self._s3_key(key),
+                    Body=json.dumps(entry).encode("utf-8"), ContentType="application/json"
+                )
+            except Exception as e:
+                logger.warning(f"Completion cache upload failed for {key}: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache():
+    """The process-wide cache, with the S3 tier under ``COMPLETION_CACHE_S3_PREFIX`` in ``BUCKET_NAME`` when set."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompletionCache(bucket=os.getenv("BUCKET_NAME"))
+        return _cache
@@ -12,10 +12,19 @@ class Config:
     OU_INFERENCE_LOCAL_LYRICS_PATH: str
     OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH: str
     OU_SINGER_NUMBER: str
+    OU_SINGER_FOLDER: str
+    OU_DEPENDENCY_FOLDERS: list
+    OU_ASSET_BUNDLES: bool
     OU_FINAL_FILENAME: str
     OU_INFERENCE_LOCAL_EXPORT_PATH: str
     OU_INFERENCE_LOCAL_USTX_PATH: str
     OU_LYRICS_JSON_PATH: str
+    WORKER_CONCURRENCY: int
+    OU_RENDER_MODE: str
+    OU_PHONEMIZER: str
+    OU_ENGINE_MAX_JOBS: int
+    OU_RENDER_TIMEOUT: float
+    OU_RENDER_INACTIVITY_TIMEOUT: float
 
 def initialize_config():
     is_lambda_env = True  # Modify this as needed for your environment check
@@ -29,10 +38,29 @@ def initialize_config():
         OU_INFERENCE_LOCAL_LYRICS_PATH="/tmp/lyrics.txt" if is_lambda_env else "tmp/lyrics.txt",
         OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH="/tmp/" if is_lambda_env else "tmp/",
         OU_SINGER_NUMBER="1",
+        # Voicebank folder under Lambda_Utau/Singers/ to fetch; also the singer Id passed to OpenUtau.
+        # Required once the bucket holds more than one voicebank (checked by SingerAssets.validate)
+        OU_SINGER_FOLDER=os.getenv("OU_SINGER_FOLDER", ""),
+        # Comma-separated folders under Lambda_Utau/Dependencies/ to fetch; empty fetches all of them
+        OU_DEPENDENCY_FOLDERS=[folder for folder in os.getenv("OU_DEPENDENCY_FOLDERS", "").split(",") if folder],
+        # Install singers/dependencies from single-archive bundles (asset_bundle.py) instead of per-object sync
+        OU_ASSET_BUNDLES=os.getenv("OU_ASSET_BUNDLES", "false").lower() in ("1", "true", "yes"),
         OU_FINAL_FILENAME="",
         OU_INFERENCE_LOCAL_EXPORT_PATH="",
         OU_INFERENCE_LOCAL_USTX_PATH="",
-        OU_LYRICS_JSON_PATH=""
+        OU_LYRICS_JSON_PATH="",
+        # Number of songs a single EC2 worker processes at once
+        WORKER_CONCURRENCY=int(os.getenv("WORKER_CONCURRENCY", os.cpu_count() or 1)),
+        # How OpenUtau is driven: "pipeline" (one `--pipeline` run per song), "engine" (warm `--serve`
+        # processes) or "interactive" (legacy prompt scripting)
+        OU_RENDER_MODE=os.getenv("OU_RENDER_MODE", "pipeline"),
+        OU_PHONEMIZER=os.getenv("OU_PHONEMIZER", "OpenUtau.Core.DiffSinger.DiffSingerEnglishPhonemizer"),
+        # A warm engine is restarted after this many renders to bound memory growth
+        OU_ENGINE_MAX_JOBS=int(os.getenv("OU_ENGINE_MAX_JOBS", "200")),
+        # Per-song render limits in seconds: overall deadline, and longest stretch without
+        # any OpenUtau output before the render is considered wedged (0 disables either)
+        OU_RENDER_TIMEOUT=float(os.getenv("OU_RENDER_TIMEOUT", "600")),
+        OU_RENDER_INACTIVITY_TIMEOUT=float(os.getenv("OU_RENDER_INACTIVITY_TIMEOUT", "300"))
     )
     
     # Return initialized config
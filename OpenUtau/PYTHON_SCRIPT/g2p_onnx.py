@@ -0,0 +1,114 @@
+import os
+import io
+import logging
+import zipfile
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger()
+
+# g2p.onnx exported by py/g2p (GreedyG2p.export), or an OpenUtau g2p pack zip containing it
+G2P_MODEL_PATH = os.getenv("G2P_MODEL_PATH", "/usr/local/share/g2p/g2p-arpabet.zip")
+G2P_CACHE_SIZE = int(os.getenv("G2P_CACHE_SIZE", "4096"))
+G2P_THREADS = int(os.getenv("G2P_THREADS", "1"))
+MAX_PHONEMES = 48
+
+BOS_IDX = 2
+# Symbol tables of the ARPAbet model, as in OpenUtau.Core/G2p/ArpabetG2p.cs
+GRAPHEMES = [
+    "", "", "", "", "'", "-", "a", "b", "c", "d", "e",
+    "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p",
+    "q", "r", "s", "t", "u", "v", "w", "x", "y", "z",
+]
+PHONEMES = [
+    "", "", "", "", "aa", "ae", "ah", "ao", "aw", "ay", "b", "ch",
+    "d", "dh", "eh", "er", "ey", "f", "g", "hh", "ih", "iy", "jh",
+    "k", "l", "m", "n", "ng", "ow", "oy", "p", "r", "s", "sh", "t",
+    "th", "uh", "uw", "v", "w", "y", "z", "zh",
+]
+VOWELS = frozenset({"aa", "ae", "ah", "ao", "aw", "ay", "eh", "er", "ey", "ih", "iy", "ow", "oy", "uh", "uw"})
+
+
+def _read_model(path):
+    """The ONNX bytes at ``path``; a zip is read as a g2p pack and its ``g2p.onnx`` extracted."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        with zipfile.ZipFile(io.BytesIO(data)) as pack:
+            return pack.read("g2p.onnx")
+    return data
+
+
+class G2pModel:
+    """CPU inference for the project's RNN-T grapheme-to-phoneme model.
+
+    Runs the same greedy loop as OpenUtau's ``G2pPack.Predict``: the exported
+    graph returns the next phoneme for ``(src, tgt, t)``; ``<bos>`` advances
+    to the next grapheme. Predictions are kept in an LRU cache, so a name
+    seen before costs nothing.
+    """
+
+    def __init__(self, model_path=G2P_MODEL_PATH, cache_size=G2P_CACHE_SIZE, threads=G2P_THREADS):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            _read_model(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.grapheme_indexes = {grapheme: index for index, grapheme in enumerate(GRAPHEMES) if index >= 4}
+        self.predict = lru_cache(maxsize=cache_size)(self._predict)
+
+    def _predict(self, word):
+        """Phonemes (lower-case ARPAbet, no stress) for ``word``; empty when it has no known letters."""
+        import numpy as np
+
+        encoded = [self.grapheme_indexes[c] for c in word.lower() if c in self.grapheme_indexes]
+        if not encoded:
+            return ()
+        src = np.array([encoded], dtype=np.int32)
+        tgt = [BOS_IDX]
+        t = np.zeros(1, dtype=np.int32)
+        while t[0] < len(encoded) and len(tgt) < MAX_PHONEMES:
+            pred = int(self.session.run(
+                ["pred"], {"src": src, "tgt": np.array([tgt], dtype=np.int32), "t": t}
+            )[0].reshape(-1)[0])
+            if pred != BOS_IDX:
+                tgt.append(pred)
+            else:
+                t[0] += 1
+        return tuple(PHONEMES[index] for index in tgt[1:])
+
+    def predict_many(self, words):
+        """``{word: phonemes}`` for every distinct word."""
+        return {word: self.predict(word) for word in dict.fromkeys(words)}
+
+    def count_syllables(self, word):
+        """Number of vowel phonemes in the predicted pronunciation."""
+        return sum(phoneme in VOWELS for phoneme in self.predict(word))
+
+    def count_syllables_many(self, words):
+        return {word: sum(phoneme in VOWELS for phoneme in phonemes) for word, phonemes in self.predict_many(words).items()}
+
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_g2p_model():
+    """The process-wide model, or None when ``G2P_MODEL_PATH`` or onnxruntime is unavailable."""
+    global _model, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            if not os.path.exists(G2P_MODEL_PATH):
+                logger.info(f"No g2p model at {G2P_MODEL_PATH}; unknown words use heuristics")
+            else:
+                try:
+                    _model = G2pModel(G2P_MODEL_PATH)
+                    logger.info(f"Loaded g2p model {G2P_MODEL_PATH}")
+                except Exception as e:  # a broken model must not stop syllable counting
+                    logger.warning(f"Failed to load g2p model {G2P_MODEL_PATH}: {e}")
+        return _model
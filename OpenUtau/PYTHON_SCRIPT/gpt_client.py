@@ -0,0 +1,87 @@
+import os
+import atexit
+import asyncio
+import logging
+import threading
+from types import SimpleNamespace
+
+logger = logging.getLogger()
+
+# Completions in flight at once across every agent and thread in the process
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
+
+class GPTClient:
+    """One ``AsyncOpenAI`` client shared by every GPT agent.
+
+    The client and its keep-alive connection pool live on a background event
+    loop, and a semaphore caps how many completions are in flight. ``create``
+    blocks like the synchronous ``OpenAI`` client (and is also reachable as
+    ``chat.completions.create``, so agents use it as a drop-in). ``create_many``
+    sends independent requests together, so they take as long as the slowest
+    one instead of the sum; the verse and chorus prompts and batched line
+    adjustments use it. Syllable counts need no fan-out, since a whole sheet
+    goes out in one request.
+    """
+
+    def __init__(self, api_key, max_concurrency=OPENAI_MAX_CONCURRENCY, timeout=OPENAI_TIMEOUT,
+                 max_retries=OPENAI_MAX_RETRIES):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="gpt-client", daemon=True)
+        self._thread.start()
+        self._client, self._semaphore = self._run(self._setup(timeout, max_retries))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def _setup(self, timeout, max_retries):
+        # Built on the loop so the semaphore and the HTTP pool belong to it
+        import openai
+        client = openai.AsyncOpenAI(api_key=self.api_key, timeout=timeout, max_retries=max_retries)
+        return client, asyncio.Semaphore(self.max_concurrency)
+
+    def _run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def acreate(self, **kwargs):
+        """Awaitable chat completion; must be awaited on this client's loop."""
+        async with self._semaphore:
+            return await self._client.chat.completions.create(**kwargs)
+
+    def create(self, **kwargs):
+        """Blocking chat completion with the same arguments as ``chat.completions.create``."""
+        return self._run(self.acreate(**kwargs))
+
+    def create_many(self, requests):
+        """Send independent completion requests concurrently; responses come back in request order."""
+        async def gather():
+            return await asyncio.gather(*(self.acreate(**kwargs) for kwargs in requests))
+        return self._run(gather()) if requests else []
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        try:
+            self._run(self._client.close(), timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to close the OpenAI client: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_gpt_client(api_key):
+    """The process-wide client for ``api_key``; closed on interpreter exit."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = GPTClient(api_key)
+            _clients[api_key] = client
+            atexit.register(client.close)
+        return client
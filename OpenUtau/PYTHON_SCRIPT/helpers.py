@@ -1,17 +1,15 @@
 import json
-import boto3
-import botocore
-import requests
-from botocore.exceptions import ClientError
 import time
 import os
 import logging
 import re
 import glob
-import pretty_midi
-import pyphen
-from nltk.corpus import cmudict
 from dotenv import load_dotenv
+from aws_clients import get_client
+from s3_waiter import S3Waiter, get_waiter
+from notifications import get_dispatcher
+from syllable_engine import get_syllable_engine
+from s3_sync import DEFAULT_MAX_WORKERS, TransferStats, download_objects, list_objects
 
 load_dotenv()
 log_file = "/tmp/Logs/openutau_process.log"
@@ -33,48 +31,24 @@ bucket_name = BUCKET_NAME
 LAMBDA_STATIC_MIDI_FILE_PATH = "static/final.mid"
 LAMBDA_STATIC_LYRICS_FILE_PATH = "static/lyrics.txt"
 
-# Create AWS clients
-s3_client = boto3.client('s3', region_name=REGION_NAME)
-lambda_client = boto3.client('lambda', region_name=REGION_NAME)
+# AWS clients come from the shared, lazily-built registry in aws_clients.
+# pretty_midi is imported inside the MIDI helpers so importing this module stays cheap.
 
 
+def rich_print(*objects, **kwargs):
+    """``rich.print``, with rich imported on the first call rather than at module import."""
+    from rich import print
+    print(*objects, **kwargs)
 
-def count_syllables(word):
-    # Primary method: Check in the CMU Pronouncing Dictionary
-    if word.lower() in d:
-        return max([len([y for y in x if y[-1].isdigit()]) for x in d[word.lower()]])
-    
-    # Secondary method: Use Pyphen for fallback
-    syllables = dic.inserted(word)
-    count = syllables.count('-') + 1
-
-    # Advanced rules for common English adjustments:
-    # Handle silent 'e' at the end of words
-    if word.endswith('e') and not word.endswith(('le', 'ue')) and count > 1:
-        count -= 1
-    
-    # Handle diphthongs and vowel clusters more accurately
-    if re.search(r'[aeiouy]{2,}', word):
-        count = max(1, count)
-    
-    # Handle special suffixes like 'es', 'ed' when pronounced as one syllable
-    if re.search(r'(es|ed)$', word) and count > 1:
-        count -= 1
-    
-    # Correct for words ending in '-le'
-    if word.endswith('le') and len(word) > 2 and not word[-3] in 'aeiou':
-        count += 1
 
-    return count
 
-def count_syllables_in_line(line, use_cmu):
-    # Clean and split the line into words
-    words = re.findall(r'\b\w+\b', line)
-    
-    # Count syllables for each word
-    syllable_count = sum(count_syllables(word, use_cmu) for word in words)
+def count_syllables(word):
+    """Syllables in ``word`` from the offline engine (overrides, CMU dictionary, then pyphen heuristics)."""
+    return get_syllable_engine().count_word(word).count
 
-    return syllable_count
+def count_syllables_in_line(line):
+    """Total syllables in ``line``, counted offline."""
+    return get_syllable_engine().line_total(line)
 
 def clean_unicode_edge_case(json_data):
     """Replaces Unicode escape sequences in the 'line' fields with actual characters or replacements."""
@@ -113,9 +87,8 @@ def split_lyrics_into_sections(lyrics_text):
 
     return lyrics_dict
 
-import pretty_midi
-
 def copy_instruments_within_segment(midi_data, start_time, end_time, bpm=120):
+    import pretty_midi
     new_midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
     for instrument in midi_data.instruments:
         new_instrument = pretty_midi.Instrument(
@@ -163,6 +136,7 @@ def calculate_total_notes(sections_midi):
     return sum(len([note for instrument in section.instruments for note in instrument.notes]) for section in sections_midi)
 
 def combine_midi_sections(sections_midi, bpm):
+    import pretty_midi
     # Create a new MIDI file to hold the combined sections
     final_midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
 
@@ -201,6 +175,7 @@ def get_last_end_time(section):
     
 # Copy instruments with notes within the segment range
 def copy_instruments_within_range(midi_data, start_time, end_time, bpm):
+    import pretty_midi
     new_midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
     for instrument in midi_data.instruments:
         new_instrument = pretty_midi.Instrument(program=instrument.program, is_drum=instrument.is_drum, name=instrument.name)
@@ -224,40 +199,46 @@ def upload_file_to_s3(local_file, bucket, key):
     #         ascii_file.write(line)
     try:
         print(f"Uploading {local_file} to s3://{bucket}/{key}...")
-        s3_client.upload_file(local_file, bucket, key)
+        get_client("s3").upload_file(local_file, bucket, key)
         print(f"File {local_file} uploaded successfully.")
     except Exception as e:
         print(f"Error uploading file to S3: {e}")
-        exit(1)
+        raise e  # Let the caller report the failure instead of killing the worker
+
+
+def upload_bytes_to_s3(data, bucket, key):
+    """Upload in-memory ``data`` to S3 without going through a local file."""
+    try:
+        print(f"Uploading {len(data)} bytes to s3://{bucket}/{key}...")
+        get_client("s3").put_object(Bucket=bucket, Key=key, Body=data)
+        print(f"s3://{bucket}/{key} uploaded successfully.")
+    except Exception as e:
+        print(f"Error uploading file to S3: {e}")
+        raise e
 
 
-def download_folder_from_s3(bucket, folder_key, local_output_dir):
-    """Download the specified folder from S3 to a local directory."""
+def download_folder_from_s3(bucket, folder_key, local_output_dir, max_workers=DEFAULT_MAX_WORKERS):
+    """Download the specified folder from S3 to a local directory.
+
+    The listing is paginated, so prefixes with more than 1000 keys are fetched
+    completely, and objects are transferred concurrently. Returns ``TransferStats``.
+    """
     try:
         # Ensure the local output directory exists
         os.makedirs(local_output_dir, exist_ok=True)
 
+        s3_client = get_client("s3")
         # List all objects with the folder prefix
-        response = s3_client.list_objects_v2(Bucket=bucket, Prefix=folder_key)
-
-        if 'Contents' not in response:
+        objects = list_objects(s3_client, bucket, folder_key)
+        if not objects:
             logger.error(f"No files found in folder {folder_key} in bucket {bucket}.")
-            return
-
-        # Download each object in the folder
-        for obj in response['Contents']:
-            file_key = obj['Key']
-            # Skip if the key represents the folder itself
-            if file_key.endswith('/'):
-                continue
-            # Determine local file path
-            local_file_path = os.path.join(local_output_dir, os.path.relpath(file_key, folder_key))
-            # Ensure the subdirectories exist
-            os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-            # Download the file
-            logger.info(f"Downloading {file_key} to {local_file_path}...")
-            s3_client.download_file(bucket, file_key, local_file_path)
-            logger.info(f"Downloaded {file_key} successfully.")
+            return TransferStats()
+
+        downloads = [
+            (obj, os.path.join(local_output_dir, os.path.relpath(obj.key, folder_key)))
+            for obj in objects
+        ]
+        return download_objects(s3_client, bucket, downloads, max_workers=max_workers, label=f"Download {folder_key}")
     except Exception as e:
         logger.error(f"Error downloading folder {folder_key}: {e}")
         raise e  # Raise exception to allow error handling
@@ -266,46 +247,42 @@ def download_folder_from_s3(bucket, folder_key, local_output_dir):
 
 def download_file_from_s3(bucket, key, local_output_file):
     """Download the specified file from S3 to local storage."""
+    from botocore.exceptions import ClientError
+
     try:
         logger.info(f"Downloading {key} from S3 to {local_output_file}...")
-        s3_client.download_file(bucket, key, local_output_file)
+        get_client("s3").download_file(bucket, key, local_output_file)
         logger.info(f"File {key} downloaded successfully to {local_output_file}")
     except ClientError as e:
         logger.error(f"Error downloading file {key}: {e}")
         raise e  # Raise exception to allow Lambda error handling
         
         
-# oprimise for s3, lambda
-def wait_for_file(bucket, key, s3_client, timeout=60, interval=5):
-    """Wait for the specified file to become available in S3."""
-    elapsed_time = 0
-    while elapsed_time < timeout:
-        try:
-            s3_client.head_object(Bucket=bucket, Key=key)
-            logger.info(f"File {key} is now available in bucket {bucket}.")
-            return True
-        except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                # Use logging and exponential backoff instead of time.sleep
-                logger.info(f"Waiting for file {key} in bucket {bucket} to be available...")
-                time.sleep(interval)
-                elapsed_time += interval
-                interval = min(interval * 2, timeout - elapsed_time)  # Exponential backoff
-            else:
-                raise e  # Re-raise unexpected exceptions
+def wait_for_file(bucket, key, s3_client=None, timeout=60):
+    """Wait for the specified file to become available in S3.
+
+    Callers waiting on the same key share one poller (see ``s3_waiter``), which
+    backs off with jitter and is woken early by S3 event notifications when
+    ``S3_EVENT_QUEUE_URL`` is set. Pass ``s3_client`` only to poll with a
+    client other than the shared one.
+    """
+    if s3_client is None or s3_client is get_client("s3"):
+        waiter = get_waiter()
+    else:
+        waiter = S3Waiter(s3_client)
+    if waiter.wait(bucket, key, timeout):
+        return True
     logger.error(f"File {key} did not become available within the timeout period.")
     return False
 
 
-def clean_tmp_wav_file():
+def clean_tmp_wav_file(tmp_dir="/tmp"):
     """
     Finds the .wav file in the tmp directory, and renames it to ensure
     it ends with 'vocals.wav' by removing any characters or special symbols
-    between 'vocals' and '.wav'.
+    between 'vocals' and '.wav'. Pass a job's scratch directory as ``tmp_dir``
+    so concurrent jobs only touch their own exports.
     """
-    # Determine the correct tmp directory path for both Unix and Windows
-    tmp_dir = ''
-    tmp_dir = "/tmp" if IS_LAMBDA_ENV else "/tmp"
 
     # Search for any .wav files in the tmp directory
     wav_files = glob.glob(os.path.join(tmp_dir, "*.wav"))
@@ -379,34 +356,25 @@ def check_files_and_directories(directory='/app'):
 
 
 def notify_system_api(song_id, stage, action, file_name=None, err_msg=None, receipt_handle=None):
-    """Notify the system API of the process status."""
-    try:
-        response = requests.post(
-            # add to config 
-            SYSTEM_API_URL,
-            json={
-                "songID": song_id,
-                "stage": stage,
-                "action": action,
-                "fileName": file_name,
-                "errMsg": err_msg,
-                "receiptHandle": receipt_handle
-            }
-        )
-        payload_data = {
-                "songID": song_id,
-                "stage": stage,
-                "action": action,
-                "fileName": file_name,
-                "errMsg": err_msg,
-                "receiptHandle": receipt_handle
-            }
-        response.raise_for_status()
-        print(json.dumps(payload_data, indent="4"))
-        print(response.json())
-        print(f"{action.capitalize()} status notified successfully.")
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to notify {action} status: {e}")
+    """Notify the system API of the process status.
+
+    Delivery happens in the background (see ``notifications``). Statuses for
+    one song and stage are sent in order; only a repeat of the same action
+    replaces one that has not been sent yet, so an "error" is never dropped
+    in favour of the "end" that follows it. Call ``flush_notifications``
+    where the status must have gone out.
+    """
+    payload_data = {
+        "songID": song_id,
+        "stage": stage,
+        "action": action,
+        "fileName": file_name,
+        "errMsg": str(err_msg) if err_msg is not None else None,
+        "receiptHandle": receipt_handle
+    }
+    get_dispatcher().submit(
+        SYSTEM_API_URL, payload_data, coalesce_key=(song_id, stage, action), order_key=(song_id, stage)
+    )
         
         
 # def log_and_expect(process, expected_prompt, stage_bar):
@@ -0,0 +1,110 @@
+"""Cold-import budget for the Lambda entry point.
+
+Runs ``python -X importtime -c "import script"`` in a fresh interpreter and
+fails (exit code 1) when the import takes longer than the budget or when one
+of the heavy dependencies that should only load on first use is imported:
+
+    python import_budget.py [--module script] [--budget-ms 1500] [--runs 3] [--deferred-only]
+
+The fastest of ``--runs`` attempts is compared against the budget, which
+keeps the check stable on a noisy machine. ``IMPORT_BUDGET_MS`` overrides the
+default budget. The timing depends on the machine, so it is checked by
+``test_import_budget``; the Docker build runs only the deterministic
+``--deferred-only`` check.
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+# Only needed once a job runs; importing any of them at module scope is a regression
+DEFERRED_MODULES = ("pandas", "nltk", "pretty_midi", "pyphen", "openai", "tqdm", "onnxruntime", "rich", "boto3", "botocore")
+DEFAULT_BUDGET_MS = int(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module, cwd=None):
+    """Import ``module`` in a fresh interpreter; return ``[(name, self_us, cumulative_us, depth)]``.
+
+    Entries are in ``-X importtime`` order: every module's dependencies are
+    listed right before it, one level deeper.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def _module_subtree(entries, module):
+    """The entry for ``module`` and the entries it imported (skipping interpreter startup)."""
+    index = max(i for i, entry in enumerate(entries) if entry[0] == module)
+    depth = entries[index][3]
+    start = index
+    while start > 0 and entries[start - 1][3] > depth:
+        start -= 1
+    return entries[index], entries[start:index]
+
+
+def check_budget(module, runs=3, cwd=None):
+    """Return ``(best_ms, deferred_imported, slowest)`` for the fastest of ``runs`` imports."""
+    best = None
+    for _ in range(runs):
+        root, subtree = _module_subtree(measure_import(module, cwd), module)
+        if best is None or root[2] < best[0][2]:
+            best = (root, subtree)
+
+    root, subtree = best
+    deferred_imported = sorted({name for name, *_ in subtree if name.split(".")[0] in DEFERRED_MODULES})
+    # Slowest direct dependencies of the module, for the report
+    slowest = sorted(
+        ((name, cumulative_us) for name, _, cumulative_us, depth in subtree if depth == root[3] + 1),
+        key=lambda item: item[1],
+        reverse=True
+    )[:10]
+    return root[2] / 1000, deferred_imported, slowest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when the cold import of a module exceeds its budget.")
+    parser.add_argument("--module", default="script")
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--deferred-only", action="store_true",
+                        help="only fail on deferred modules imported at module scope, not on timing")
+    args = parser.parse_args(argv)
+
+    # helpers logs to /tmp/Logs from import time
+    os.makedirs("/tmp/Logs", exist_ok=True)
+    here = os.path.dirname(os.path.abspath(__file__))
+    import_ms, deferred_imported, slowest = check_budget(args.module, args.runs, cwd=here)
+
+    print(f"import {args.module}: {import_ms:.0f} ms (budget {args.budget_ms} ms)")
+    for name, cumulative_us in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if deferred_imported:
+        print(f"FAIL: imported at module scope: {', '.join(deferred_imported)}")
+        failed = True
+    if import_ms > args.budget_ms and not args.deferred_only:
+        print(f"FAIL: cold import is {import_ms - args.budget_ms:.0f} ms over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import io
+import os
+import csv
+import json
+import shutil
+import tempfile
+import logging
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger()
+
+JOBS_BASE_DIR = os.getenv("OU_JOBS_BASE_DIR", "/tmp/jobs")
+# Also write the intermediate artifacts (readable lyrics, lyrics JSON, MIDI sections, summary) to work_dir
+PERSIST_DEBUG_ARTIFACTS = os.getenv("OU_PERSIST_DEBUG_ARTIFACTS", "false").lower() in ("1", "true", "yes")
+
+
+# The job whose work is running; helper threads inherit it from the callables they are handed
+# (``contextvars.copy_context().run``), so their records reach the job's log too
+current_job_id = contextvars.ContextVar("current_job_id", default=None)
+
+
+class _JobFilter(logging.Filter):
+    """Only let through records emitted while working on the given job."""
+
+    def __init__(self, job_id):
+        super().__init__()
+        self.job_id = job_id
+
+    def filter(self, record):
+        return current_job_id.get() == self.job_id
+
+
+@dataclass
+class JobArtifacts:
+    """Intermediate results handed from one pipeline stage to the next in memory.
+
+    Only OpenUtau's inputs (MIDI and UTAU lyrics) have to exist as files; the
+    rest are serialized straight into S3 uploads.
+    """
+    lyrics: Optional[str] = None                      # readable lyrics from the lyrics stage
+    lyrics_json: Optional[List[Dict[str, Any]]] = None  # timed lines for the video
+    syllable_counts: Optional[List[int]] = None
+    formatted_lines: Optional[List[str]] = None
+    utau_lyrics: Optional[str] = None
+    midi: Any = None                                  # pretty_midi.PrettyMIDI of the final melody
+    section_summary: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def lyrics_lines(self):
+        return [line.strip() for line in self.lyrics.splitlines()]
+
+    def lyrics_json_text(self):
+        return json.dumps(self.lyrics_json, indent=4)
+
+    def section_summary_csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(self.section_summary[0]) if self.section_summary else [])
+        writer.writeheader()
+        writer.writerows(self.section_summary)
+        return buffer.getvalue()
+
+
+@dataclass
+class JobContext:
+    """Per-song state and scratch paths.
+
+    Every file a job reads or writes lives under its own ``work_dir`` so that
+    several songs can be processed at the same time by one worker.
+    """
+    song_id: str
+    name: str
+    reason: str
+    work_dir: str
+    final_filename: str
+    midi_path: str
+    lyrics_path: str
+    lyrics_readable_path: str
+    lyrics_json_path: str
+    export_path: str
+    ustx_path: str
+    section_summary_path: str
+    midi_sections_dir: str
+    log_path: str
+    system_log_path: str
+    artifacts: JobArtifacts = field(default_factory=JobArtifacts)
+    fresh: bool = False                               # generate new lyrics instead of reusing cached ones
+    persist_debug_artifacts: bool = PERSIST_DEBUG_ARTIFACTS
+    _log_handler: logging.Handler = field(default=None, repr=False)
+    _job_token: Any = field(default=None, repr=False)
+
+    @classmethod
+    def create(cls, body, base_dir=JOBS_BASE_DIR):
+        """Build a context for an SQS message body and create its scratch directory.
+
+        A truthy ``"fresh"`` in the body asks for new lyrics rather than ones
+        cached for the same name and reason.
+        """
+        song_id = body.get("songID")
+        os.makedirs(base_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix=f"song_{song_id}_", dir=base_dir)
+        final_filename = f"song_{song_id}_vocals"
+        midi_sections_dir = os.path.join(work_dir, "midi_sections")
+        os.makedirs(midi_sections_dir, exist_ok=True)
+
+        return cls(
+            song_id=song_id,
+            name=body.get("name"),
+            reason=body.get("reason"),
+            work_dir=work_dir,
+            final_filename=final_filename,
+            midi_path=os.path.join(work_dir, "midi.mid"),
+            lyrics_path=os.path.join(work_dir, "lyrics.txt"),
+            lyrics_readable_path=os.path.join(work_dir, "lyrics_readable.txt"),
+            lyrics_json_path=os.path.join(work_dir, "lyrics.json"),
+            export_path=os.path.join(work_dir, f"{final_filename}.wav"),
+            ustx_path=os.path.join(work_dir, f"{final_filename}.ustx"),
+            section_summary_path=os.path.join(work_dir, "section_summary.csv"),
+            midi_sections_dir=midi_sections_dir,
+            log_path=os.path.join(work_dir, f"song_{song_id}_utaulogs.log"),
+            system_log_path=os.path.join(work_dir, "openutau_process.log"),
+            fresh=str(body.get("fresh", "false")).lower() in ("1", "true", "yes"),
+        )
+
+    def write_text(self, path, text, debug_only=False):
+        """Write ``text`` to ``path``; with ``debug_only`` only when debug persistence is on."""
+        if debug_only and not self.persist_debug_artifacts:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    @property
+    def job_id(self):
+        """Unique per job, unlike ``song_id``."""
+        return os.path.basename(self.work_dir)
+
+    def attach_log_handler(self):
+        """Mirror root-logger records made on behalf of this job into the job's system log.
+
+        The current context is tagged with ``job_id``; records from helper
+        threads count as long as their work was submitted with a copy of it.
+        """
+        self._job_token = current_job_id.set(self.job_id)
+        handler = logging.FileHandler(self.system_log_path)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handler.addFilter(_JobFilter(self.job_id))
+        logging.getLogger().addHandler(handler)
+        self._log_handler = handler
+
+    def detach_log_handler(self):
+        if self._log_handler is not None:
+            logging.getLogger().removeHandler(self._log_handler)
+            self._log_handler.close()
+            self._log_handler = None
+        if self._job_token is not None:
+            current_job_id.reset(self._job_token)
+            self._job_token = None
+
+    def cleanup(self):
+        """Remove the job's scratch directory and everything in it."""
+        self.detach_log_handler()
+        try:
+            shutil.rmtree(self.work_dir)
+            print(f"Removed {self.work_dir}")
+        except FileNotFoundError:
+            pass
+        except Exception as remove_error:
+            logger.error(f"Failed to remove {self.work_dir}: {remove_error}")
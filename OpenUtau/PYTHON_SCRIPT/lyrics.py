@@ -4,8 +4,9 @@ import re
 import json
 from dotenv import load_dotenv
 from VideoLyricsJSONGenerator import VideoLyricsJSONGenerator, LyricGPTAgent, SyllableCountGPTAgent
-from helpers import count_syllables, count_syllables_in_line, writeJSONStringToFile
-import requests
+from helpers import writeJSONStringToFile
+from notifications import get_dispatcher
+from syllable_cache import normalize_word
 import time
 import random
 
@@ -13,53 +14,63 @@ import random
 # Load environment variables from .env
 load_dotenv()
 
-# Load API key from environment variable
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("API key not found. Set the OPENAI_API_KEY environment variable.")
-
-from midi_lyrics_service import midimain
-from utau_lyrics_service import utau_lyrics_main
 LYRICS_API_URL = os.getenv("LYRICS_API_URL")
 
+def get_api_key():
+    """Load the OpenAI API key from the environment; checked on first use, not at import."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("API key not found. Set the OPENAI_API_KEY environment variable.")
+    return api_key
+
 def notify_lyrics_json_upload(song_id, file_name):
-    url = LYRICS_API_URL
+    """Tell the lyrics API the JSON is in S3; delivered in the background."""
     data = {
         "songID": song_id,
         "fileName": file_name
     }
-    try:
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        print(f"Notification sent successfully. Response: {response.json()}")
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to notify the API: {e}")
+    get_dispatcher().submit(LYRICS_API_URL, data, coalesce_key=(song_id, "lyrics_json"))
+
+def format_lines_in_utau(lines):
+    """Format a lyric sheet in UTAU format by adding + after multisyllabic words.
+
+    Every distinct word is resolved once for the whole sheet: locally when
+    possible, otherwise in a single grouped GPT request.
+    """
+    counts = get_syllable_agent().count_words(word for line in lines for word in line.split())
+    formatted_lines = []
+    for line in lines:
+        formatted_line = []
+        for word in line.split():
+            syllable_count = counts.get(normalize_word(word), 1)
+            if syllable_count > 1:
+                formatted_line.append(f"{word} {'+ ' * (syllable_count - 1)}".strip())
+            else:
+                formatted_line.append(word)
+        formatted_lines.append(' '.join(formatted_line))
+    return formatted_lines
 
 def format_line_in_utau(line):
     """Format the line in UTAU format by adding + after multisyllabic words."""
-    words = line.split()
-    formatted_line = []
-    for word in words:
-        syllable_count = count_syllables(word)
-        if syllable_count > 1:
-            formatted_line.append(f"{word} {'+ ' * (syllable_count - 1)}".strip())
-        else:
-            formatted_line.append(word)
-    return ' '.join(formatted_line)
+    return format_lines_in_utau([line])[0]
 
-# Initialize the syllable counting agent
-syllable_agent = SyllableCountGPTAgent(api_key)
+# The syllable counting agent is created on first use
+_syllable_agent = None
+
+def get_syllable_agent():
+    global _syllable_agent
+    if _syllable_agent is None:
+        _syllable_agent = SyllableCountGPTAgent(get_api_key())
+    return _syllable_agent
 
 def count_syllables(word):
-    """Get the syllable count for a single word using the GPT agent."""
-    line = word.strip()
-    formatted_line = syllable_agent.count_syllables_in_line(line)
-    syllable_counts = syllable_agent.get_syllable_count_from_response(formatted_line)
-    return syllable_counts.get(word.lower(), 1)  # Return syllable count or default to 1
+    """Get the syllable count for a single word; GPT is only asked when it can't be counted locally."""
+    return get_syllable_agent().count_words([word]).get(normalize_word(word), 1)  # Default to 1
 
 def count_syllables_in_line(line, use_gpt=True):
     """Calculate the number of syllables in a line using the GPT agent."""
     if use_gpt:
+        syllable_agent = get_syllable_agent()
         formatted_line = syllable_agent.count_syllables_in_line(line)
         syllable_counts = syllable_agent.get_syllable_count_from_response(formatted_line)
         return sum(syllable_counts.values())
@@ -119,34 +130,39 @@ def add_num_syllables_to_json(json_data, field_name):
     for element in json_data:
         if "lineText" in element:
             element["line"] = element.pop("lineText")
-        if "line" in element:
-            num_syllables = count_syllables_in_line(element["line"], use_gpt=True)
-            element[field_name] = num_syllables
+    elements = [element for element in json_data if "line" in element]
+    # The whole sheet is counted at once, with at most one GPT request for the words it is unsure of
+    syllable_agent = get_syllable_agent()
+    formatted_lines = syllable_agent.count_syllables_in_each_line([element["line"] for element in elements])
+    for element, formatted_line in zip(elements, formatted_lines):
+        element[field_name] = sum(syllable_agent.get_syllable_count_from_response(formatted_line).values())
     return json_data
 
-def main_lyrics(name, reason):
-    """Main function to generate, analyze, and save lyrics."""
+def main_lyrics(name, reason, ctx, fresh=False):
+    """Main function to generate and analyze lyrics; results go to ``ctx.artifacts``.
+
+    Lyrics already generated for the same name and reason are reused unless ``fresh`` is set.
+    """
     # Initialize LyricGPTAgent
     print ("Initializing LyricGPTAgent")
-    agent = LyricGPTAgent(api_key)
+    agent = LyricGPTAgent(get_api_key())
 
     # Step 1: Generate lyrics
     start = time.monotonic()
-    lyrics = agent.get_jingle_clone(name, reason)
+    lyrics = agent.get_jingle_clone(name, reason, fresh=fresh)
     lyrics = re.sub(r'\d+', '', lyrics)
     lyrics = re.sub(r'\[.*?\]', '', lyrics)
     lyrics = re.sub(r'\(.*?\)', '', lyrics)
     lyrics = lyrics.replace("{name}", name).replace("{reason}", reason)
     lyrics = lyrics.strip()
 
-
-    # Save lyrics to a text file
-    with open("/tmp/lyrics_readable.txt", "w", encoding="utf-8") as file:
-        file.write(lyrics)
+    # Later stages read the lyrics from memory; the file is only kept for debugging
+    ctx.artifacts.lyrics = lyrics
+    ctx.write_text(ctx.lyrics_readable_path, lyrics, debug_only=True)
         
     end = time.monotonic()
     
-    print("Time taken to generate lyrics and write them to lyrics_readable:", timedelta(seconds=end-start))
+    print("Time taken to generate lyrics:", timedelta(seconds=end-start))
 
 
     start = time.monotonic()
@@ -155,43 +171,19 @@ def main_lyrics(name, reason):
     # Create an instance of the VideoLyricsJSONGenerator
     json_agent = VideoLyricsJSONGenerator()
 
-    # Read the lyrics from a file or provide them as input
-    with open("/tmp/lyrics_readable.txt", "r", encoding="utf-8") as file:
-        lyrics = file.read()
-
     # Generate structured JSON without using GPT
     structured_lyrics = json_agent.structure_lyrics_json(lyrics)
+    for element in structured_lyrics:
+        if "lineText" in element:
+            element["line"] = element.pop("lineText")
+    ctx.artifacts.lyrics_json = structured_lyrics
+    ctx.write_text(ctx.lyrics_json_path, ctx.artifacts.lyrics_json_text(), debug_only=True)
 
-    # Define the path for the output file
-    lyrics_file_path = "/tmp/lyrics.json"
-
-    # Write the structured JSON to a file
-    with open(lyrics_file_path, "w", encoding="utf-8") as outfile:
-        json.dump(structured_lyrics, outfile, ensure_ascii=False)
-
-    print(f"Structured JSON saved to {lyrics_file_path}")
-
-    
-    
     end = time.monotonic()
     print("Time taken to generate lyrics JSON:", timedelta(seconds=end-start))
 
-
-    # start = time.monotonic()
     # # Step 3: Add syllable count to each JSON element
-    with open(lyrics_file_path, 'r') as file:
-        json_data = json.load(file)
-    # updated_json_data = add_num_syllables_to_json(json_data, "num_syllables")
-    # end = time.monotonic()
-    # print("Time taken to add syllable count to JSON:", timedelta(seconds=end-start))
-    
-    updated_json_data = json_data
-    for element in updated_json_data:
-        if "lineText" in element:
-            element["line"] = element.pop("lineText")
-    # Save the updated JSON data back to the file
-    with open(lyrics_file_path, 'w', encoding='utf-8') as file:
-        json.dump(updated_json_data, file, indent=4)
+    # updated_json_data = add_num_syllables_to_json(structured_lyrics, "num_syllables")
 
     # # Step 4: Analyze syllables and print a report
     # start = time.monotonic()
@@ -201,8 +193,9 @@ def main_lyrics(name, reason):
     # print("Time taken to analyze syllables:", timedelta(seconds=end-start))
 
 # Run the main_lyrics function with specified name and reason
-def lyrics_process(name, reason):
-    main_lyrics(name, reason) #saves lyrics to /tmp/lyrics_readable.txt and json to /tmp/lyrics.json
+def lyrics_process(name, reason, ctx, fresh=False):
+    main_lyrics(name, reason, ctx, fresh=fresh) #stores the lyrics and lyrics JSON in ctx.artifacts
     
 if __name__ == "__main__":
-    lyrics_process("Mcconaughey", "birthday")
+    from job_context import JobContext
+    lyrics_process("Mcconaughey", "birthday", JobContext.create({"songID": "local", "name": "Mcconaughey", "reason": "birthday"}))
@@ -1,24 +1,21 @@
 import pretty_midi
 import os
 import re
-import boto3
-import pyphen
-import nltk
-import pandas as pd
 from VideoLyricsJSONGenerator import SyllableCountGPTAgent
-from helpers import calculate_bar_duration, download_folder_from_s3, print_final_summary,wait_for_file, download_file_from_s3, load_lyrics, calculate_total_notes, combine_midi_sections, get_last_end_time, copy_instruments_within_range
+from helpers import calculate_bar_duration, print_final_summary, calculate_total_notes, combine_midi_sections, get_last_end_time, copy_instruments_within_range
 from utau_lyrics_service import process_lyrics
+from static_assets import get_static_assets
 import logging
 
 REGION_NAME = os.getenv('REGION_NAME')
 BUCKET_NAME = os.getenv("BUCKET_NAME")
 
-s3_client = boto3.client('s3', region_name=REGION_NAME)
-# Load lyrics and get syllable counts
-def load_and_process_lyrics(filepath):
-    lyrics = load_lyrics(filepath)
+# Get syllable counts for the lyric lines
+def load_and_process_lyrics(lyrics):
     syllable_count_agent = SyllableCountGPTAgent(api_key=os.getenv("OPENAI_API_KEY"))
     syllable_counts, formatted_lines = syllable_count_agent.request_syllable_counts(lyrics)
+    logging.info(f"Syllable cache: {syllable_count_agent.cache.stats()}")
+    syllable_count_agent.cache.maybe_save_snapshot()
     
     # Add dummy syllable counts at the beginning
     syllable_counts.insert(0, 0)
@@ -32,10 +29,9 @@ def get_note_sequence(note_sequence, note_mapping):
     return [note_mapping[note] for note in note_sequence]
 
 # Split the MIDI file into sections and process each
-def split_midi_file(input_file, output_folder, num_segments, bpm, syllable_counts, note_sequence_midi, note_duration):
+def split_midi_file(midi_data, output_folder, num_segments, bpm, syllable_counts, note_sequence_midi, note_duration):
     sections_info = []
     sections_midi = []
-    midi_data = pretty_midi.PrettyMIDI(input_file, initial_tempo=bpm)
     total_duration = midi_data.get_end_time()
     segment_duration = total_duration / num_segments
     bar_duration = calculate_bar_duration(bpm)
@@ -44,8 +40,9 @@ def split_midi_file(input_file, output_folder, num_segments, bpm, syllable_count
         start_time = i * segment_duration
         end_time = min((i + 1) * segment_duration, total_duration)
         new_midi = copy_instruments_within_range(midi_data, start_time, end_time, bpm)
-        output_file = f'section_{i + 1}.mid'
-        new_midi.write(os.path.join(output_folder, output_file))
+        if output_folder is not None:
+            # Sections are combined in memory; the files are only written for debugging
+            new_midi.write(os.path.join(output_folder, f'section_{i + 1}.mid'))
         sections_midi.append(new_midi)
 
         note_count = len(new_midi.instruments[0].notes) if len(new_midi.instruments) > 0 else 0
@@ -152,6 +149,8 @@ def adjust_notes_in_section(i, sections_info, sections_midi, note_sequence_midi,
 
 
 
+SECTION_SUMMARY_FIELDS = ["Section Number", "Expected Syllables", "Actual Notes Count", "Difference", "Status"]
+
 # Create summary data for sections
 def create_section_summary(sections_info):
     summary_data = [{
@@ -161,29 +160,45 @@ def create_section_summary(sections_info):
         "Difference": section_info["difference"],
         "Status": section_info["status"]
     } for section_info in sections_info]
+    return summary_data
+
 
-    summary_df = pd.DataFrame(summary_data)
-    summary_df.to_csv('/tmp/section_summary.csv', index=False)
-    return summary_df
+def format_section_summary(summary_data):
+    """Render summary rows as a fixed-width table for the logs."""
+    widths = {field: max(len(field), *(len(str(row[field])) for row in summary_data)) for field in SECTION_SUMMARY_FIELDS}
+    lines = ["  ".join(field.rjust(widths[field]) for field in SECTION_SUMMARY_FIELDS)]
+    lines += ["  ".join(str(row[field]).rjust(widths[field]) for field in SECTION_SUMMARY_FIELDS) for row in summary_data]
+    return "\n".join(lines)
 
 # Main function to orchestrate the entire process
-def midimain():
-    lyrics, syllable_counts, formatted_lines, final_formatted_string = load_and_process_lyrics('/tmp/lyrics_readable.txt')
+def midimain(ctx):
+    """Build the song's MIDI and UTAU lyrics from ``ctx.artifacts.lyrics``.
+
+    Results are stored on ``ctx.artifacts``; only the MIDI file OpenUtau
+    imports is written to disk (plus debug copies when enabled).
+    """
+    lyrics, syllable_counts, formatted_lines, final_formatted_string = load_and_process_lyrics(ctx.artifacts.lyrics_lines)
+    ctx.artifacts.syllable_counts = syllable_counts
+    ctx.artifacts.formatted_lines = formatted_lines
     note_sequence = ['A', 'A', 'B', 'A', 'A', 'A', 'B', 'D']
     note_mapping = {'A': 69 - 36, 'B': 71 - 36, 'D': 74 - 36}
     note_sequence_midi = get_note_sequence(note_sequence, note_mapping)
     
     bpm = 120
     note_duration = 0.25
-    if wait_for_file(BUCKET_NAME, "bridgetnew.mid", s3_client):
-        download_file_from_s3(BUCKET_NAME, "bridgetnew.mid", "/tmp/bridgetnew.mid")
-        download_folder_from_s3(BUCKET_NAME, "midi_sections", "/tmp/midi_sections")
-    trimmed_file = '/tmp/bridgetnew.mid'
-    output_folder = '/tmp/midi_sections'
+    # Static inputs come from the TTL cache; steady-state songs make no S3 calls for them
+    static_assets = get_static_assets()
+    midi_template = static_assets.get_midi("bridgetnew.mid")
+    if midi_template is None:
+        midi_template = pretty_midi.PrettyMIDI('/tmp/bridgetnew.mid')  # copy baked into the image
+    output_folder = None
+    if ctx.persist_debug_artifacts:
+        static_assets.copy_prefix("midi_sections", ctx.midi_sections_dir)
+        output_folder = ctx.midi_sections_dir
     
     bar_duration = calculate_bar_duration(bpm)
 
-    sections_info, sections_midi = split_midi_file(trimmed_file, output_folder, num_segments=18, bpm=bpm, syllable_counts=syllable_counts, note_sequence_midi=note_sequence_midi, note_duration=note_duration)
+    sections_info, sections_midi = split_midi_file(midi_template, output_folder, num_segments=18, bpm=bpm, syllable_counts=syllable_counts, note_sequence_midi=note_sequence_midi, note_duration=note_duration)
 
     
     # Add notes to beats 5-8 of section 1 after the loop if sections_info[0]['difference'] < 0
@@ -212,20 +227,29 @@ def midimain():
     
     final_midi = combine_midi_sections(sections_midi, bpm)
     
-    final_midi.write('/tmp/midi.mid')
+    # OpenUtau imports the MIDI from disk
+    final_midi.write(ctx.midi_path)
+    ctx.artifacts.midi = final_midi
 
-    summary_df = create_section_summary(sections_info)
+    summary_data = create_section_summary(sections_info)
+    ctx.artifacts.section_summary = summary_data
+    ctx.write_text(ctx.section_summary_path, ctx.artifacts.section_summary_csv(), debug_only=True)
     print("Full Summary of Sections:")
-    print(summary_df)
+    print(format_section_summary(summary_data))
 
     total_difference = sum(section_info["difference"] for section_info in sections_info) - 1
     print(f"Total difference (sum of differences minus 1): {total_difference}")
 
     utau_lyrics = process_lyrics(final_formatted_string)
+    ctx.artifacts.utau_lyrics = utau_lyrics
     print(utau_lyrics)
 
     return final_formatted_string, utau_lyrics
 
 if __name__ == "__main__":
-    midimain()
+    from job_context import JobContext
+    ctx = JobContext.create({"songID": "local"})
+    with open("/tmp/lyrics_readable.txt", "r", encoding="utf-8") as f:
+        ctx.artifacts.lyrics = f.read()
+    midimain(ctx)
 
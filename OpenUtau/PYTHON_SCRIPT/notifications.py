@@ -0,0 +1,163 @@
+import os
+import json
+import atexit
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "1000"))
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "2"))
+NOTIFY_RETRIES = int(os.getenv("NOTIFY_RETRIES", "4"))
+# (connect, read) seconds per attempt
+NOTIFY_TIMEOUT = (3.05, float(os.getenv("NOTIFY_READ_TIMEOUT", "10")))
+# How long a checkpoint flush waits for outstanding notifications
+NOTIFY_FLUSH_TIMEOUT = float(os.getenv("NOTIFY_FLUSH_TIMEOUT", "30"))
+
+
+def _build_session(retries, pool_size):
+    """A keep-alive session that retries connection errors and 429/5xx with exponential backoff."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class NotificationDispatcher:
+    """Deliver status notifications from background threads over a pooled session.
+
+    ``submit`` returns immediately. Notifications with the same
+    ``order_key`` (e.g. the same song and stage) are sent one at a time in
+    submission order; an undelivered notification is replaced by a newer one
+    with the same ``coalesce_key`` (e.g. a repeated status), so a slow API
+    does not see duplicates. The queue is
+    bounded: when it is full, ``submit`` waits for room. ``flush`` blocks until everything
+    submitted so far has been delivered (or given up on) and is called at
+    the pipeline's checkpoints.
+    """
+
+    def __init__(self, max_pending=NOTIFY_QUEUE_SIZE, workers=NOTIFY_WORKERS, retries=NOTIFY_RETRIES,
+                 timeout=NOTIFY_TIMEOUT, session=None):
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.session = session or _build_session(retries, pool_size=max(workers, 1) * 2)
+        self._pending = OrderedDict()
+        self._in_flight_keys = set()
+        self._sequence = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"notify-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, url, payload, coalesce_key=None, order_key=None):
+        """Queue ``payload`` to be POSTed to ``url`` as JSON.
+
+        ``order_key`` defaults to ``coalesce_key``; without either the
+        notification is neither coalesced nor ordered against others.
+        """
+        if not url:
+            logger.warning(f"No notification URL configured; dropping {payload}")
+            return
+        with self._condition:
+            key = (url, coalesce_key) if coalesce_key is not None else None
+            if key is not None and key in self._pending:
+                logger.info(f"Coalescing notification {coalesce_key}: {payload.get('action', '')}")
+                self._pending[key] = (url, payload, self._pending[key][2], contextvars.copy_context())
+                return
+            while len(self._pending) >= self.max_pending and not self._closed:
+                self._condition.wait()
+            if key is None:
+                self._sequence += 1
+                key = ("uncoalesced", self._sequence)
+            if order_key is not None:
+                order_key = (url, order_key)
+            self._pending[key] = (url, payload, order_key or key, contextvars.copy_context())
+            self._condition.notify_all()
+
+    def flush(self, timeout=NOTIFY_FLUSH_TIMEOUT):
+        """Wait until all submitted notifications are delivered; returns False on timeout."""
+        with self._condition:
+            done = self._condition.wait_for(lambda: not self._pending and not self._in_flight_keys, timeout)
+        if not done:
+            logger.warning(f"Notification flush timed out with {len(self._pending)} pending")
+        return done
+
+    def close(self, timeout=NOTIFY_FLUSH_TIMEOUT):
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _next_key(self):
+        """The oldest pending key whose order key is not being delivered, so each order key stays in order."""
+        for key, (_, _, order_key, _) in self._pending.items():
+            if order_key not in self._in_flight_keys:
+                return key
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._next_key() is not None or (self._closed and not self._pending))
+                key = self._next_key()
+                if key is None:
+                    return
+                url, payload, order_key, context = self._pending.pop(key)
+                self._in_flight_keys.add(order_key)
+                self._condition.notify_all()
+            try:
+                # Delivered in the submitter's context, so failures are logged with its job
+                context.run(self._deliver, url, payload)
+            finally:
+                with self._condition:
+                    self._in_flight_keys.discard(order_key)
+                    self._condition.notify_all()
+
+    def _deliver(self, url, payload):
+        action = str(payload.get("action") or "notification")
+        try:
+            response = self.session.post(url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            print(json.dumps(payload, indent=4))
+            print(f"{action.capitalize()} status notified successfully.")
+        except Exception as e:  # a failed notification must never take the dispatcher down
+            logger.error(f"Failed to notify {action} status for song {payload.get('songID')}: {e}")
+            print(f"Failed to notify {action} status: {e}")
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """The process-wide dispatcher; flushed on interpreter exit."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+            atexit.register(_dispatcher.close)
+        return _dispatcher
+
+
+def flush_notifications(timeout=NOTIFY_FLUSH_TIMEOUT):
+    """Checkpoint: wait for outstanding notifications if any were sent."""
+    if _dispatcher is not None:
+        return _dispatcher.flush(timeout)
+    return True
@@ -0,0 +1,223 @@
+import json
+import queue
+import subprocess
+import threading
+import time
+import uuid
+import logging
+from dataclasses import dataclass, field
+from render_supervisor import (
+    RENDER_CRASHED,
+    RENDER_FAILED,
+    RenderError,
+    RenderSupervisor,
+    kill_process_tree
+)
+
+logger = logging.getLogger()
+
+# Markers printed by `OpenUtau --serve` (see Program.Serve)
+ENGINE_READY_MARKER = "@@READY"
+ENGINE_RESULT_MARKER = "@@RESULT "
+
+
+class EngineError(RenderError):
+    """Raised when a render job on a warm engine fails.
+
+    ``recycle`` is True when the engine itself is unusable (crashed, wedged or
+    talking garbage) and must be restarted before the next job.
+    """
+
+    def __init__(self, kind, message, recycle=True):
+        super().__init__(kind, message)
+        self.recycle = recycle
+
+
+@dataclass
+class RenderResult:
+    """Structured outcome of a render, parsed from an ``@@RESULT`` line."""
+    status: str
+    files: list = field(default_factory=list)
+    error: str = None
+    elapsed_ms: int = 0
+    returncode: int = None
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    @classmethod
+    def from_line(cls, line, returncode=None):
+        payload = json.loads(line[len(ENGINE_RESULT_MARKER):])
+        return cls(
+            status=payload.get("status", "error"),
+            files=payload.get("files") or [],
+            error=payload.get("error"),
+            elapsed_ms=payload.get("elapsedMs", 0),
+            returncode=returncode
+        )
+
+
+class OpenUtauEngine:
+    """One long-lived ``OpenUtau --serve`` process.
+
+    The engine keeps singers and phonemizer models loaded, so a render job only
+    pays for the synthesis itself. Jobs are sent as one JSON line on stdin and
+    answered by one ``@@RESULT {json}`` line on stdout.
+    """
+
+    def __init__(self, executable="./OpenUtau", startup_timeout=300, max_jobs=200):
+        self.executable = executable
+        self.startup_timeout = startup_timeout
+        self.max_jobs = max_jobs
+        self.process = None
+        self.lines = None
+        self.jobs_done = 0
+
+    def start(self):
+        """Spawn the engine and wait until it reports that it is initialized."""
+        start_time = time.monotonic()
+        self.process = subprocess.Popen(
+            [self.executable, "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1,
+            start_new_session=True  # own process group, so stop() can kill the whole tree
+        )
+        self.lines = queue.Queue()
+        self.jobs_done = 0
+        threading.Thread(target=self._pump, args=(self.process, self.lines), daemon=True).start()
+        self._read_until(
+            lambda line: line == ENGINE_READY_MARKER,
+            RenderSupervisor(deadline=self.startup_timeout),
+            logger.info
+        )
+        logger.info(f"OpenUtau engine {self.process.pid} ready in {time.monotonic() - start_time:.2f} seconds")
+
+    @staticmethod
+    def _pump(process, lines):
+        """Move engine stdout into a queue so reads can time out."""
+        for line in process.stdout:
+            lines.put(line.rstrip("\n"))
+        lines.put(None)  # EOF: the engine exited
+
+    def _read_until(self, predicate, supervisor, sink):
+        """Return the first output line matching ``predicate``; pass every other line to ``sink``."""
+        while True:
+            try:
+                supervisor.check()
+            except RenderError as e:
+                raise EngineError(e.kind, e.detail)
+            try:
+                line = self.lines.get(timeout=supervisor.time_left())
+            except queue.Empty:
+                continue
+            if line is None:
+                raise EngineError(RENDER_CRASHED, f"engine exited with code {self.process.wait()}")
+            supervisor.touch()
+            if predicate(line):
+                return line
+            sink(line)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def render(self, ctx, singer, phonemizer, timeout=600, inactivity_timeout=None):
+        """Render the job's MIDI and lyrics to ``ctx.export_path`` and return a ``RenderResult``."""
+        job_id = uuid.uuid4().hex
+        request = {
+            "id": job_id,
+            "command": "render",
+            "midi": ctx.midi_path,
+            "lyrics": ctx.lyrics_path,
+            "export": ctx.export_path,
+            "singer": str(singer),
+            "phonemizer": phonemizer
+        }
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise EngineError(RENDER_CRASHED, f"failed to send job to engine: {e}")
+
+        with open(ctx.log_path, "a", encoding="utf-8") as song_log:
+            line = self._read_until(
+                lambda line: line.startswith(ENGINE_RESULT_MARKER),
+                RenderSupervisor(deadline=timeout, inactivity_timeout=inactivity_timeout),
+                lambda line: song_log.write(line + "\n")
+            )
+        try:
+            answered_id = json.loads(line[len(ENGINE_RESULT_MARKER):]).get("id")
+            result = RenderResult.from_line(line)
+        except json.JSONDecodeError as e:
+            raise EngineError(RENDER_CRASHED, f"malformed result from engine: {e}")
+        if answered_id != job_id:
+            raise EngineError(RENDER_CRASHED, f"engine answered job {answered_id} instead of {job_id}")
+
+        self.jobs_done += 1
+        if not result.ok:
+            raise EngineError(RENDER_FAILED, result.error, recycle=False)
+        return result
+
+    def stop(self):
+        """Stop the engine, killing its whole process group if it does not exit on its own."""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            kill_process_tree(process)
+        logger.info(f"OpenUtau engine {process.pid} stopped with code {process.returncode}")
+
+
+class EnginePool:
+    """A fixed set of warm engines shared by the worker threads.
+
+    Engines are started on first use and restarted automatically after a crash,
+    a timeout, or ``max_jobs`` renders.
+    """
+
+    def __init__(self, size, **engine_kwargs):
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(OpenUtauEngine(**engine_kwargs))
+
+    def render(self, ctx, singer, phonemizer, timeout=600, inactivity_timeout=None):
+        engine = self._idle.get()
+        try:
+            if not engine.is_alive():
+                engine.stop()
+                engine.start()
+            result = engine.render(ctx, singer, phonemizer, timeout, inactivity_timeout)
+            if engine.jobs_done >= engine.max_jobs:
+                logger.info(f"Recycling OpenUtau engine after {engine.jobs_done} jobs")
+                engine.stop()
+            return result
+        except EngineError as e:
+            if e.recycle:
+                logger.warning(f"Recycling OpenUtau engine: {e}")
+                engine.stop()
+            raise
+        finally:
+            self._idle.put(engine)
+
+    def shutdown(self):
+        while not self._idle.empty():
+            self._idle.get().stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_engine_pool(size, **engine_kwargs):
+    """Return the process-wide engine pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EnginePool(size, **engine_kwargs)
+        return _pool
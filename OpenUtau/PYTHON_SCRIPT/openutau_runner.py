@@ -0,0 +1,224 @@
+import subprocess
+import time
+import os
+import re
+import logging
+from helpers import rich_print as print
+from config import initialize_config
+from openutau_engine import ENGINE_RESULT_MARKER, RenderResult, get_engine_pool
+from prompt_expect import ExpectSession, PromptFailure, PromptStep, PromptTimeout
+from render_supervisor import (
+    RENDER_CRASHED,
+    RENDER_FAILED,
+    RENDER_PROMPT_TIMEOUT,
+    RenderError,
+    RenderSupervisor,
+    kill_process_tree
+)
+
+logger = logging.getLogger()
+
+config = initialize_config()
+OU_SINGER_NUMBER = config.OU_SINGER_NUMBER
+OU_RENDER_MODE = config.OU_RENDER_MODE
+OU_PHONEMIZER = config.OU_PHONEMIZER
+
+
+# How OpenUtau reports a singer that is not installed (see Program.RenderJob)
+MISSING_SINGER_PATTERN = re.compile(r"Singer '.*' not found")
+
+
+def render_song(ctx, singer_number=OU_SINGER_NUMBER, assets=None):
+    """Render the job's vocals with the OpenUtau driver selected by ``OU_RENDER_MODE``.
+
+    Every driver enforces ``OU_RENDER_TIMEOUT`` and ``OU_RENDER_INACTIVITY_TIMEOUT``
+    and raises a classified ``RenderError`` when the render does not succeed.
+    With ``assets`` (a ``SingerAssets``) the singer's voicebank is fetched on
+    demand, and fetched again once if OpenUtau reports it missing; OpenUtau is
+    then given the voicebank folder as the singer Id. The interactive CLI only
+    takes a position in its singer list, so it always gets ``singer_number``.
+    """
+    if assets is None:
+        return _render(ctx, singer_number)
+
+    def singer():
+        return singer_number if OU_RENDER_MODE == "interactive" else assets.resolve_singer_folder()
+
+    assets.ensure_singer()
+    try:
+        return _render(ctx, singer())
+    except RenderError as e:
+        if e.kind != RENDER_FAILED or not MISSING_SINGER_PATTERN.search(e.detail or ""):
+            raise
+        logger.warning(f"{e}; fetching the voicebank again and retrying")
+        assets.ensure_singer(refresh=True)
+        return _render(ctx, singer())
+
+
+def _render(ctx, singer_number):
+    if OU_RENDER_MODE == "interactive":
+        run_openutau(ctx, singer_number)
+        return None
+
+    if OU_RENDER_MODE == "engine":
+        pool = get_engine_pool(
+            config.WORKER_CONCURRENCY,
+            max_jobs=config.OU_ENGINE_MAX_JOBS
+        )
+        result = pool.render(
+            ctx, singer_number, OU_PHONEMIZER,
+            timeout=config.OU_RENDER_TIMEOUT,
+            inactivity_timeout=config.OU_RENDER_INACTIVITY_TIMEOUT
+        )
+    else:
+        result = run_openutau_pipeline(ctx, singer_number, OU_PHONEMIZER)
+    print(f"OpenUtau ({OU_RENDER_MODE}) rendered {result.files} in {result.elapsed_ms / 1000:.2f} seconds")
+    logger.info(f"OpenUtau ({OU_RENDER_MODE}) render took {result.elapsed_ms / 1000:.2f} seconds")
+    return result
+
+
+def _render_supervisor():
+    return RenderSupervisor(
+        deadline=config.OU_RENDER_TIMEOUT,
+        inactivity_timeout=config.OU_RENDER_INACTIVITY_TIMEOUT
+    )
+
+
+def run_openutau_pipeline(ctx, singer_number=OU_SINGER_NUMBER, phonemizer=OU_PHONEMIZER):
+    """Render the job in one non-interactive ``OpenUtau --pipeline`` run and return a ``RenderResult``.
+
+    All inputs are passed as arguments, so there are no prompts to answer and
+    no sleeps: OpenUtau exits once the WAV and project are written and reports
+    the outcome on a single ``@@RESULT {json}`` line.
+    """
+    export_base = os.path.splitext(ctx.export_path)[0]  # OpenUtau appends .wav/.ustx itself
+    command = [
+        "./OpenUtau", "--pipeline",
+        "--midi", ctx.midi_path,
+        "--lyrics", ctx.lyrics_path,
+        "--export", export_base,
+        "--singer", str(singer_number),
+        "--phonemizer", phonemizer
+    ]
+    print("Running OpenUtau pipeline")
+    output = []
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True  # own process group, so a wedged render can be killed with its children
+    )
+    try:
+        with open(ctx.log_path, "a", encoding="utf-8") as song_log:
+            def on_text(text):
+                output.append(text)
+                song_log.write(text)
+
+            returncode = _render_supervisor().stream(process, on_text)
+    except RenderError as e:
+        logger.error(f"{e}; killing OpenUtau")
+        kill_process_tree(process)
+        raise
+
+    result_lines = [line for line in "".join(output).splitlines() if line.startswith(ENGINE_RESULT_MARKER)]
+    if not result_lines:
+        raise RenderError(RENDER_CRASHED, f"pipeline exited with code {returncode} without a result")
+    result = RenderResult.from_line(result_lines[-1], returncode=returncode)
+    if not result.ok or returncode != 0:
+        raise RenderError(RENDER_FAILED, f"pipeline exited with code {returncode}: {result.error}")
+    return result
+
+
+def interactive_steps(ctx, singer_number, phonemizer=OU_PHONEMIZER, render_timeout=600):
+    """Expect table for rendering one song through the interactive OpenUtau CLI."""
+    return [
+        PromptStep("> ", "--init"),
+        # --init loads singers and dependencies before asking about the project
+        PromptStep("Select option (1 or 2):", "2", timeout=300),
+        PromptStep("> ", f"--import --midi {ctx.midi_path}"),
+        PromptStep("> ", f"--lyrics {ctx.lyrics_path}"),
+        PromptStep("Select a part number to add lyrics:", "1"),
+        PromptStep("> ", "--track --remove"),
+        PromptStep("Enter the number of the track to remove:", "1"),
+        PromptStep("> ", "--track --update"),
+        # The track list is printed between "Select a track to update:" and this prompt
+        PromptStep("Choose track number:", "1"),
+        PromptStep("Select a singer by number:", str(singer_number)),
+        PromptStep("Enter the phonemizer name to apply:", phonemizer),
+        # The CLI waits for phonemization before exporting (see HandleExportWavCommand)
+        PromptStep("> ", "--export --wav"),
+        # The export saves the unsaved project first
+        PromptStep("Enter the directory path where you want to save the project:", ctx.work_dir),
+        PromptStep("Enter the name for the project file (without extension):", ctx.final_filename),
+        PromptStep("Enter the path where you want to export the WAV file:", ctx.export_path),
+        # Printed once the WAV has been written
+        PromptStep("Project has been successfully exported to WAV", timeout=render_timeout),
+    ]
+
+
+# Output that means the interactive render cannot succeed any more
+INTERACTIVE_FAILURE_PATTERNS = [
+    "An error occurred during the export:",
+    "Aborting export operation.",
+    "Aborting save operation.",
+]
+
+
+def run_openutau(ctx, singer_number=OU_SINGER_NUMBER):
+    """Drive an interactive OpenUtau session to render the job's MIDI and lyrics to a WAV."""
+    start_time = time.time()
+    song_log_file = ctx.log_path
+    os.makedirs(os.path.dirname(song_log_file), exist_ok=True)
+    song_logger = logging.getLogger(f'song_logger_{os.path.basename(ctx.work_dir)}')
+    song_handler = logging.FileHandler(song_log_file)
+    song_handler.setLevel(logging.INFO)
+    song_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    song_handler.setFormatter(song_format)
+    song_logger.addHandler(song_handler)
+    song_logger.setLevel(logging.INFO)
+    song_logger.propagate = False  # Prevents logging to propagate to root logger
+
+    process = None
+    try:
+        print("Running OpenUtau")
+        process = subprocess.Popen(
+            ["./OpenUtau", "--init"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+            start_new_session=True  # own process group, so a wedged render can be killed with its children
+        )
+        print("Subprocess started...")
+
+        session = ExpectSession(
+            process,
+            interactive_steps(ctx, singer_number, OU_PHONEMIZER, config.OU_RENDER_TIMEOUT),
+            failure_patterns=INTERACTIVE_FAILURE_PATTERNS,
+            line_logger=song_logger,
+            supervisor=_render_supervisor()
+        )
+        try:
+            session.run()
+        except PromptTimeout as e:
+            raise RenderError(RENDER_PROMPT_TIMEOUT, str(e))
+        except PromptFailure as e:
+            kind = RENDER_CRASHED if process.poll() is not None else RENDER_FAILED
+            raise RenderError(kind, str(e))
+        print(f"[red]OpenUtau exported {ctx.export_path}[/red]")
+    except RenderError as e:
+        print("Error encountered:", e)
+        logger.error(str(e))
+        raise
+    finally:
+        # The CLI never exits on its own; take down the whole process group
+        kill_process_tree(process)
+        song_logger.removeHandler(song_handler)
+        song_handler.close()
+
+    # Calculate and print the time taken
+    end_time = time.time()
+    total_time = end_time - start_time
+    print(f"Total time taken: {total_time:.2f} seconds")
+    logger.info(f"Total time taken: {total_time:.2f} seconds")
@@ -1,13 +1,42 @@
 import json
+import os
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Set up the logger
 logger = logging.getLogger(__name__)
 
+# SQS never returns more than 10 messages per receive call
+SQS_MAX_MESSAGES_PER_RECEIVE = 10
+
+
+def _handle_message(sqs_client, queue_url, message, process_message_fn):
+    """Process one SQS message and delete it once the processing function returns."""
+    logger.debug(f"Processing message: {message}")
+    try:
+        # Parse the body of the message
+        record_body = json.loads(message["Body"])
+        logger.debug(f"Parsed record body: {record_body}")
+
+        # Call the provided function to process the message
+        process_message_fn(record_body)
+
+        # Delete the message after successful processing
+        sqs_client.delete_message(
+            QueueUrl=queue_url,
+            ReceiptHandle=message["ReceiptHandle"]
+        )
+        logger.info(f"Message processed and deleted: {message['MessageId']}")
+
+    except Exception as e:
+        logger.error(f"Error processing message: {str(e)}")
+
+
 def poll_sqs(sqs_client, queue_url, process_message_fn, wait_time=20, max_messages=10, sleep_interval=5):
     """Poll the SQS queue and process messages.
-    
+
     Args:
         sqs_client: The SQS client object.
         queue_url: The URL of the SQS queue.
@@ -23,30 +52,71 @@ def poll_sqs(sqs_client, queue_url, process_message_fn, wait_time=20, max_messag
             MaxNumberOfMessages=max_messages,
             WaitTimeSeconds=wait_time
         )
-        
+
         # Log the raw response for debugging
         logger.debug(f"Received response: {response}")
         messages = response.get("Messages", [])
-        
+
         for message in messages:
-            logger.debug(f"Processing message: {message}")
+            _handle_message(sqs_client, queue_url, message, process_message_fn)
+
+        # Pause to avoid excessive polling
+        time.sleep(sleep_interval)
+
+
+def poll_sqs_concurrent(sqs_client, queue_url, process_message_fn, max_workers=None, wait_time=20, sleep_interval=5):
+    """Poll the SQS queue and process up to ``max_workers`` messages at the same time.
+
+    Messages are only received when a worker slot is free, so the worker never
+    holds messages it cannot start (they stay visible to other workers instead).
+    ``process_message_fn`` must keep all per-job state local (see ``JobContext``).
+
+    Args:
+        sqs_client: The SQS client object.
+        queue_url: The URL of the SQS queue.
+        process_message_fn: The function to process each message.
+        max_workers: Maximum number of messages processed at once (default is the CPU count).
+        wait_time: Wait time for long-polling (default is 20 seconds).
+        sleep_interval: The pause after an empty poll (default is 5 seconds).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    slots = threading.BoundedSemaphore(max_workers)
+
+    def run(message):
+        try:
+            _handle_message(sqs_client, queue_url, message, process_message_fn)
+        finally:
+            slots.release()
+
+    logger.info(f"Polling {queue_url} with {max_workers} concurrent workers")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="song-worker") as executor:
+        while True:
+            # Wait for one free slot, then grab any others that are free too
+            slots.acquire()
+            free_slots = 1
+            while free_slots < min(max_workers, SQS_MAX_MESSAGES_PER_RECEIVE) and slots.acquire(blocking=False):
+                free_slots += 1
+
             try:
-                # Parse the body of the message
-                record_body = json.loads(message["Body"])
-                logger.debug(f"Parsed record body: {record_body}")
-                
-                # Call the provided function to process the message
-                process_message_fn(record_body)
-                    
-                # Delete the message after successful processing
-                sqs_client.delete_message(
+                response = sqs_client.receive_message(
                     QueueUrl=queue_url,
-                    ReceiptHandle=message["ReceiptHandle"]
+                    AttributeNames=['All'],
+                    MaxNumberOfMessages=free_slots,
+                    WaitTimeSeconds=wait_time
                 )
-                logger.info(f"Message processed and deleted: {message['MessageId']}")
-            
+                messages = response.get("Messages", [])
             except Exception as e:
-                logger.error(f"Error processing message: {str(e)}")
+                logger.error(f"Error receiving messages: {str(e)}")
+                messages = []
 
-        # Pause to avoid excessive polling
-        time.sleep(sleep_interval)
+            logger.debug(f"Received {len(messages)} message(s) for {free_slots} free slot(s)")
+            for message in messages:
+                executor.submit(run, message)
+
+            # Give back the slots we reserved but did not use
+            for _ in range(free_slots - len(messages)):
+                slots.release()
+
+            if not messages:
+                # Pause to avoid excessive polling
+                time.sleep(sleep_interval)
@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import codecs
+import select
+import logging
+from collections import deque
+from dataclasses import dataclass
+
+logger = logging.getLogger()
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class PromptTimeout(Exception):
+    """Raised when a prompt did not show up within its step's timeout."""
+
+
+class PromptFailure(Exception):
+    """Raised when the subprocess prints one of the session's failure patterns."""
+
+
+@dataclass
+class PromptStep:
+    """One row of an expect table: wait for ``prompt``, then answer with ``response``.
+
+    ``response`` may be None for steps that only wait for the prompt. A step
+    with a response is only answered when its prompt is the last thing the
+    process printed (trailing whitespace aside), since the process blocks on
+    the prompt; an earlier occurrence is just output.
+    """
+    prompt: str
+    response: str = None
+    timeout: float = 60
+
+
+class PromptMatcher:
+    """Streaming Aho-Corasick matcher over a fixed set of patterns.
+
+    Text is fed in arbitrary chunks; every character is looked at once, so the
+    cost is linear in the output no matter how many patterns are watched, and
+    matches that straddle chunk boundaries are still found.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        # Breadth-first pass to compute failure links and merged outputs
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+        self._state = 0
+
+    def feed(self, text):
+        """Consume ``text`` and return ``(offset, pattern_index)`` for every match ending in it."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = self._state
+        matches = []
+        for offset, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                matches.append((offset, index))
+        self._state = state
+        return matches
+
+
+class ExpectSession:
+    """Answer a subprocess's prompts from a declarative table of ``PromptStep``.
+
+    Output is read in chunks with non-blocking ``os.read``, echoed to stdout,
+    written line by line to ``line_logger`` and kept in ``transcript``. The
+    steps are answered strictly in order; ``failure_patterns`` abort the session
+    wherever they appear. One occurrence of a prompt answers at most one step,
+    so consecutive steps with the same prompt each wait for their own. An optional ``supervisor`` (see ``RenderSupervisor``)
+    is told about every chunk of output and checked while waiting.
+    """
+
+    def __init__(self, process, steps, failure_patterns=(), line_logger=None, echo=True, supervisor=None):
+        self.process = process
+        self.supervisor = supervisor
+        self.steps = list(steps)
+        self.failure_patterns = list(failure_patterns)
+        self.line_logger = line_logger
+        self.echo = echo
+        self.transcript = []
+        self._matcher = PromptMatcher([step.prompt for step in self.steps] + self.failure_patterns)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line = ""
+
+    @property
+    def output(self):
+        return "".join(self.transcript)
+
+    def run(self):
+        """Drive the process through every step; return the transcript once the last prompt is seen."""
+        fd = self.process.stdout.fileno()
+        os.set_blocking(fd, False)
+        step_index = 0
+        step_deadline = time.monotonic() + self.steps[0].timeout
+        eof = False
+
+        while step_index < len(self.steps):
+            if eof:
+                raise PromptFailure(
+                    f"Process exited with code {self.process.wait()} while waiting for {self.steps[step_index].prompt!r}"
+                )
+            remaining = step_deadline - time.monotonic()
+            if remaining <= 0:
+                step = self.steps[step_index]
+                raise PromptTimeout(f"Prompt {step.prompt!r} not seen within {step.timeout} seconds")
+            if self.supervisor is not None:
+                self.supervisor.check()
+                time_left = self.supervisor.time_left()
+                if time_left is not None:
+                    remaining = min(remaining, time_left)
+
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            try:
+                data = os.read(fd, READ_CHUNK_SIZE)
+            except BlockingIOError:
+                continue
+            if not data:
+                eof = True
+                text = self._decoder.decode(b"", final=True)
+            else:
+                if self.supervisor is not None:
+                    self.supervisor.touch()
+                text = self._decoder.decode(data)
+            if not text:
+                continue
+            self._record(text)
+
+            output_end = len(text.rstrip())
+            answered_offset = None
+            for offset, pattern_index in self._matcher.feed(text):
+                if pattern_index >= len(self.steps):
+                    raise PromptFailure(self.failure_patterns[pattern_index - len(self.steps)])
+                if pattern_index != step_index or offset == answered_offset:
+                    continue  # not the prompt we are waiting for, or one already answered
+                step = self.steps[step_index]
+                if step.response is not None and offset + 1 < output_end:
+                    continue  # more output follows, so the process is not waiting on this prompt
+                self._answer(step)
+                answered_offset = offset
+                step_index += 1
+                if step_index == len(self.steps):
+                    break
+                step_deadline = time.monotonic() + self.steps[step_index].timeout
+
+        self._flush_partial_line()
+        return self.output
+
+    def _answer(self, step):
+        if step.response is not None:
+            logger.debug(f"Prompt {step.prompt!r} answered with {step.response!r}")
+            self.process.stdin.write(f"{step.response}\n".encode())
+            self.process.stdin.flush()
+
+    def _record(self, text):
+        self.transcript.append(text)
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if self.line_logger is not None:
+            *lines, self._partial_line = (self._partial_line + text).split("\n")
+            for line in lines:
+                self.line_logger.info(line.strip())
+
+    def _flush_partial_line(self):
+        if self.line_logger is not None and self._partial_line.strip():
+            self.line_logger.info(self._partial_line.strip())
+        self._partial_line = ""
@@ -0,0 +1,219 @@
+"""Memory-mapped pronunciation index compiled from the CMU Pronouncing Dictionary.
+
+Parsing ``nltk.corpus.cmudict`` builds ~130k Python lists on every cold
+start. This module compiles the dictionary once (at image build time) into a
+flat binary file that is opened with a read-only ``mmap``: loading is a few
+header reads, every worker process shares the same page-cache pages, and a
+lookup is a binary search over the sorted words:
+
+    python pron_index.py [--source cmudict-0.7b] [--output /usr/local/share/pron_index/cmudict.idx]
+
+Without ``--source`` the words come from nltk's cmudict corpus; a path is read
+as a Sphinx-format dictionary such as ``py/g2p/en_us/cmudict-0.7b``.
+
+File layout (native byte order, the index is built where it is read)::
+
+    header    magic, version, word count, symbol count, words size, phonemes size
+    symbols   phoneme inventory, one length-prefixed ASCII name per symbol
+    u32[n+1]  offsets of each word in the words blob
+    u32[n+1]  offsets of each word's first pronunciation in the phonemes blob
+    u8[n]     fewest syllables over the word's pronunciations
+    u8[n]     most syllables over the word's pronunciations
+    words     sorted, concatenated UTF-8 words
+    phonemes  one byte (symbol number) per phoneme
+"""
+import os
+import re
+import sys
+import mmap
+import struct
+import logging
+import argparse
+from array import array
+from bisect import bisect_left
+
+logger = logging.getLogger()
+
+PRON_INDEX_PATH = os.getenv("PRON_INDEX_PATH", "/usr/local/share/pron_index/cmudict.idx")
+
+MAGIC = b"PRIX"
+VERSION = 1
+HEADER = struct.Struct("=4sIIIII")
+VARIANT_SUFFIX = re.compile(r"\(\d+\)$")
+
+
+def _padded(size):
+    return (size + 3) & ~3
+
+
+def syllable_count(pronunciation):
+    """Only vowels carry a stress digit, so they are the syllables."""
+    return sum(phoneme[-1].isdigit() for phoneme in pronunciation)
+
+
+def load_nltk_cmudict():
+    """``{word: [pronunciation, ...]}`` from nltk's cmudict corpus."""
+    from nltk.corpus import cmudict
+    return cmudict.dict()
+
+
+def load_sphinx_dict(path, comment_prefix=";;;"):
+    """``{word: [pronunciation, ...]}`` from a Sphinx dictionary; ``WORD(2)`` variants join ``word``."""
+    entries = {}
+    with open(path, "r", encoding="latin-1") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(comment_prefix):
+                continue
+            parts = line.split()
+            if len(parts) < 2:
+                continue
+            word = VARIANT_SUFFIX.sub("", parts[0]).lower()
+            entries.setdefault(word, []).append(parts[1:])
+    return entries
+
+
+def build_index(entries, output_path):
+    """Compile ``{word: [pronunciation, ...]}`` into an index file at ``output_path``."""
+    words = sorted((word.encode("utf-8"), pronunciations) for word, pronunciations in entries.items() if pronunciations)
+    symbols = sorted({phoneme for _, pronunciations in words for pronunciation in pronunciations for phoneme in pronunciation})
+    if len(symbols) > 255:
+        raise ValueError(f"{len(symbols)} phoneme symbols do not fit in one byte")
+    symbol_numbers = {symbol: number for number, symbol in enumerate(symbols)}
+
+    word_offsets = array("I", [0])
+    phoneme_offsets = array("I", [0])
+    min_syllables = array("B")
+    max_syllables = array("B")
+    words_blob = bytearray()
+    phonemes_blob = bytearray()
+    for word, pronunciations in words:
+        words_blob += word
+        word_offsets.append(len(words_blob))
+        phonemes_blob += bytes(symbol_numbers[phoneme] for phoneme in pronunciations[0])
+        phoneme_offsets.append(len(phonemes_blob))
+        counts = [min(syllable_count(pronunciation), 255) for pronunciation in pronunciations]
+        min_syllables.append(min(counts))
+        max_syllables.append(max(counts))
+
+    symbols_blob = b"".join(bytes([len(symbol)]) + symbol.encode("ascii") for symbol in symbols)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(words), len(symbols), len(words_blob), len(phonemes_blob)))
+        f.write(symbols_blob.ljust(_padded(len(symbols_blob)), b"\0"))
+        f.write(word_offsets.tobytes())
+        f.write(phoneme_offsets.tobytes())
+        f.write(min_syllables.tobytes())
+        f.write(max_syllables.tobytes())
+        f.write(words_blob)
+        f.write(phonemes_blob)
+    os.replace(tmp_path, output_path)
+    logger.info(f"Wrote pronunciation index {output_path} with {len(words)} words")
+    return len(words)
+
+
+class _SortedWords:
+    """Sequence view of the words blob so ``bisect`` can search it in place."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+
+class PronunciationIndex:
+    """Read-only, memory-mapped view of an index written by ``build_index``.
+
+    ``get(word)`` returns ``(min_syllables, max_syllables)`` or None, so the
+    index can stand in for a ``{word: (min, max)}`` dict; ``phonemes(word)``
+    returns the first pronunciation.
+    """
+
+    def __init__(self, path=PRON_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, count, symbol_count, words_size, phonemes_size = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} pronunciation index")
+
+        position = HEADER.size
+        self.symbols = []
+        for _ in range(symbol_count):
+            length = view[position]
+            self.symbols.append(view[position + 1:position + 1 + length].tobytes().decode("ascii"))
+            position += 1 + length
+        position = HEADER.size + _padded(position - HEADER.size)
+
+        def take(size, fmt=None):
+            nonlocal position
+            section = view[position:position + size]
+            position += size
+            return section.cast(fmt) if fmt else section
+
+        self._word_offsets = take(4 * (count + 1), "I")
+        self._phoneme_offsets = take(4 * (count + 1), "I")
+        self._min_syllables = take(count)
+        self._max_syllables = take(count)
+        self._words = _SortedWords(take(words_size), self._word_offsets)
+        self._phonemes = take(phonemes_size)
+
+    def __len__(self):
+        return len(self._words)
+
+    def _find(self, word):
+        key = word.lower().encode("utf-8")
+        i = bisect_left(self._words, key)
+        if i < len(self._words) and self._words[i] == key:
+            return i
+        return None
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def get(self, word, default=None):
+        i = self._find(word)
+        if i is None:
+            return default
+        return self._min_syllables[i], self._max_syllables[i]
+
+    def phonemes(self, word):
+        i = self._find(word)
+        if i is None:
+            return None
+        packed = self._phonemes[self._phoneme_offsets[i]:self._phoneme_offsets[i + 1]]
+        return [self.symbols[number] for number in packed]
+
+
+def open_index(path=PRON_INDEX_PATH):
+    """The index at ``path``, or None when it has not been built."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return PronunciationIndex(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable pronunciation index {path}: {e}")
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the CMU Pronouncing Dictionary into a memory-mapped index.")
+    parser.add_argument("--source", help="Sphinx-format dictionary file; defaults to nltk's cmudict corpus")
+    parser.add_argument("--output", default=PRON_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    entries = load_sphinx_dict(args.source) if args.source else load_nltk_cmudict()
+    count = build_index(entries, args.output)
+    print(f"Wrote {count} words to {args.output} ({os.path.getsize(args.output) / 1024 / 1024:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import os
+import time
+import struct
+import logging
+
+logger = logging.getLogger()
+
+
+class ReadinessTimeout(TimeoutError):
+    """Raised when a stage's output did not become ready in time."""
+
+
+def wav_is_complete(path):
+    """Return True when ``path`` is a finished RIFF/WAVE file.
+
+    A WAV writer fills in the RIFF and data chunk sizes when it closes the file,
+    so a finished file has a RIFF size matching the file size and a data chunk
+    that fits inside it. Files still being written (or truncated) fail the check.
+    """
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as wav:
+            header = wav.read(12)
+            if len(header) < 12:
+                return False
+            riff, riff_size, wave = struct.unpack("<4sI4s", header)
+            if riff != b"RIFF" or wave != b"WAVE" or riff_size + 8 != file_size:
+                return False
+
+            # Walk the chunks until the data chunk
+            position = 12
+            while position + 8 <= file_size:
+                wav.seek(position)
+                chunk_id, chunk_size = struct.unpack("<4sI", wav.read(8))
+                if chunk_id == b"data":
+                    return position + 8 + chunk_size <= file_size
+                position += 8 + chunk_size + (chunk_size & 1)  # chunks are word aligned
+            return False
+    except OSError:
+        return False
+
+
+def wait_until(condition, timeout, description, poll_interval=0.05, max_poll_interval=1.0):
+    """Poll ``condition`` until it returns True; raise ``ReadinessTimeout`` after ``timeout`` seconds.
+
+    The poll interval starts small so an already-satisfied condition costs
+    nothing, and backs off towards ``max_poll_interval``.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    while not condition():
+        now = time.monotonic()
+        if now >= deadline:
+            raise ReadinessTimeout(f"{description} not ready after {timeout} seconds")
+        time.sleep(min(poll_interval, deadline - now))
+        poll_interval = min(poll_interval * 2, max_poll_interval)
+    logger.debug(f"{description} ready after {time.monotonic() - start:.3f} seconds")
+
+
+def wait_for_wav(path, timeout=30):
+    """Wait until the WAV at ``path`` is complete (valid header covering the whole file)."""
+    wait_until(lambda: wav_is_complete(path), timeout, path)
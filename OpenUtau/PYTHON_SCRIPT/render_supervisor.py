@@ -0,0 +1,113 @@
+import os
+import time
+import codecs
+import select
+import signal
+import logging
+import subprocess
+
+logger = logging.getLogger()
+
+# Failure classes reported by every OpenUtau driver
+RENDER_DEADLINE = "deadline"              # the job ran past its overall deadline
+RENDER_INACTIVITY = "inactivity"          # OpenUtau printed nothing for too long
+RENDER_CRASHED = "crashed"                # OpenUtau exited without reporting a result
+RENDER_PROMPT_TIMEOUT = "prompt_timeout"  # an expected interactive prompt never showed up
+RENDER_FAILED = "failed"                  # OpenUtau ran to completion but reported an error
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class RenderError(Exception):
+    """A render that did not produce vocals, classified by ``kind``."""
+
+    def __init__(self, kind, message):
+        super().__init__(f"OpenUtau render {kind}: {message}")
+        self.kind = kind
+        self.detail = message
+
+
+def kill_process_tree(process, grace_period=5):
+    """Terminate ``process`` and everything it spawned.
+
+    The process must have been started with ``start_new_session=True`` so that
+    it leads its own process group. The group gets SIGTERM first and SIGKILL if
+    it is still around after ``grace_period`` seconds.
+    """
+    if process is None or process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+    logger.info(f"Killed OpenUtau process group {process.pid}")
+
+
+class RenderSupervisor:
+    """Enforce an overall deadline and an inactivity timeout on one render.
+
+    Drivers call ``touch()`` whenever OpenUtau makes progress (prints output)
+    and ``check()`` regularly; ``time_left()`` tells them how long they may block
+    before the next check is due. A limit of ``None`` or 0 disables it.
+    """
+
+    def __init__(self, deadline=None, inactivity_timeout=None):
+        self.deadline = deadline or None
+        self.inactivity_timeout = inactivity_timeout or None
+        self.started = time.monotonic()
+        self.last_activity = self.started
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def time_left(self):
+        """Seconds until the nearest limit expires, or None when no limit is set."""
+        now = time.monotonic()
+        limits = []
+        if self.deadline:
+            limits.append(self.started + self.deadline - now)
+        if self.inactivity_timeout:
+            limits.append(self.last_activity + self.inactivity_timeout - now)
+        return max(0, min(limits)) if limits else None
+
+    def check(self):
+        now = time.monotonic()
+        if self.deadline and now - self.started >= self.deadline:
+            raise RenderError(RENDER_DEADLINE, f"not finished after {self.deadline:g} seconds")
+        if self.inactivity_timeout and now - self.last_activity >= self.inactivity_timeout:
+            raise RenderError(RENDER_INACTIVITY, f"no output for {self.inactivity_timeout:g} seconds")
+
+    def stream(self, process, on_text):
+        """Pass ``process`` stdout to ``on_text`` in chunks until EOF; return the exit code.
+
+        Raises ``RenderError`` when a limit expires; the caller is expected to
+        kill the process tree in that case.
+        """
+        fd = process.stdout.fileno()
+        os.set_blocking(fd, False)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            self.check()
+            readable, _, _ = select.select([fd], [], [], self.time_left())
+            if not readable:
+                continue
+            try:
+                data = os.read(fd, READ_CHUNK_SIZE)
+            except BlockingIOError:
+                continue
+            if not data:
+                on_text(decoder.decode(b"", final=True))
+                break
+            self.touch()
+            on_text(decoder.decode(data))
+
+        # stdout is closed; the process should be on its way out
+        while True:
+            try:
+                return process.wait(timeout=self.time_left())
+            except subprocess.TimeoutExpired:
+                self.check()
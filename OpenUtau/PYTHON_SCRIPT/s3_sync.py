@@ -0,0 +1,235 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from dataclasses import dataclass
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from aws_clients import S3_TRANSFER_WORKERS, TRANSFER_MAX_CONCURRENCY
+
+logger = logging.getLogger()
+
+MB = 1024 * 1024
+# The client pools in aws_clients are sized for this many transfers
+DEFAULT_MAX_WORKERS = S3_TRANSFER_WORKERS
+
+@lru_cache(maxsize=None)
+def transfer_config():
+    """Objects above the threshold (the ONNX models) are fetched as parallel ranged
+    GETs; the many small voicebank files go through the thread pool instead.
+    Built on first transfer so importing this module does not load boto3.
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=16 * MB,
+        multipart_chunksize=16 * MB,
+        max_concurrency=TRANSFER_MAX_CONCURRENCY,
+        use_threads=True
+    )
+
+
+@dataclass
+class S3Object:
+    key: str
+    size: int
+    etag: str
+
+
+@dataclass
+class TransferStats:
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput_mb_s(self):
+        return self.bytes / MB / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (
+            f"{self.files} files, {self.bytes / MB:.1f} MB in {self.seconds:.2f} seconds "
+            f"({self.throughput_mb_s:.1f} MB/s)"
+        )
+
+
+def list_objects(s3_client, bucket, prefix):
+    """List every object under ``prefix``, following pagination past 1000 keys."""
+    objects = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith("/"):
+                continue  # folder placeholder
+            objects.append(S3Object(key=obj["Key"], size=obj["Size"], etag=obj["ETag"].strip('"')))
+    return objects
+
+
+class _Progress:
+    """Thread-safe progress counter that logs roughly every 10% of the bytes."""
+
+    def __init__(self, total_files, total_bytes, label):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.label = label
+        self.files = 0
+        self.bytes = 0
+        self.start = time.monotonic()
+        self._next_report = 0.1
+        self._lock = threading.Lock()
+
+    def add(self, size):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            fraction = self.bytes / self.total_bytes if self.total_bytes else self.files / self.total_files
+            if fraction < self._next_report and self.files < self.total_files:
+                return
+            while self._next_report <= fraction:
+                self._next_report += 0.1
+            elapsed = time.monotonic() - self.start
+            rate = self.bytes / MB / elapsed if elapsed else 0.0
+            logger.info(
+                f"{self.label}: {self.files}/{self.total_files} files, "
+                f"{self.bytes / MB:.1f}/{self.total_bytes / MB:.1f} MB ({rate:.1f} MB/s)"
+            )
+
+
+def download_objects(s3_client, bucket, downloads, max_workers=DEFAULT_MAX_WORKERS, label="S3 download", on_complete=None):
+    """Download ``(S3Object, local_path)`` pairs concurrently and return ``TransferStats``.
+
+    Each file is written to ``<local_path>.part`` and renamed into place, so a
+    failed or interrupted transfer never leaves a truncated file behind. The
+    largest objects are started first so they overlap with the small ones.
+    ``on_complete(obj, local_path)`` is called from the calling thread for
+    every finished file. The first failure is re-raised once the other
+    transfers have finished.
+    """
+    downloads = sorted(downloads, key=lambda item: item[0].size, reverse=True)
+    stats = TransferStats()
+    if not downloads:
+        return stats
+    progress = _Progress(len(downloads), sum(obj.size for obj, _ in downloads), label)
+    start = time.monotonic()
+
+    def fetch(obj, local_path):
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        tmp_path = f"{local_path}.part"
+        try:
+            s3_client.download_file(bucket, obj.key, tmp_path, Config=transfer_config())
+            os.replace(tmp_path, local_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        progress.add(obj.size)
+        return obj, local_path
+
+    first_error = None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-sync") as executor:
+        # Each task runs in a copy of the caller's context, so its logs stay with the job
+        futures = [
+            executor.submit(contextvars.copy_context().run, fetch, obj, local_path)
+            for obj, local_path in downloads
+        ]
+        for future in as_completed(futures):
+            try:
+                obj, local_path = future.result()
+            except Exception as e:
+                logger.error(f"{label}: download failed: {e}")
+                first_error = first_error or e
+                continue
+            if on_complete is not None:
+                on_complete(obj, local_path)
+            stats.files += 1
+            stats.bytes += obj.size
+
+    stats.seconds = time.monotonic() - start
+    logger.info(f"{label}: {stats.summary()}")
+    if first_error is not None:
+        raise first_error
+    return stats
+
+
+@dataclass
+class UploadResult:
+    """Outcome of one artifact in ``upload_artifacts``; ``local_path`` is None for in-memory data."""
+    name: str
+    local_path: str
+    key: str
+    ok: bool = False
+    error: str = None
+    bytes: int = 0
+    seconds: float = 0.0
+    copied_from: str = None
+
+
+def upload_artifacts(s3_client, bucket, artifacts, max_workers=DEFAULT_MAX_WORKERS):
+    """Upload ``{name: (source, key)}`` concurrently and return ``{name: UploadResult}``.
+
+    ``source`` is a local file path, or ``bytes`` for artifacts that only
+    exist in memory (sent with ``put_object``). Each local file is uploaded
+    once; further keys for the same file are filled with a server-side
+    ``copy_object`` from the first key. Failures are reported per artifact
+    instead of raised, so one missing log does not lose the rest of the
+    song's artifacts.
+    """
+    results = {}
+    data = {}
+    by_file = {}
+    for name, (source, key) in artifacts.items():
+        in_memory = isinstance(source, (bytes, bytearray))
+        results[name] = UploadResult(name=name, local_path=None if in_memory else source, key=key)
+        if in_memory:
+            data[name] = source
+        by_file.setdefault(name if in_memory else source, []).append(results[name])
+
+    def upload(primary, copies):
+        start = time.monotonic()
+        try:
+            if primary.name in data:
+                primary.bytes = len(data[primary.name])
+                s3_client.put_object(Bucket=bucket, Key=primary.key, Body=data[primary.name])
+            else:
+                primary.bytes = os.path.getsize(primary.local_path)
+                s3_client.upload_file(primary.local_path, bucket, primary.key, Config=transfer_config())
+            primary.ok = True
+        except Exception as e:
+            primary.error = str(e)
+        primary.seconds = time.monotonic() - start
+
+        for copy in copies:
+            start = time.monotonic()
+            copy.copied_from = primary.key
+            if not primary.ok:
+                copy.error = f"source upload failed: {primary.error}"
+                continue
+            try:
+                s3_client.copy_object(
+                    Bucket=bucket,
+                    Key=copy.key,
+                    CopySource={"Bucket": bucket, "Key": primary.key}
+                )
+                copy.ok = True
+                copy.bytes = primary.bytes
+            except Exception as e:
+                copy.error = str(e)
+            copy.seconds = time.monotonic() - start
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-upload") as executor:
+        for primary, *copies in by_file.values():
+            executor.submit(contextvars.copy_context().run, upload, primary, copies)
+
+    uploaded = [result for result in results.values() if result.ok]
+    stats = TransferStats(
+        files=len(uploaded),
+        bytes=sum(result.bytes for result in uploaded if result.copied_from is None),
+        seconds=time.monotonic() - start
+    )
+    logger.info(f"Uploaded {stats.summary()}")
+    for result in results.values():
+        if not result.ok:
+            logger.error(f"Failed to upload {result.name} ({result.local_path or 'in memory'}) to s3://{bucket}/{result.key}: {result.error}")
+    return results
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+import contextvars
+from urllib.parse import unquote_plus
+from aws_clients import get_client
+
+logger = logging.getLogger()
+
+# HEAD error codes that mean "not there yet" rather than a real failure
+NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+class _Watch:
+    """One key being waited for; shared by every waiter on that key."""
+
+    def __init__(self, bucket, key):
+        self.bucket = bucket
+        self.key = key
+        self.waiters = 0
+        self.found = False
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self.wakeup = threading.Event()
+
+
+class S3Waiter:
+    """Wait for S3 objects to appear, with one poller per key however many callers wait on it.
+
+    The poller HEADs the key with capped exponential backoff and jitter
+    (``initial_interval`` doubling up to ``max_interval``, each sleep drawn
+    from the upper half of the current step). A push source (see
+    ``S3EventQueueSource`` and ``LocalEventSource``) can call ``notify`` to
+    resolve a key as soon as it is created, without waiting for the next HEAD.
+    The poller stops once the key is found or every waiter has given up.
+    """
+
+    def __init__(self, s3_client=None, initial_interval=0.2, max_interval=5.0):
+        self.s3_client = s3_client
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self._watches = {}
+        self._sources = []
+        self._lock = threading.Lock()
+
+    def _client(self):
+        return self.s3_client or get_client("s3")
+
+    def add_source(self, source):
+        """Attach a push notification source; it calls ``notify`` for every created object."""
+        source.start(self)
+        self._sources.append(source)
+        return source
+
+    def close(self):
+        for source in self._sources:
+            source.stop()
+        self._sources = []
+
+    def wait(self, bucket, key, timeout=60):
+        """Block until ``s3://bucket/key`` exists; returns False on timeout.
+
+        Errors other than "not found" from the poller are re-raised here.
+        """
+        with self._lock:
+            watch = self._watches.get((bucket, key))
+            if watch is None:
+                watch = _Watch(bucket, key)
+                self._watches[(bucket, key)] = watch
+                threading.Thread(
+                    target=contextvars.copy_context().run, args=(self._poll, watch), name=f"s3-wait-{key}", daemon=True
+                ).start()
+            watch.waiters += 1
+
+        try:
+            watch.done.wait(timeout)
+        finally:
+            with self._lock:
+                watch.waiters -= 1
+                if watch.waiters == 0 and not watch.done.is_set():
+                    # Nobody is waiting any more; stop polling
+                    watch.cancelled = True
+                    self._watches.pop((bucket, key), None)
+                    watch.wakeup.set()
+
+        if watch.error is not None:
+            raise watch.error
+        return watch.found
+
+    def notify(self, bucket, key):
+        """Resolve any waiters on ``s3://bucket/key``; called by push sources.
+
+        Returns whether anything in this process was waiting for the object.
+        """
+        with self._lock:
+            watch = self._watches.get((bucket, key))
+        if watch is None:
+            return False
+        logger.info(f"Push notification for s3://{bucket}/{key}")
+        self._resolve(watch, found=True)
+        return True
+
+    def _resolve(self, watch, found=False, error=None):
+        with self._lock:
+            if watch.done.is_set():
+                return
+            watch.found = found
+            watch.error = error
+            if self._watches.get((watch.bucket, watch.key)) is watch:
+                del self._watches[(watch.bucket, watch.key)]
+            watch.done.set()
+            watch.wakeup.set()
+
+    def _poll(self, watch):
+        from botocore.exceptions import ClientError
+
+        start = time.monotonic()
+        interval = self.initial_interval
+        attempts = 0
+        while not watch.done.is_set() and not watch.cancelled:
+            attempts += 1
+            try:
+                self._client().head_object(Bucket=watch.bucket, Key=watch.key)
+                logger.info(
+                    f"File {watch.key} is now available in bucket {watch.bucket} "
+                    f"({attempts} checks, {time.monotonic() - start:.2f} seconds)"
+                )
+                self._resolve(watch, found=True)
+                return
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in NOT_FOUND_CODES:
+                    self._resolve(watch, error=e)
+                    return
+            except Exception as e:
+                self._resolve(watch, error=e)
+                return
+
+            if attempts == 1:
+                logger.info(f"Waiting for file {watch.key} in bucket {watch.bucket} to be available...")
+            watch.wakeup.wait(random.uniform(interval / 2, interval))
+            interval = min(interval * 2, self.max_interval)
+
+
+def _created_objects(message_body):
+    """Yield ``(bucket, key)`` for every ObjectCreated record in an S3 event (optionally SNS-wrapped)."""
+    event = json.loads(message_body)
+    if "Message" in event and "Records" not in event:
+        event = json.loads(event["Message"])
+    for record in event.get("Records", []):
+        if not record.get("eventName", "").startswith("ObjectCreated"):
+            continue
+        yield record["s3"]["bucket"]["name"], unquote_plus(record["s3"]["object"]["key"])
+
+
+class S3EventQueueSource:
+    """Feed S3 ``ObjectCreated`` event notifications from an SQS queue into a waiter.
+
+    Events are only a wake-up hint, so every message is deleted once read.
+    On a queue shared by several workers, a worker whose event was taken by
+    another one still finds the object with its own HEAD poller.
+    """
+
+    def __init__(self, queue_url, sqs_client=None, wait_time=20):
+        self.queue_url = queue_url
+        self.sqs_client = sqs_client
+        self.wait_time = wait_time
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, waiter):
+        self._thread = threading.Thread(target=self._run, args=(waiter,), name="s3-event-source", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, waiter):
+        sqs_client = self.sqs_client or get_client("sqs")
+        while not self._stop.is_set():
+            try:
+                response = sqs_client.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=10,
+                    WaitTimeSeconds=self.wait_time
+                )
+                for message in response.get("Messages", []):
+                    try:
+                        for bucket, key in _created_objects(message["Body"]):
+                            waiter.notify(bucket, key)
+                    except (ValueError, KeyError) as e:
+                        logger.warning(f"Ignoring malformed S3 event message: {e}")
+                    sqs_client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message["ReceiptHandle"])
+            except Exception as e:
+                logger.error(f"S3 event queue polling failed: {e}")
+                self._stop.wait(5)
+
+
+class LocalEventSource:
+    """In-process stand-in for ``S3EventQueueSource``: ``publish`` notifies the waiter directly."""
+
+    def __init__(self):
+        self.waiter = None
+
+    def start(self, waiter):
+        self.waiter = waiter
+
+    def stop(self):
+        self.waiter = None
+
+    def publish(self, bucket, key):
+        return self.waiter is not None and self.waiter.notify(bucket, key)
+
+
+_waiter = None
+_waiter_lock = threading.Lock()
+
+
+def get_waiter():
+    """The process-wide waiter; listens on ``S3_EVENT_QUEUE_URL`` when it is set."""
+    global _waiter
+    with _waiter_lock:
+        if _waiter is None:
+            _waiter = S3Waiter()
+            queue_url = os.getenv("S3_EVENT_QUEUE_URL")
+            if queue_url:
+                _waiter.add_source(S3EventQueueSource(queue_url))
+        return _waiter
@@ -1,20 +1,16 @@
 import json
-import boto3
 import requests
-from botocore.exceptions import ClientError
 import subprocess
 import time
 import sys
 import os
 import logging
-from rich import print
 import re
 import glob
-from helpers import upload_file_to_s3,download_folder_from_s3, download_file_from_s3, wait_for_file, clean_tmp_wav_file, notify_system_api, check_files_and_directories
-from tqdm import tqdm
+from notifications import flush_notifications
+from helpers import rich_print as print, upload_file_to_s3, upload_bytes_to_s3,download_folder_from_s3, download_file_from_s3, wait_for_file, clean_tmp_wav_file, notify_system_api, check_files_and_directories
 import platform
 from lyrics import lyrics_process, notify_lyrics_json_upload
-from midi_lyrics_service import midimain
 from dotenv import load_dotenv
 from dummy_payload import get_dummy_payload
 from datetime import datetime
@@ -22,12 +18,18 @@ import time
     
     
 import os
-import boto3
 import logging
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
+from aws_clients import get_client
 from config import Config, initialize_config
+from job_context import JobContext
+from openutau_runner import render_song
+from readiness import wait_for_wav
+from s3_sync import upload_artifacts
+from asset_cache import AssetCache
+from singer_assets import SingerAssets
 
 
 os.makedirs("/tmp/Logs", exist_ok=True)
@@ -51,29 +53,23 @@ bucket_name = BUCKET_NAME # For consistency with existing code, some nonsense @d
 REGION_NAME = config.REGION_NAME
 IS_LAMBDA_ENV = config.IS_LAMBDA_ENV
 SQS_QUEUE_URL = config.SQS_QUEUE_URL
-OU_INFERENCE_LOCAL_MIDI_PATH = config.OU_INFERENCE_LOCAL_MIDI_PATH
-OU_INFERENCE_LOCAL_LYRICS_PATH = config.OU_INFERENCE_LOCAL_LYRICS_PATH
-OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH = config.OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH
 OU_SINGER_NUMBER = config.OU_SINGER_NUMBER
-OU_FINAL_FILENAME = config.OU_FINAL_FILENAME
-OU_INFERENCE_LOCAL_EXPORT_PATH = config.OU_INFERENCE_LOCAL_EXPORT_PATH
-OU_INFERENCE_LOCAL_USTX_PATH = config.OU_INFERENCE_LOCAL_USTX_PATH
-OU_LYRICS_JSON_PATH = config.OU_LYRICS_JSON_PATH
+
+# Voicebank fetcher, set up by lambda_handler
+singer_assets = None
 
 
 class PathManager:
-    def __init__(self, song_id, export_filename):
-        self.song_id = song_id
-        self.export_filename = export_filename
+    def __init__(self, ctx):
+        self.song_id = ctx.song_id
+        self.export_filename = ctx.final_filename
 
         # Define local paths
-        self.local_export_path = OU_INFERENCE_LOCAL_EXPORT_PATH
-        self.local_midi_path = OU_INFERENCE_LOCAL_MIDI_PATH
-        self.local_lyrics_path = OU_INFERENCE_LOCAL_LYRICS_PATH
-        self.local_lyrics_json_path = OU_LYRICS_JSON_PATH
-        self.local_log_path = f"/tmp/Logs/song_{self.song_id}_utaulogs.log"
-        self.local_section_summary_path = "/tmp/section_summary.csv"
-        self.local_system_log_path = f"/tmp/Logs/openutau_process.log"
+        self.local_export_path = ctx.export_path
+        self.local_midi_path = ctx.midi_path
+        self.local_lyrics_path = ctx.lyrics_path
+        self.local_log_path = ctx.log_path
+        self.local_system_log_path = ctx.system_log_path
 
         # Define S3 paths
         self.s3_export_path = f"utau_inference/{self.export_filename}.wav"
@@ -85,15 +81,15 @@ class PathManager:
         self.s3_section_summary_path = f"Logs/song_{self.song_id}/{self.song_id}_section_summary.csv"
         self.s3_system_log_path = f"Logs/song_{self.song_id}/{self.song_id}_system_log.log"
 
-        # Collect paths in a dictionary for convenience
+        # Collect paths in a dictionary for convenience; in-memory artifacts are uploaded as bytes
         self.paths = {
             "utau_inference_wav": (self.local_export_path, self.s3_export_path),
             "utaulogs": (self.local_log_path, self.s3_log_path),
             "midi": (self.local_midi_path, self.s3_midi_path),
             "lyrics_txt": (self.local_lyrics_path, self.s3_lyrics_txt_path),
-            "lyrics_json": (self.local_lyrics_json_path, self.s3_lyrics_json_path),
+            "lyrics_json": (ctx.artifacts.lyrics_json_text().encode("utf-8"), self.s3_lyrics_json_path),
             "wav_duplicate": (self.local_export_path, self.s3_wav_duplicate_path),
-            "section_summary": (self.local_section_summary_path, self.s3_section_summary_path),
+            "section_summary": (ctx.artifacts.section_summary_csv().encode("utf-8"), self.s3_section_summary_path),
             "openutau_process": (self.local_system_log_path, self.s3_system_log_path)
         }
 
@@ -101,63 +97,51 @@ class PathManager:
         return self.paths
 
 # Function to process uploads using the PathManager class
-def process_and_upload_to_s3(song_id):
-    path_manager = PathManager(song_id, OU_FINAL_FILENAME)
+def process_and_upload_to_s3(ctx):
+    path_manager = PathManager(ctx)
     paths = path_manager.get_path_pairs()
 
-    for local_path, s3_path in paths.values():
-        upload_file_to_s3(local_path, bucket_name, s3_path)
-
-
-# Create AWS clients
-sqs_client = boto3.client("sqs", region_name=REGION_NAME)
-s3_client = boto3.client('s3', region_name=REGION_NAME)
-lambda_client = boto3.client('lambda', region_name=REGION_NAME)
+    # All artifacts go up at once; the duplicate WAV is a server-side copy
+    results = upload_artifacts(get_client("s3"), bucket_name, paths)
+    if not results["utau_inference_wav"].ok:
+        raise RuntimeError(f"Vocals upload failed: {results['utau_inference_wav'].error}")
+    return results
 
-# os.path.join(OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH, OU_FINAL_FILENAME + ".wav")
 
 def process_message(body):
-    """Process a single message body from SQS."""
-    global OU_FINAL_FILENAME, OU_INFERENCE_LOCAL_EXPORT_PATH, OU_SINGER_NUMBER, OU_INFERENCE_LOCAL_USTX_PATH, OU_LYRICS_JSON_PATH
+    """Process a single message body from SQS.
+
+    All per-song state lives in a ``JobContext`` with its own scratch
+    directory, so several messages can be processed concurrently.
+    """
+    ctx = JobContext.create(body)
+    ctx.attach_log_handler()
+    song_id = ctx.song_id
 
     try:
         print("process fn started")
 
-    
-    
-
-    
-        song_id = body.get("songID")
-        name = body.get("name")
-        reason = body.get("reason")
-        OU_FINAL_FILENAME = f"song_{song_id}_vocals"
-        OU_INFERENCE_LOCAL_EXPORT_PATH = os.path.join("/tmp", f"{OU_FINAL_FILENAME}.wav")
-        OU_INFERENCE_LOCAL_USTX_PATH = os.path.join("/tmp", f"{OU_FINAL_FILENAME}.ustx")
-        # OU_LYRICS_JSON_PATH = os.path.join("/tmp", "lyrics.json")
-        OU_LYRICS_JSON_PATH = "/tmp/lyrics.json"
-        
-        start = time.monotonic()
-        lyrics_process(name, reason) #this generates and saves lyrics.txt (containing the UTAU lyrics) and lyrics.json (containing the syllable count and formatted lyrics)
-        end = time.monotonic()
+        start_time = time.monotonic()
+        lyrics_process(ctx.name, ctx.reason, ctx, fresh=ctx.fresh) #this generates the lyrics and the lyrics JSON into ctx.artifacts
+        end_time = time.monotonic()
         duration = (end_time - start_time)  
         logger.info("lyrics_process stats")
         logger.info(f"Start Time: {start_time:.2f}, End Time: {end_time:.2f}, Duration: {duration:.2f} seconds.")
         logger.info("============================================================")
-        print(f"Lyrics processing took {end - start:.2f} seconds")
+        print(f"Lyrics processing took {duration:.2f} seconds")
         
-        time.sleep(1)
         lyrics_api_filename = f"lyrics/{song_id}_lyrics.json"
-        upload_file_to_s3(OU_LYRICS_JSON_PATH, BUCKET_NAME, lyrics_api_filename)
+        upload_bytes_to_s3(ctx.artifacts.lyrics_json_text().encode("utf-8"), BUCKET_NAME, lyrics_api_filename)
         notify_lyrics_json_upload(song_id, f"{song_id}_lyrics.json") 
         
 
         start_time = time.monotonic()
-        lyrics_with_syllable, utau_lyrics = midimain() #this assumes lyrics are already present in /tmp/lyrics_readable.txt
+        from midi_lyrics_service import midimain  # pulls in pretty_midi; loaded on first job
+        lyrics_with_syllable, utau_lyrics = midimain(ctx) #reads the lyrics from ctx.artifacts
         print(lyrics_with_syllable, " lyrics_with_syllable")
         print(utau_lyrics, " utau_lyrics")
-        output_file = "/tmp/lyrics.txt"
-        with open(output_file, "w", encoding="utf-8") as file:
-            file.write(utau_lyrics)
+        # OpenUtau reads its lyrics from a file
+        output_file = ctx.write_text(ctx.lyrics_path, utau_lyrics)
         end_time = time.monotonic()
         duration = (end_time - start_time)  
         logger.info("midimain() stats")
@@ -168,59 +152,35 @@ def process_message(body):
     
         # Run processing
         start_time = time.monotonic()
-        run_openutau(OU_FINAL_FILENAME, OU_INFERENCE_LOCAL_EXPORT_PATH, song_id)
+        render_song(ctx, OU_SINGER_NUMBER, assets=singer_assets)
         end_time = time.monotonic()
         duration = (end_time - start_time)  
-        logger.info("run_openutau stats")
+        logger.info("render_song stats")
         logger.info(f"Start Time: {start_time:.2f}, End Time: {end_time:.2f}, Duration: {duration:.2f} seconds.")
         logger.info("============================================================")
         
     
-        time.sleep(2)
-        clean_tmp_wav_file()
-        time.sleep(2)
+        # The render has reported completion; make sure the WAV is fully on disk before uploading
+        clean_tmp_wav_file(ctx.work_dir)
+        wait_for_wav(ctx.export_path)
     
         # Upload processed file to S3
         
         start_time = time.monotonic()
-        process_and_upload_to_s3(song_id)
+        process_and_upload_to_s3(ctx)
         end_time = time.monotonic()
         duration = (end_time - start_time)  
         logger.info("process_and_upload_to_s3 stats")
         logger.info(f"Start Time: {start_time:.2f}, End Time: {end_time:.2f}, Duration: {duration:.2f} seconds.")
         logger.info("============================================================")
     
-        # Clean up files
-
-    
     except Exception as e:
         logger.error(f"Error processing record for song_id {song_id}: {str(e)}")
         notify_system_api(song_id, "utau_inference", "error", None, str(e), None) 
     
     finally:
-        # Cleanup files
-        files_to_delete = [
-            OU_INFERENCE_LOCAL_LYRICS_PATH,
-            OU_INFERENCE_LOCAL_MIDI_PATH,
-            OU_INFERENCE_LOCAL_EXPORT_PATH,
-            OU_INFERENCE_LOCAL_USTX_PATH,
-            f"/tmp/Logs/song_{song_id}_utaulogs.log",
-            OU_LYRICS_JSON_PATH,
-            f"/tmp/section_summary.csv",
-            f"/tmp/lyrics_readable.txt"
-        ]
-        with open(f"/tmp/Logs/openutau_process.log", 'w') as file:
-            pass  # Do nothing, just opening in 'w' mode clears the file
-
-        print(f"All contents of the file Logs/openutau_process.log have been deleted.")
-        
-        for file_path in files_to_delete:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    print(f"Removed {file_path}")
-                except Exception as remove_error:
-                    logger.error(f"Failed to remove {file_path}: {remove_error}")
+        # Cleanup the job's scratch directory (lyrics, midi, wav, ustx and logs)
+        ctx.cleanup()
 
         return {
         "statusCode": 200,
@@ -245,17 +205,25 @@ def lambda_handler(event, context):
         local_base_path = "/tmp/OpenUtau/"
         os.makedirs(local_base_path, exist_ok=True)
 
-        # Define folder mappings
-        folders_to_download = {
-            "Singers/": os.path.join(local_base_path, "Singers"),
-            "Dependencies/": os.path.join(local_base_path, "Dependencies")
-        }
-        
-         # Download folders from S3
-        for folder_key, local_output_dir in folders_to_download.items():
-            print(f"Downloading {folder_key} to {local_output_dir}...")
-            download_folder_from_s3(BUCKET_NAME, base_s3_path + folder_key, local_output_dir)
-            print(f"Finished downloading {folder_key}")
+        # Only the dependencies are fetched up front; the singer's own voicebank is
+        # fetched when its job renders. A warm container only re-fetches changed objects.
+        global singer_assets
+        singer_assets = SingerAssets(
+            AssetCache(BUCKET_NAME, local_base_path),
+            base_s3_path,
+            local_base_path,
+            singer_folder=config.OU_SINGER_FOLDER,
+            dependency_folders=config.OU_DEPENDENCY_FOLDERS,
+            use_bundles=config.OU_ASSET_BUNDLES
+        )
+        # A singer that matches no voicebank would fail every job; fail the batch instead
+        logger.info(f"Rendering with voicebank {singer_assets.validate()}")
+        sync_start = time.monotonic()
+        for report in singer_assets.ensure_dependencies():
+            print(f"Finished syncing {report.summary()}")
+        sync_duration = time.monotonic() - sync_start
+        print(f"Asset sync took {sync_duration:.2f} seconds")
+        logger.info(f"Asset sync took {sync_duration:.2f} seconds")
         
         # download_folder_from_s3(BUCKET_NAME, "Singers/", "/tmp/OpenUtau/Singers/", "")
         # Process each record
@@ -276,7 +244,7 @@ def lambda_handler(event, context):
 
                 process_message(body)
                 
-                notify_system_api(song_id, "utau_inference", "end", f"{OU_FINAL_FILENAME}.wav", None, receipt_handle)
+                notify_system_api(song_id, "utau_inference", "end", f"song_{song_id}_vocals.wav", None, receipt_handle)
 
                 
 
@@ -291,6 +259,8 @@ def lambda_handler(event, context):
         return {"statusCode": 500, "body": f"Error: {str(e)}"}
     
     finally:
+        # Checkpoint: the container may be frozen once the handler returns
+        flush_notifications()
         return {
         "statusCode": 200,
         "body": json.dumps({"message": "Processing completed successfully."})
@@ -319,225 +289,6 @@ payload = {
             ]
         }
 
-def run_openutau(project_name, export_wav_path, song_id):
-    
-    start_time = time.time()
-    p = False
-    song_log_file = f'/tmp/Logs/song_{song_id}_utaulogs.log'
-    os.makedirs(os.path.dirname(song_log_file), exist_ok=True)
-    song_logger = logging.getLogger(f'song_logger_{song_id}')
-    song_handler = logging.FileHandler(song_log_file)
-    song_handler.setLevel(logging.INFO)
-    song_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    song_handler.setFormatter(song_format)
-    song_logger.addHandler(song_handler)
-    song_logger.propagate = False  # Prevents logging to propagate to root logger
-    
-    
-    
-    try:
-        print("Running OpenUtau")
-
-            
-            
-        process = subprocess.Popen(
-            ["./OpenUtau", "--init"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            bufsize=1
-        )
-        
-        print("Subprocess started...")
-        
-        
-        # Add a small delay to allow OpenUtau to initialize and output text
-        time.sleep(1)
-        # Continuously read output line-by-line
-        accumulated_output = ""
-        init_sent = False          # Flag to track if '--init' has been sent
-        project_selected = False   # Flag to track if project selection is complete
-        midi_imported = False      # Flag to track MIDI import command
-        lyrics_imported = False    # Flag to track lyrics import command
-        track_removed = False      # Flag to track track removal
-        track_number_entered = False # Flag to confirm track number entry
-        track_updated = False      # Flag to track track update
-        export_completed = False   # Flag to track export completion
-        not_saved = True           # Flag to track if project has been saved
-        export_fully_completed = False
-        pitch_processing = False
-        while True:
-            output = process.stdout.read(1)  # Read one character at a time
-                    
-                    
-            if output:
-                # Accumulate output until a newline
-                accumulated_output += output
-                sys.stdout.write(output)  # Print in real-time to avoid buffering
-                sys.stdout.flush()
-                if output == '\n':
-                    song_logger.info(accumulated_output.strip())
-                    accumulated_output = ""
-                # Send '--init' only once when '> ' prompt is detected
-                if '> ' in accumulated_output and not init_sent:
-                    print("Detected '> ' prompt; sending '--init'")
-                    process.stdin.write("--init\n")
-                    process.stdin.flush()
-                    init_sent = True  # Set flag to avoid re-sending
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to project selection prompt after initialization
-                elif "Do you want to [1] Open an existing project or [2] Start a new project?" in accumulated_output:
-                    print("Detected project selection prompt; sending '2'")
-                    process.stdin.write("2\n")
-                    process.stdin.flush()
-                    project_selected = True  # Set flag after project selection
-                    accumulated_output = ""  # Clear accumulated output
-                # Send MIDI import command after project selection is complete
-                elif '> ' in accumulated_output and project_selected and not midi_imported:
-                    print(f"Detected '> ' prompt; sending '--import --midi {OU_INFERENCE_LOCAL_MIDI_PATH}'")
-                    process.stdin.write(f"--import --midi {OU_INFERENCE_LOCAL_MIDI_PATH}\n")
-                    process.stdin.flush()
-                    midi_imported = True  # Set flag to avoid re-sending MIDI import
-                    accumulated_output = ""  # Clear accumulated output
-                # Send lyrics import command after MIDI import is complete
-                elif '> ' in accumulated_output and midi_imported and not lyrics_imported:
-                    print(f"Detected '> ' prompt; sending '--lyrics {OU_INFERENCE_LOCAL_LYRICS_PATH}'")
-                    process.stdin.write(f"--lyrics {OU_INFERENCE_LOCAL_LYRICS_PATH}\n")
-                    process.stdin.flush()
-                    lyrics_imported = True  # Set flag to avoid re-sending lyrics import
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to part number selection prompt for adding lyrics
-                elif "Select a part number to add lyrics:" in accumulated_output:
-                    print("Detected part number prompt; entering '1'")
-                    process.stdin.write("1\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                # Send track removal command after lyrics import
-                elif '> ' in accumulated_output and lyrics_imported and not track_removed:
-                    print("Detected '> ' prompt; sending '--track --remove'")
-                    process.stdin.write("--track --remove\n")
-                    process.stdin.flush()
-                    track_removed = True  # Set flag to avoid re-sending track removal
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to track number selection prompt
-                elif "Enter the number of the track to remove:" in accumulated_output and not track_number_entered:
-                    print("Detected track number prompt; entering '1'")
-                    process.stdin.write("1\n")
-                    process.stdin.flush()
-                    track_number_entered = True  # Set flag after entering track number
-                    accumulated_output = ""  # Clear accumulated output
-                # Send track update command after track removal
-                elif '> ' in accumulated_output and track_number_entered and not track_updated:
-                    print("Detected '> ' prompt; sending '--track --update'")
-                    process.stdin.write("--track --update\n")
-                    process.stdin.flush()
-                    track_updated = True  # Set flag to avoid re-sending track update
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to track update selection prompt
-                elif "Select a track to update:" in accumulated_output:
-                    print("Detected track update selection prompt; entering '1'")
-                    process.stdin.write("1\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to singer selection prompt
-                elif "Select a singer by number:" in accumulated_output:
-                    print(f"Detected singer selection prompt; entering '{OU_SINGER_NUMBER}'")
-                    process.stdin.write(f"{OU_SINGER_NUMBER}\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to phonemizer selection prompt
-                elif "Enter the phonemizer name to apply:" in accumulated_output:
-                    print("Detected phonemizer selection prompt; entering 'OpenUtau.Core.DiffSinger.DiffSingerEnglishPhonemizer'")
-                    process.stdin.write("OpenUtau.Core.DiffSinger.DiffSingerEnglishPhonemizer\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                # elif "> " in accumulated_output and not pitch_processing:
-                #     print("Detected '> ' prompt; Sending '--process --pitch'")
-                #     time.sleep(2)
-                #     # process.stdin.write("--process --pitch\n")
-                #     # process.stdin.flush()
-                #     time.sleep(2)
-                #     accumulated_output = ""
-                #     # breakpoint()
-
-                # elif "Select a part to process:" in accumulated_output and not pitch_processing:
-                #     print("Detected Part selection prompt; entering '1'")
-                #     process.stdin.write("1\n")
-                #     process.stdin.flush()
-                #     pitch_processing = True
-                #     accumulated_output = ""
-                # # SAVING
-                # # Send save command after export is complete
-                # elif '> ' in accumulated_output and not_saved:
-                #     print("Detected '> ' prompt; sending '--save'")
-                #     process.stdin.write("--save\n")
-                #     process.stdin.flush()
-                #     accumulated_output = ""  # Clear accumulated output
-                # Respond to directory path prompt for saving the project
-                elif "Enter the directory path where you want to save the project:" in accumulated_output and not_saved:
-                    # print(f"Detected directory path prompt; entering '{OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH}'")
-                    process.stdin.write(f"{OU_INFERENCE_LOCAL_PROJECT_SAVE_PATH}\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                # Respond to file name prompt for saving the project
-                elif "Enter the name for the project file (without extension):" in accumulated_output and not_saved:
-                    # print(f"Detected file name prompt; entering '{FILE_NAME}'")
-                    process.stdin.write(f"{project_name}\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                    not_saved = False
-                # Send export command after track update
-                elif '> ' in accumulated_output and track_updated and not export_completed:
-                    # print("Detected '> ' prompt; sending '--export --wav'")
-                    time.sleep (2)
-                    process.stdin.write("--export --wav\n")
-                    process.stdin.flush()
-                    export_completed = True  # Set flag to avoid re-sending export
-                    accumulated_output = ""  # Clear accumulated output
-                    time.sleep (10)
-                    p = True
-                    
-                elif "Enter the path where you want to export the WAV file:" in accumulated_output and not export_fully_completed:
-                    print()
-                    print(f"[red]Detected WAV export path prompt; entering '{export_wav_path}'[/red]")
-                    process.stdin.write(f"{export_wav_path}\n")
-                    process.stdin.flush()
-                    accumulated_output = ""  # Clear accumulated output
-                    export_fully_completed = True  # Set flag to avoid re-sending export path
-                    time.sleep(5)
-                     
-                # elif p and export_fully_completed:
-                #     print("[red]Detected '> ' prompt; sending '--exit'[/red]")
-                #     # process.stdin.write(OU_INFERENCE_LOCAL_EXPORT_PATH)
-                #     # process.stdin.flush()
-                #     p = False
-                
-                elif p and export_fully_completed and '> ' in accumulated_output:
-                    print("[red]Detected '> ' prompt; sending '--exit'[/red]")
-                    time.sleep(5)
-                    p = False
-                    
-                elif "Project has been successfully exported to WAV" in accumulated_output:
-                    return                    
-                    
-            # Check if process has ended
-            if process.poll() is not None:
-                print("Process ended.")
-                break
-    except Exception as e:
-        print("Error encountered:", e)
-        notify_system_api(song_id, "utau_inference", "error", None, str(e), None) 
-    finally:
-        if process:
-            process.terminate()  # Ensure the process is terminated  
-
-    # Calculate and print the time taken
-    end_time = time.time()
-    total_time = end_time - start_time
-    print(f"Total time taken: {total_time:.2f} seconds")
-    logger.info(f"Total time taken: {total_time:.2f} seconds")
-            
 # LOCAL TESTING  
 # if IS_LAMBDA_ENV:
     # response = lambda_handler(payload, None)
@@ -547,4 +298,4 @@ def run_openutau(project_name, export_wav_path, song_id):
         
 # response = lambda_handler(payload, None)
 # print(response)
-# poll_sqs() #poll_sqs(sqs_client, SQS_QUEUE_URL, process_message)
+# poll_sqs_concurrent(get_client("sqs"), SQS_QUEUE_URL, process_message, config.WORKER_CONCURRENCY)
@@ -0,0 +1,95 @@
+import os
+import time
+import logging
+from asset_bundle import sync_bundle_from_s3
+from asset_cache import SyncReport
+
+logger = logging.getLogger()
+
+
+class SingerAssets:
+    """Fetch only the voicebank and dependency folders a job needs.
+
+    Singers live under ``<base>Singers/<folder>/`` in S3. The folder for every
+    job is ``singer_folder``; it may only be left empty while there is just one
+    voicebank folder. ``validate`` checks this once, before any job runs. The
+    folder name is also the singer Id OpenUtau gives a voicebank installed at
+    ``Singers/<folder>/``, so it is what gets passed to ``--singer``. Folders
+    are synced through the ``AssetCache``, so on a warm container an ensure is
+    one listing per folder.
+
+    With ``use_bundles`` each folder is instead installed from a single archive
+    at ``<base>bundles/<kind>/<folder>.tar.gz`` (see ``asset_bundle``), which
+    costs one HEAD request on a warm container.
+    """
+
+    def __init__(self, asset_cache, base_s3_path, local_base_path, singer_folder="", dependency_folders=(),
+                 use_bundles=False):
+        self.asset_cache = asset_cache
+        self.base_s3_path = base_s3_path
+        self.local_base_path = local_base_path
+        self.singer_folder = singer_folder
+        self.dependency_folders = list(dependency_folders)
+        self.use_bundles = use_bundles
+        self._singer_folders = None
+
+    def _list_folders(self, prefix):
+        """Return the sub-folder names directly under ``prefix``."""
+        folders = []
+        paginator = self.asset_cache.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.asset_cache.bucket, Prefix=prefix, Delimiter="/"):
+            for common_prefix in page.get("CommonPrefixes", []):
+                folders.append(common_prefix["Prefix"][len(prefix):].rstrip("/"))
+        return sorted(folders)
+
+    def singer_folders(self, refresh=False):
+        if self._singer_folders is None or refresh:
+            self._singer_folders = self._list_folders(self.base_s3_path + "Singers/")
+        return self._singer_folders
+
+    def validate(self):
+        """Raise ``ValueError`` unless the configured singer resolves to a voicebank folder in S3."""
+        folders = self.singer_folders(refresh=True)
+        if self.singer_folder and self.singer_folder not in folders:
+            raise ValueError(f"OU_SINGER_FOLDER {self.singer_folder!r} is not one of the voicebank folders {folders}")
+        return self.resolve_singer_folder()
+
+    def resolve_singer_folder(self):
+        """Return the voicebank folder in S3, which is also the singer Id OpenUtau matches."""
+        if self.singer_folder:
+            return self.singer_folder
+        folders = self.singer_folders()
+        if len(folders) == 1:
+            return folders[0]
+        raise ValueError(f"OU_SINGER_FOLDER must name one of the {len(folders)} voicebank folders {folders}")
+
+    def _sync_folder(self, kind, folder):
+        """Sync ``<base><kind>/<folder>/`` into the local asset tree and return the ``SyncReport``."""
+        local_dir = os.path.join(self.local_base_path, kind, folder)
+        if self.use_bundles:
+            report = self._sync_bundle(kind, folder, local_dir)
+        else:
+            prefix = f"{self.base_s3_path}{kind}/{folder}/" if folder else f"{self.base_s3_path}{kind}/"
+            report = self.asset_cache.sync(prefix, local_dir)
+        logger.info(f"Asset sync {report.summary()}")
+        return report
+
+    def _sync_bundle(self, kind, folder, local_dir):
+        start = time.monotonic()
+        key = f"{self.base_s3_path}bundles/{kind}/{folder or kind}.tar.gz"
+        installed = sync_bundle_from_s3(self.asset_cache.s3_client, self.asset_cache.bucket, key, local_dir)
+        return SyncReport(prefix=key, listed=1, downloaded=int(installed), seconds=time.monotonic() - start)
+
+    def ensure_singer(self, refresh=False):
+        """Make sure the singer's voicebank is on local disk.
+
+        ``refresh`` re-lists the voicebank folders first, for singers added to
+        S3 after this process started.
+        """
+        if refresh:
+            self.singer_folders(refresh=True)
+        return self._sync_folder("Singers", self.resolve_singer_folder())
+
+    def ensure_dependencies(self):
+        """Make sure the configured dependency folders (all of ``Dependencies/`` by default) are on local disk."""
+        return [self._sync_folder("Dependencies", folder) for folder in self.dependency_folders or [""]]
@@ -0,0 +1,169 @@
+import os
+import copy
+import json
+import time
+import shutil
+import logging
+import threading
+from aws_clients import get_client
+from asset_cache import AssetCache
+from helpers import wait_for_file
+
+logger = logging.getLogger()
+
+# How long a fetched asset is trusted before it is revalidated against S3
+STATIC_ASSET_TTL = float(os.getenv("STATIC_ASSET_TTL", "300"))
+STATIC_ASSET_DIR = os.getenv("STATIC_ASSET_DIR", "/tmp/static_assets")
+ETAG_INDEX_FILENAME = ".static_etags.json"
+
+
+class StaticAssets:
+    """Local, TTL-bounded cache for the pipeline's static S3 inputs.
+
+    Within ``ttl`` seconds of the last check an asset is served from local disk
+    (and, for the system prompt and the MIDI template, from memory) without any
+    S3 call. After that a conditional ``GET`` with ``If-None-Match`` revalidates
+    it, so an unchanged asset costs one request and no transfer. ETags survive
+    restarts in an index next to the files.
+    """
+
+    def __init__(self, bucket, local_dir=STATIC_ASSET_DIR, ttl=STATIC_ASSET_TTL, s3_client=None):
+        self.bucket = bucket
+        self.local_dir = local_dir
+        self.ttl = ttl
+        self.s3_client = s3_client or get_client("s3")
+        self.index_path = os.path.join(local_dir, ETAG_INDEX_FILENAME)
+        self.etags = self._load_index()
+        self.checked_at = {}
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        os.makedirs(self.local_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.etags, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _is_fresh(self, key):
+        checked_at = self.checked_at.get(key)
+        return checked_at is not None and time.monotonic() - checked_at < self.ttl
+
+    def local_path(self, key):
+        return os.path.join(self.local_dir, key)
+
+    def _fetch(self, key, local_path):
+        """Conditionally GET ``key``; returns False when the local copy was still current."""
+        from botocore.exceptions import ClientError
+
+        etag = self.etags.get(key) if os.path.exists(local_path) else None
+        try:
+            if etag:
+                response = self.s3_client.get_object(Bucket=self.bucket, Key=key, IfNoneMatch=etag)
+            else:
+                response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("304", "NotModified"):
+                return False
+            raise
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        tmp_path = f"{local_path}.part"
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(response["Body"], f)
+        os.replace(tmp_path, local_path)
+        with self._lock:
+            self.etags[key] = response["ETag"].strip('"')
+            self._save_index()
+        logger.info(f"Fetched static asset s3://{self.bucket}/{key}")
+        return True
+
+    def get_file(self, key):
+        """Return a local path for ``key``, or None if it never appeared in S3.
+
+        A missing asset is waited for (``wait_for_file``) only when there is no
+        local copy; if S3 is unreachable a previously fetched copy is used.
+        """
+        from botocore.exceptions import ClientError
+
+        local_path = self.local_path(key)
+        with self._key_lock(key):
+            if self._is_fresh(key) and os.path.exists(local_path):
+                return local_path
+            try:
+                if not os.path.exists(local_path) and not wait_for_file(self.bucket, key, self.s3_client):
+                    return None
+                self._fetch(key, local_path)
+            except ClientError as e:
+                if not os.path.exists(local_path):
+                    raise
+                logger.warning(f"Using cached {key}; revalidation failed: {e}")
+            self.checked_at[key] = time.monotonic()
+            return local_path
+
+    def _load(self, key, loader):
+        """Return ``loader(local_path)`` for ``key``, parsed once per ETag and held in memory."""
+        local_path = self.get_file(key)
+        if local_path is None:
+            return None
+        version = self.etags.get(key)
+        with self._key_lock(key):
+            cached = self._memory.get(key)
+            if cached is None or cached[0] != version:
+                cached = (version, loader(local_path))
+                self._memory[key] = cached
+            return cached[1]
+
+    def get_text(self, key):
+        """The contents of ``key`` as text, or None if it never appeared in S3."""
+        def read_text(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        return self._load(key, read_text)
+
+    def get_midi(self, key):
+        """A private copy of the parsed MIDI file at ``key``, or None if it never appeared in S3.
+
+        The parsed template is kept in memory; callers get a deep copy they
+        are free to modify.
+        """
+        import pretty_midi
+        midi_data = self._load(key, pretty_midi.PrettyMIDI)
+        return copy.deepcopy(midi_data) if midi_data is not None else None
+
+    def copy_prefix(self, prefix, dest_dir):
+        """Copy every object under ``prefix`` into ``dest_dir``, syncing the local mirror at most once per TTL."""
+        prefix = prefix.rstrip("/") + "/"
+        mirror_dir = self.local_path(prefix)
+        with self._key_lock(prefix):
+            if not self._is_fresh(prefix):
+                report = AssetCache(self.bucket, self.local_dir, self.s3_client).sync(prefix, mirror_dir)
+                logger.info(f"Static asset sync {report.summary()}")
+                self.checked_at[prefix] = time.monotonic()
+            if os.path.isdir(mirror_dir):
+                shutil.copytree(mirror_dir, dest_dir, dirs_exist_ok=True)
+
+
+_static_assets = None
+_static_assets_lock = threading.Lock()
+
+
+def get_static_assets():
+    """The process-wide ``StaticAssets`` for ``BUCKET_NAME``."""
+    global _static_assets
+    with _static_assets_lock:
+        if _static_assets is None:
+            _static_assets = StaticAssets(os.getenv("BUCKET_NAME"))
+        return _static_assets
@@ -0,0 +1,160 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from aws_clients import get_client
+
+logger = logging.getLogger()
+
+SYLLABLE_CACHE_PATH = os.getenv("SYLLABLE_CACHE_PATH", "/tmp/syllable_cache.sqlite3")
+# S3 key of the snapshot shared by workers (in BUCKET_NAME); unset keeps the cache local
+SYLLABLE_CACHE_S3_KEY = os.getenv("SYLLABLE_CACHE_S3_KEY")
+# Minimum seconds between snapshot uploads from one worker
+SYLLABLE_CACHE_SNAPSHOT_INTERVAL = float(os.getenv("SYLLABLE_CACHE_SNAPSHOT_INTERVAL", "300"))
+
+_NON_WORD_CHARS = re.compile(r"[^\w']")
+
+
+def normalize_word(word):
+    """Cache key for a lyric word: lower case, without surrounding punctuation."""
+    return _NON_WORD_CHARS.sub("", word).lower()
+
+
+class SyllableCache:
+    """Word -> syllable count store in SQLite, filled from GPT responses.
+
+    Lookups count hits and misses (see ``stats``). With an S3 key the cache
+    starts by merging the shared snapshot into the local database and
+    ``maybe_save_snapshot`` uploads it back, at most once per
+    ``snapshot_interval``; workers' entries are unioned, the last upload wins
+    for words they disagree on.
+    """
+
+    def __init__(self, path=SYLLABLE_CACHE_PATH, bucket=None, s3_key=SYLLABLE_CACHE_S3_KEY,
+                 snapshot_interval=SYLLABLE_CACHE_SNAPSHOT_INTERVAL, s3_client=None):
+        self.path = path
+        self.bucket = bucket
+        self.s3_key = s3_key if bucket else None
+        self.snapshot_interval = snapshot_interval
+        self.s3_client = s3_client
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._saved_at = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS syllables (word TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+        if self.s3_key:
+            self.load_snapshot()
+
+    def _client(self):
+        return self.s3_client or get_client("s3")
+
+    def get_many(self, words):
+        """Return ``{normalized_word: count}`` for the cached words among ``words``."""
+        keys = {normalize_word(word) for word in words} - {""}
+        if not keys:
+            return {}
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._db.execute(
+                f"SELECT word, count FROM syllables WHERE word IN ({placeholders})", tuple(keys)
+            ).fetchall()
+            found = dict(rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, word):
+        return self.get_many([word]).get(normalize_word(word))
+
+    def put_many(self, counts):
+        """Store ``{word: count}`` pairs; words are normalized first."""
+        rows = [(normalize_word(word), int(count)) for word, count in counts.items() if normalize_word(word)]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO syllables (word, count) VALUES (?, ?)", rows)
+            self._dirty = True
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM syllables").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "words": len(self),
+        }
+
+    def load_snapshot(self):
+        """Merge the shared S3 snapshot into the local database; local entries win."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3", dir=os.path.dirname(self.path) or ".")
+        os.close(fd)
+        try:
+            self._client().download_file(self.bucket, self.s3_key, tmp_path)
+            with self._lock:
+                self._db.execute("ATTACH DATABASE ? AS snapshot", (tmp_path,))
+                try:
+                    self._db.execute("INSERT OR IGNORE INTO syllables SELECT word, count FROM snapshot.syllables")
+                finally:
+                    self._db.execute("DETACH DATABASE snapshot")
+            logger.info(f"Merged syllable cache snapshot s3://{self.bucket}/{self.s3_key} ({len(self)} words)")
+        except Exception as e:  # a missing or unreadable snapshot only costs cache misses
+            logger.warning(f"Syllable cache snapshot not loaded: {e}")
+        finally:
+            os.remove(tmp_path)
+
+    def save_snapshot(self):
+        """Upload a consistent copy of the database as the shared snapshot."""
+        if not self.s3_key:
+            return False
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3", dir=os.path.dirname(self.path) or ".")
+        os.close(fd)
+        try:
+            with self._lock:
+                snapshot = sqlite3.connect(tmp_path)
+                try:
+                    self._db.backup(snapshot)
+                finally:
+                    snapshot.close()
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            self._client().upload_file(tmp_path, self.bucket, self.s3_key)
+            logger.info(f"Saved syllable cache snapshot to s3://{self.bucket}/{self.s3_key}; {self.stats()}")
+            return True
+        except Exception as e:
+            logger.warning(f"Syllable cache snapshot not saved: {e}")
+            self._dirty = True
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def maybe_save_snapshot(self):
+        """Upload the snapshot if new words were added and the last upload is old enough."""
+        if not self._dirty:
+            return False
+        if self._saved_at is None or time.monotonic() - self._saved_at >= self.snapshot_interval:
+            return self.save_snapshot()
+        return False
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_syllable_cache():
+    """The process-wide cache, synced with ``SYLLABLE_CACHE_S3_KEY`` in ``BUCKET_NAME`` when set."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SyllableCache(bucket=os.getenv("BUCKET_NAME"))
+        return _cache
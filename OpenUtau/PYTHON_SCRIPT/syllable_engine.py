@@ -0,0 +1,146 @@
+import re
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pron_index import open_index, syllable_count
+from g2p_onnx import get_g2p_model
+
+logger = logging.getLogger()
+
+# Counts the melody relies on, matching the rules given to GPT (SYLLABLE_RULES)
+SYLLABLE_OVERRIDES = {
+    "bells": 2,
+    "every": 2,
+    "holiday": 3,
+    "today": 2,
+    "elizabeth": 3,
+}
+WORD_PATTERN = re.compile(r"\w[\w']*")
+
+
+@dataclass(frozen=True)
+class SyllableCount:
+    word: str
+    count: int
+    confident: bool   # False means the count is a guess worth confirming with GPT
+    source: str       # "override", "cmudict", "g2p", "heuristic" or "empty"
+
+
+def heuristic_count(word, hyphenator=None):
+    """Estimate syllables from pyphen hyphenation (or vowel groups) plus English suffix rules."""
+    if hyphenator is not None:
+        count = hyphenator.inserted(word).count('-') + 1
+    else:
+        count = max(1, len(re.findall(r'[aeiouy]+', word)))
+
+    # Handle silent 'e' at the end of words
+    if word.endswith('e') and not word.endswith(('le', 'ue')) and count > 1:
+        count -= 1
+
+    # Handle diphthongs and vowel clusters more accurately
+    if re.search(r'[aeiouy]{2,}', word):
+        count = max(1, count)
+
+    # Handle special suffixes like 'es', 'ed' when pronounced as one syllable
+    if re.search(r'(es|ed)$', word) and count > 1:
+        count -= 1
+
+    # Correct for words ending in '-le'
+    if word.endswith('le') and len(word) > 2 and not word[-3] in 'aeiou':
+        count += 1
+
+    return count
+
+
+def load_cmudict_counts():
+    """``{word: (fewest, most syllables)}`` over each word's pronunciations in nltk's cmudict."""
+    from nltk.corpus import cmudict
+
+    counts = {}
+    for word, pronunciations in cmudict.dict().items():
+        syllables = [syllable_count(pronunciation) for pronunciation in pronunciations]
+        counts[word] = (min(syllables), max(syllables))
+    return counts
+
+
+class SyllableEngine:
+    """Offline syllable counter: overrides, then cmudict, the g2p model, then pyphen and suffix heuristics.
+
+    ``pronunciations`` maps a word to the fewest and most syllables over its
+    pronunciations: the memory-mapped ``PronunciationIndex`` when it has been
+    built, else a dict parsed from nltk. Like the old lookup, the largest
+    count is used. A count is ``confident`` when it comes from an override
+    or from cmudict with every pronunciation agreeing, or from the g2p model
+    (``g2p_onnx.G2pModel``) for words missing from the dictionary; heuristic
+    guesses are not, so callers only need to ask GPT about those words.
+    """
+
+    def __init__(self, pronunciations=None, hyphenator=None, overrides=SYLLABLE_OVERRIDES, g2p=None):
+        self.pronunciations = pronunciations if pronunciations is not None else {}
+        self.hyphenator = hyphenator
+        self.g2p = g2p
+        self.overrides = overrides
+        self._count_key = lru_cache(maxsize=65536)(self._count_key)
+
+    @classmethod
+    def load(cls):
+        """Build the engine from the pronunciation index (or nltk cmudict), the g2p model and pyphen; any may be missing."""
+        pronunciations = open_index()
+        if pronunciations is None:
+            try:
+                pronunciations = load_cmudict_counts()
+            except (ImportError, LookupError) as e:
+                logger.warning(f"cmudict unavailable, syllables will be estimated: {e}")
+        hyphenator = None
+        try:
+            import pyphen
+            hyphenator = pyphen.Pyphen(lang="en_US")
+        except (ImportError, KeyError) as e:
+            logger.warning(f"pyphen unavailable, syllables will be estimated from vowel groups: {e}")
+        logger.info(f"Syllable engine loaded with {len(pronunciations or ())} dictionary words")
+        return cls(pronunciations, hyphenator, g2p=get_g2p_model())
+
+    def _count_key(self, key):
+        if key in self.overrides:
+            return self.overrides[key], True, "override"
+        counts = self.pronunciations.get(key)
+        if counts is not None:
+            fewest, most = counts
+            return most, fewest == most, "cmudict"
+        if self.g2p is not None:
+            count = self.g2p.count_syllables(key)
+            if count > 0:
+                return count, True, "g2p"
+        return heuristic_count(key, self.hyphenator), False, "heuristic"
+
+    def count_word(self, word):
+        key = word.strip("'").lower()
+        if not key:
+            return SyllableCount(word, 0, True, "empty")
+        count, confident, source = self._count_key(key)
+        return SyllableCount(word, count, confident, source)
+
+    def count_line(self, line):
+        """Per-word counts for every word in ``line``."""
+        return [self.count_word(word) for word in WORD_PATTERN.findall(line)]
+
+    def count_lines(self, lines):
+        """Per-word counts for a whole lyric sheet, one list per line."""
+        return [self.count_line(line) for line in lines]
+
+    def line_total(self, line):
+        return sum(result.count for result in self.count_line(line))
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_syllable_engine():
+    """The process-wide engine; the dictionaries are loaded on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SyllableEngine.load()
+        return _engine
@@ -0,0 +1,133 @@
+import io
+import os
+import json
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+from asset_bundle import MANIFEST_NAME, BundleError, build_bundle, extract_bundle, sync_bundle_from_s3
+
+FILES = {
+    "character.txt": b"name=Test Singer\n",
+    "dsconfig.yaml": b"phonemes: phonemes.txt\n",
+    "empty.txt": b"",
+    "models/acoustic.onnx": bytes(range(256)) * 64,
+}
+
+
+def write_tree(root, files):
+    for relative_path, data in files.items():
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def read_tree(root):
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return files
+
+
+def raw_bundle(manifest, members):
+    """A bundle written member by member, for malformed cases ``build_bundle`` never produces."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in [(MANIFEST_NAME, json.dumps(manifest).encode("utf-8"))] + members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+class StubS3:
+    """Serves one bundle file with a fixed ETag and counts downloads."""
+
+    def __init__(self, bundle_path, etag):
+        self.bundle_path = bundle_path
+        self.etag = etag
+        self.downloads = 0
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": f'"{self.etag}"'}
+
+    def get_object(self, Bucket, Key, IfMatch=None):
+        self.downloads += 1
+        with open(self.bundle_path, "rb") as f:
+            return {"Body": io.BytesIO(f.read())}
+
+
+class AssetBundleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.source_dir = os.path.join(self.tmp_dir, "source")
+        write_tree(self.source_dir, FILES)
+        self.bundle_path = os.path.join(self.tmp_dir, "singer.tar.gz")
+        self.dest_dir = os.path.join(self.tmp_dir, "dest")
+
+    def test_round_trip(self):
+        manifest = build_bundle(self.source_dir, self.bundle_path)
+        self.assertEqual(sorted(manifest["files"]), sorted(FILES))
+
+        with open(self.bundle_path, "rb") as f:
+            self.assertEqual(extract_bundle(f, self.dest_dir), manifest)
+        self.assertEqual(read_tree(self.dest_dir), FILES)
+
+    def test_checksum_mismatch(self):
+        manifest = {"version": 1, "files": {"a.txt": {"size": 3, "sha256": "0" * 64}}}
+        with self.assertRaisesRegex(BundleError, "Checksum mismatch"):
+            extract_bundle(raw_bundle(manifest, [("a.txt", b"abc")]), self.dest_dir)
+
+    def test_missing_and_unlisted_files(self):
+        build_bundle(self.source_dir, self.bundle_path)
+        with tarfile.open(self.bundle_path) as tar:
+            manifest = json.load(tar.extractfile(MANIFEST_NAME))
+        with self.assertRaisesRegex(BundleError, "missing"):
+            extract_bundle(raw_bundle(manifest, [("character.txt", FILES["character.txt"])]), self.dest_dir)
+        with self.assertRaisesRegex(BundleError, "not listed"):
+            extract_bundle(raw_bundle(manifest, [("extra.txt", b"x")]), self.dest_dir)
+
+    def test_unsafe_paths(self):
+        for name in ("../escape.txt", "/etc/escape.txt"):
+            manifest = {"version": 1, "files": {name: {"size": 1, "sha256": "0" * 64}}}
+            with self.assertRaises(BundleError):
+                extract_bundle(raw_bundle(manifest, [(name, b"x")]), self.dest_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "escape.txt")))
+
+    def test_manifest_must_come_first(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            info = tarfile.TarInfo("character.txt")
+            tar.addfile(info, io.BytesIO(b""))
+        buffer.seek(0)
+        with self.assertRaisesRegex(BundleError, "first member"):
+            extract_bundle(buffer, self.dest_dir)
+
+    def test_sync_installs_once_per_etag(self):
+        build_bundle(self.source_dir, self.bundle_path)
+        s3 = StubS3(self.bundle_path, "v1")
+        os.makedirs(self.dest_dir)
+        write_tree(self.dest_dir, {"stale.txt": b"old"})
+
+        self.assertTrue(sync_bundle_from_s3(s3, "bucket", "bundles/singer.tar.gz", self.dest_dir))
+        self.assertFalse(sync_bundle_from_s3(s3, "bucket", "bundles/singer.tar.gz", self.dest_dir))
+        self.assertEqual(s3.downloads, 1)
+        installed = read_tree(self.dest_dir)
+        installed.pop(".bundle_etag")
+        self.assertEqual(installed, FILES)
+
+        s3.etag = "v2"
+        self.assertTrue(sync_bundle_from_s3(s3, "bucket", "bundles/singer.tar.gz", self.dest_dir))
+        self.assertEqual(s3.downloads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
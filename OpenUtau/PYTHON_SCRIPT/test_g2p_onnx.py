@@ -0,0 +1,43 @@
+import os
+import unittest
+
+from g2p_onnx import G2P_MODEL_PATH, G2pModel
+from syllable_engine import SyllableEngine
+
+# The pack installed in the image, else the copy OpenUtau embeds
+PACK_PATHS = [
+    G2P_MODEL_PATH,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "OpenUtau.Core", "G2p", "Data", "g2p-arpabet.zip"),
+]
+PACK_PATH = next((path for path in PACK_PATHS if os.path.exists(path)), None)
+
+try:
+    import onnxruntime  # noqa: F401
+except ImportError:
+    onnxruntime = None
+
+
+@unittest.skipIf(PACK_PATH is None or onnxruntime is None, "g2p pack or onnxruntime not available")
+class G2pModelTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = G2pModel(PACK_PATH, cache_size=16)
+
+    def test_out_of_vocabulary_word(self):
+        # Not in cmudict
+        self.assertEqual(self.model.predict("zendaya"), ("z", "eh", "n", "d", "ay", "ah"))
+        self.assertEqual(self.model.count_syllables("zendaya"), 3)
+
+    def test_word_without_letters(self):
+        self.assertEqual(self.model.predict("123"), ())
+        self.assertEqual(self.model.count_syllables("123"), 0)
+
+    def test_engine_trusts_the_model_for_unknown_words(self):
+        engine = SyllableEngine(pronunciations={}, g2p=self.model)
+        result = engine.count_word("Zendaya")
+        self.assertEqual((result.count, result.confident, result.source), (3, True, "g2p"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import logging
+import tempfile
+import threading
+import contextvars
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from job_context import JobContext
+
+
+class JobLogHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.logger = logging.getLogger()
+        self.addCleanup(self.logger.setLevel, self.logger.level)
+        self.logger.setLevel(logging.INFO)
+
+    def create(self, song_id):
+        ctx = JobContext.create({"songID": song_id}, base_dir=self.base_dir)
+        self.addCleanup(ctx.cleanup)
+        return ctx
+
+    def read_log(self, ctx):
+        with open(ctx.system_log_path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_helper_thread_records_reach_the_job_log(self):
+        ctx = self.create("1")
+        ctx.attach_log_handler()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(contextvars.copy_context().run, self.logger.info, "from a helper").result()
+        ctx.detach_log_handler()
+
+        self.assertIn("from a helper", self.read_log(ctx))
+
+    def test_other_jobs_records_are_kept_out(self):
+        first, second = self.create("1"), self.create("2")
+        attached = threading.Barrier(2)
+
+        def run(ctx):
+            ctx.attach_log_handler()
+            attached.wait(5)
+            self.logger.info(f"working on {ctx.song_id}")
+            attached.wait(5)
+            ctx.detach_log_handler()
+
+        threads = [threading.Thread(target=run, args=(ctx,)) for ctx in (first, second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertIn("working on 1", self.read_log(first))
+        self.assertNotIn("working on 2", self.read_log(first))
+        self.assertIn("working on 2", self.read_log(second))
+
+    def test_detach_untags_the_thread(self):
+        ctx = self.create("1")
+        ctx.attach_log_handler()
+        ctx.detach_log_handler()
+        self.logger.info("after the job")
+
+        self.assertNotIn("after the job", self.read_log(ctx))
+
+
+class JobContextCreateTest(unittest.TestCase):
+
+    def create(self, body):
+        ctx = JobContext.create(body, base_dir=tempfile.mkdtemp())
+        self.addCleanup(ctx.cleanup)
+        return ctx
+
+    def test_fresh_flag_from_the_message_body(self):
+        self.assertFalse(self.create({"songID": "1"}).fresh)
+        self.assertTrue(self.create({"songID": "2", "fresh": True}).fresh)
+        self.assertTrue(self.create({"songID": "3", "fresh": "true"}).fresh)
+        self.assertFalse(self.create({"songID": "4", "fresh": False}).fresh)
+
+
+if __name__ == "__main__":
+    unittest.main()
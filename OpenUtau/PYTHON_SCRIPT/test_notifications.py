@@ -0,0 +1,88 @@
+import os
+import time
+import threading
+import unittest
+from unittest import mock
+
+from notifications import NotificationDispatcher
+
+# helpers logs to /tmp/Logs from import time
+os.makedirs("/tmp/Logs", exist_ok=True)
+import helpers  # noqa: E402
+
+
+class _Response:
+    def raise_for_status(self):
+        pass
+
+
+class StubSession:
+    """Records POSTed payloads; holds the first one until ``release`` is set."""
+
+    def __init__(self):
+        self.posted = []
+        self.first_started = threading.Event()
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        with self._lock:
+            first = not self.posted and not self.first_started.is_set()
+            if first:
+                self.first_started.set()
+        if first:
+            self.release.wait(5)
+        with self._lock:
+            self.posted.append(json)
+        return _Response()
+
+
+class NotificationDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = StubSession()
+        self.dispatcher = NotificationDispatcher(workers=2, session=self.session)
+        self.addCleanup(self.dispatcher.close, 5)
+
+    def notify(self, action, song_id="42"):
+        with mock.patch.object(helpers, "get_dispatcher", return_value=self.dispatcher), \
+                mock.patch.object(helpers, "SYSTEM_API_URL", "http://status"):
+            helpers.notify_system_api(song_id, "utau_inference", action)
+
+    def test_pending_error_is_not_replaced_by_end(self):
+        self.notify("start")
+        self.assertTrue(self.session.first_started.wait(5))
+        # "start" is still being sent while the job fails and finishes
+        self.notify("error")
+        self.notify("end")
+        self.session.release.set()
+
+        self.assertTrue(self.dispatcher.flush(5))
+        self.assertEqual([payload["action"] for payload in self.session.posted], ["start", "error", "end"])
+
+    def test_repeated_action_is_coalesced(self):
+        self.notify("start")
+        self.assertTrue(self.session.first_started.wait(5))
+        self.notify("end")
+        self.notify("end")
+        self.session.release.set()
+
+        self.assertTrue(self.dispatcher.flush(5))
+        self.assertEqual([payload["action"] for payload in self.session.posted], ["start", "end"])
+
+    def test_other_songs_are_not_held_back(self):
+        self.notify("start", song_id="1")
+        self.assertTrue(self.session.first_started.wait(5))
+        self.notify("start", song_id="2")
+        # The second worker delivers song 2 while song 1 is still in flight
+        for _ in range(50):
+            if self.session.posted:
+                break
+            time.sleep(0.05)
+        self.assertEqual([payload["songID"] for payload in self.session.posted], ["2"])
+        self.session.release.set()
+        self.assertTrue(self.dispatcher.flush(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
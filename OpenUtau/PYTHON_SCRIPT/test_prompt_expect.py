@@ -0,0 +1,140 @@
+import sys
+import subprocess
+import textwrap
+import unittest
+
+from prompt_expect import ExpectSession, PromptFailure, PromptMatcher, PromptStep, PromptTimeout
+
+
+def spawn(script):
+    """Run ``script`` in a Python child with piped, unbuffered stdio."""
+    return subprocess.Popen(
+        [sys.executable, "-u", "-c", textwrap.dedent(script)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT
+    )
+
+
+class PromptMatcherTest(unittest.TestCase):
+
+    def test_match_straddling_chunks(self):
+        matcher = PromptMatcher(["Enter lyrics path:", "Error"])
+        found = []
+        for chunk in ["Loading...\nEnter ly", "rics", " path:", " Err", "or"]:
+            found.extend(index for _, index in matcher.feed(chunk))
+        self.assertEqual(found, [0, 1])
+
+    def test_overlapping_patterns(self):
+        matcher = PromptMatcher(["she", "he", "hers"])
+        self.assertEqual(matcher.feed("ushers"), [(3, 0), (3, 1), (5, 2)])
+
+    def test_match_offset_is_within_the_chunk(self):
+        matcher = PromptMatcher(["abc"])
+        self.assertEqual(matcher.feed("xa"), [])
+        self.assertEqual(matcher.feed("bcx"), [(1, 0)])
+
+
+class ExpectSessionTest(unittest.TestCase):
+
+    def run_session(self, script, steps, **kwargs):
+        process = spawn(script)
+        self.addCleanup(process.wait, 5)
+        self.addCleanup(process.kill)
+        self.addCleanup(process.stdin.close)
+        self.addCleanup(process.stdout.close)
+        return ExpectSession(process, steps, echo=False, **kwargs).run()
+
+    def test_prompts_are_answered_in_order(self):
+        script = """
+            import sys
+            name = input("Name? ")
+            sys.stdout.write("Rea")
+            sys.stdout.flush()
+            reason = input("son? ")
+            print(f"got {name}/{reason}")
+            print("Done.")
+        """
+        output = self.run_session(script, [
+            PromptStep("Name?", "Ada"),
+            PromptStep("Reason?", "birthday"),
+            PromptStep("Done.")
+        ])
+        self.assertIn("got Ada/birthday", output)
+
+    def test_out_of_order_prompt_is_not_answered(self):
+        # "Second?" shows up before "First?" and must wait for its turn
+        script = """
+            print("Second? (early)")
+            first = input("First? ")
+            second = input("Second? ")
+            print(f"{first},{second}")
+            print("Done.")
+        """
+        output = self.run_session(script, [
+            PromptStep("First?", "1"),
+            PromptStep("Second?", "2"),
+            PromptStep("Done.")
+        ])
+        self.assertIn("1,2", output)
+
+    # Reads one answer straight from the pipe, then reports whether the next
+    # answer was already sent before its prompt was printed
+    EARLY_ANSWER_SCRIPT = """
+        import os, select, sys
+
+        def prompt(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            line = b""
+            while not line.endswith(b"\\n"):
+                line += os.read(0, 1)
+            return line.decode().strip()
+
+        first = prompt({first_prompt!r})
+        if select.select([0], [], [], 0.3)[0]:
+            print("answered early")
+        second = prompt("> ")
+        print(f"{{first}},{{second}}")
+        print("Done.")
+    """
+
+    def test_generic_prompt_in_log_output_is_not_answered(self):
+        script = self.EARLY_ANSWER_SCRIPT.format(first_prompt="loading -> cache\n> ")
+        output = self.run_session(script, [PromptStep("> ", "a"), PromptStep("> ", "b"), PromptStep("Done.")])
+        self.assertNotIn("answered early", output)
+        self.assertIn("a,b", output)
+
+    def test_one_prompt_answers_one_step(self):
+        script = self.EARLY_ANSWER_SCRIPT.format(first_prompt="> ")
+        output = self.run_session(script, [PromptStep("> ", "a"), PromptStep("> ", "b"), PromptStep("Done.")])
+        self.assertNotIn("answered early", output)
+        self.assertIn("a,b", output)
+
+    def test_eof_before_last_step(self):
+        script = """
+            input("Name? ")
+            print("bye")
+        """
+        with self.assertRaisesRegex(PromptFailure, "while waiting for 'Done.'"):
+            self.run_session(script, [PromptStep("Name?", "Ada"), PromptStep("Done.")])
+
+    def test_failure_pattern_aborts(self):
+        script = """
+            print("Singer 'x' not found")
+            input("Name? ")
+        """
+        with self.assertRaisesRegex(PromptFailure, "not found"):
+            self.run_session(script, [PromptStep("Name?", "Ada")], failure_patterns=["not found"])
+
+    def test_prompt_timeout(self):
+        script = """
+            import time
+            time.sleep(5)
+        """
+        with self.assertRaises(PromptTimeout):
+            self.run_session(script, [PromptStep("Name?", "Ada", timeout=0.2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
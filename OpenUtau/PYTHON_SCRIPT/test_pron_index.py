@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pron_index import PronunciationIndex, build_index, load_sphinx_dict, open_index
+
+SPHINX_DICT = """\
+;;; a tiny cmudict
+HELLO  HH AH0 L OW1
+HELLO(2)  HH EH0 L OW1
+FIRE  F AY1 ER0
+FIRE(2)  F AY1 R
+A  AH0
+ZEBRA  Z IY1 B R AH0
+"""
+
+
+class PronunciationIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        source = os.path.join(self.tmp_dir, "cmudict")
+        with open(source, "w", encoding="latin-1") as f:
+            f.write(SPHINX_DICT)
+        self.entries = load_sphinx_dict(source)
+        self.path = os.path.join(self.tmp_dir, "index", "cmudict.idx")
+
+    def test_round_trip(self):
+        self.assertEqual(build_index(self.entries, self.path), 4)
+        index = PronunciationIndex(self.path)
+
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.get("hello"), (2, 2))
+        self.assertEqual(index.get("Fire"), (1, 2))
+        self.assertEqual(index.get("a"), (1, 1))
+        self.assertEqual(index.phonemes("zebra"), ["Z", "IY1", "B", "R", "AH0"])
+        # The first pronunciation is the one kept
+        self.assertEqual(index.phonemes("hello"), ["HH", "AH0", "L", "OW1"])
+
+    def test_missing_words(self):
+        build_index(self.entries, self.path)
+        index = PronunciationIndex(self.path)
+
+        for word in ("", "aa", "hell", "helloo", "zzz"):
+            self.assertNotIn(word, index)
+            self.assertIsNone(index.get(word))
+            self.assertIsNone(index.phonemes(word))
+        self.assertEqual(index.get("zzz", (0, 0)), (0, 0))
+
+    def test_non_ascii_words_and_empty_entries(self):
+        entries = dict(self.entries, **{"café": [["K", "AE0", "F", "EY1"]], "silent": []})
+        build_index(entries, self.path)
+        index = PronunciationIndex(self.path)
+
+        self.assertEqual(index.get("café"), (2, 2))
+        self.assertNotIn("silent", index)
+        self.assertIn("zebra", index)
+
+    def test_open_index(self):
+        self.assertIsNone(open_index(self.path))
+        bad_path = os.path.join(self.tmp_dir, "bad.idx")
+        with open(bad_path, "wb") as f:
+            f.write(b"\0" * 64)
+        self.assertIsNone(open_index(bad_path))
+        build_index(self.entries, self.path)
+        self.assertIsInstance(open_index(self.path), PronunciationIndex)
+
+
+if __name__ == "__main__":
+    unittest.main()
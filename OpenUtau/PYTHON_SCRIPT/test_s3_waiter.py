@@ -0,0 +1,69 @@
+import json
+import time
+import threading
+import unittest
+
+from botocore.exceptions import ClientError
+
+from s3_waiter import S3EventQueueSource, S3Waiter
+
+
+class MissingObjects:
+    """S3 stub for which no object exists yet."""
+
+    def head_object(self, Bucket, Key):
+        raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+
+class StubQueue:
+    """SQS stub that hands out ``messages`` once and records which are deleted."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.deleted = []
+        self.drained = threading.Event()
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, WaitTimeSeconds):
+        messages, self.messages = self.messages, []
+        if not messages:
+            self.drained.set()
+            time.sleep(0.01)
+        return {"Messages": messages}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        self.deleted.append(ReceiptHandle)
+
+
+def created_event(receipt, *keys):
+    records = [
+        {"eventName": "ObjectCreated:Put", "s3": {"bucket": {"name": "bucket"}, "object": {"key": key}}}
+        for key in keys
+    ]
+    return {"ReceiptHandle": receipt, "Body": json.dumps({"Records": records})}
+
+
+class S3EventQueueSourceTest(unittest.TestCase):
+
+    def test_every_event_is_deleted(self):
+        waiter = S3Waiter(s3_client=MissingObjects(), initial_interval=5)
+        waited = threading.Thread(target=waiter.wait, args=("bucket", "mine.wav", 5))
+        waited.start()
+        while not waiter._watches:
+            time.sleep(0.01)
+
+        queue = StubQueue([
+            created_event("other", "theirs.wav"),
+            created_event("mixed", "theirs.wav", "mine.wav"),
+            {"ReceiptHandle": "garbage", "Body": "not json"},
+        ])
+        waiter.add_source(S3EventQueueSource("queue", sqs_client=queue, wait_time=0))
+        self.addCleanup(waiter.close)
+        self.assertTrue(queue.drained.wait(5))
+        waited.join(5)
+
+        self.assertFalse(waited.is_alive())
+        self.assertEqual(queue.deleted, ["other", "mixed", "garbage"])
+
+
+if __name__ == "__main__":
+    unittest.main()
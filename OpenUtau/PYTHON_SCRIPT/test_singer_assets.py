@@ -0,0 +1,51 @@
+import unittest
+from types import SimpleNamespace
+
+from singer_assets import SingerAssets
+
+
+class StubPaginator:
+
+    def __init__(self, folders):
+        self.folders = folders
+
+    def paginate(self, Bucket, Prefix, Delimiter):
+        yield {"CommonPrefixes": [{"Prefix": f"{Prefix}{folder}/"} for folder in self.folders]}
+
+
+class StubS3:
+    """Lists ``folders`` as the voicebank folders under any prefix."""
+
+    def __init__(self, folders):
+        self.folders = list(folders)
+
+    def get_paginator(self, operation):
+        return StubPaginator(self.folders)
+
+
+def singer_assets(folders, singer_folder=""):
+    cache = SimpleNamespace(s3_client=StubS3(folders), bucket="bucket")
+    return SingerAssets(cache, "Lambda_Utau/", "/tmp/OpenUtau/", singer_folder=singer_folder)
+
+
+class SingerAssetsTest(unittest.TestCase):
+
+    def test_single_folder_needs_no_configuration(self):
+        self.assertEqual(singer_assets(["Alto"]).validate(), "Alto")
+
+    def test_multiple_folders_use_the_configured_one(self):
+        assets = singer_assets(["Alto", "Soprano", "Tenor"], singer_folder="Soprano")
+        self.assertEqual(assets.validate(), "Soprano")
+        self.assertEqual(assets.resolve_singer_folder(), "Soprano")
+
+    def test_multiple_folders_without_configuration(self):
+        with self.assertRaisesRegex(ValueError, "OU_SINGER_FOLDER must name one of the 2"):
+            singer_assets(["Alto", "Soprano"]).validate()
+
+    def test_configured_folder_missing_from_s3(self):
+        with self.assertRaisesRegex(ValueError, "'Bass' is not one of"):
+            singer_assets(["Alto", "Soprano"], singer_folder="Bass").validate()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import re
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import VideoLyricsJSONGenerator
+from syllable_cache import SyllableCache
+from syllable_engine import SyllableEngine
+
+
+class StubClient:
+    """Answers grouped syllable requests with ``counts`` and records every prompt.
+
+    Words in ``malformed`` get an invalid count the first time they are asked about.
+    """
+
+    def __init__(self, counts, malformed=()):
+        self.counts = counts
+        self.malformed = set(malformed)
+        self.prompts = []
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        self.prompts.append(prompt)
+        words = []
+        for word in prompt.split("Words:\n", 1)[1].split("\n\n", 1)[0].splitlines():
+            if word in self.malformed:
+                self.malformed.discard(word)
+                words.append({"word": word, "syllables": 0})
+            else:
+                words.append({"word": word, "syllables": self.counts[word]})
+        content = json.dumps({"words": words})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class SyllableCountAgentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = StubClient({"zorptastic": 3, "blorp": 1}, malformed=["blorp"])
+        cache_dir = tempfile.mkdtemp()
+        self.cache = SyllableCache(os.path.join(cache_dir, "syllables.sqlite3"))
+        engine = SyllableEngine(pronunciations={"happy": (2, 2), "birthday": (2, 2), "to": (1, 1), "you": (1, 1)})
+        with mock.patch.object(VideoLyricsJSONGenerator, "get_gpt_client", return_value=self.client):
+            self.agent = VideoLyricsJSONGenerator.SyllableCountGPTAgent("key", cache=self.cache, engine=engine)
+
+    def test_only_unresolved_words_are_sent(self):
+        formatted = self.agent.count_syllables_in_line("Happy birthday, zorptastic!")
+
+        self.assertEqual(formatted, "Happy(2) birthday(2) zorptastic(3)")
+        self.assertEqual(len(self.client.prompts), 1)
+        self.assertIn("Words:\nzorptastic\n", self.client.prompts[0])
+        self.assertNotIn("birthday", self.client.prompts[0])
+
+    def test_sheet_needs_one_request_and_answers_are_cached(self):
+        lyrics = ["Happy birthday to you", "zorptastic zorptastic", ""]
+
+        totals, formatted = self.agent.request_syllable_counts(lyrics)
+
+        self.assertEqual(totals, [6, 6, 0])
+        self.assertEqual(formatted, ["Happy(2) birthday(2) to(1) you(1)", "zorptastic(3) zorptastic(3)", ""])
+        self.assertEqual(len(self.client.prompts), 1)
+        self.assertEqual(self.cache.get("zorptastic"), 3)
+
+        self.agent.count_syllables_in_each_line(["zorptastic to you"])
+        self.assertEqual(len(self.client.prompts), 1)
+
+    def test_only_malformed_entries_are_asked_again(self):
+        counts = self.agent.count_words(["zorptastic", "blorp", "happy"])
+
+        self.assertEqual(counts, {"zorptastic": 3, "blorp": 1, "happy": 2})
+        self.assertEqual(len(self.client.prompts), 2)
+        self.assertIn("Words:\nzorptastic\nblorp\n", self.client.prompts[0])
+        self.assertIn("Words:\nblorp\n", self.client.prompts[1])
+        self.assertEqual(self.cache.get("blorp"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -33,8 +33,13 @@ class Program {
                 return;
             }
 
+            if (args[0] == "--serve") {
+                Serve();
+                return; // Exit once the client closes the engine
+            }
+
             if (args.Length > 1 && args[0] == "--pipeline") {
-                Pipeline(args.Skip(1).ToArray());
+                Environment.ExitCode = Pipeline(args.Skip(1).ToArray());
                 return; // Exit after handling the pipeline, no need for interactive loop
             }
 
@@ -238,183 +243,270 @@ class Program {
             //var autosaveTimer = new Timer((e) => DocManager.Inst.AutoSave(), null, TimeSpan.Zero, TimeSpan.FromSeconds(30));
         }
 
-        static async void Pipeline(string[] args) {
+        /// <summary>
+        /// Non-interactive render: --pipeline --midi [path] --lyrics [path] --export [path without extension]
+        /// [--singer number|id|name] [--phonemizer type]. Prints one "@@RESULT {json}" line and
+        /// returns the process exit code: 0 on success, 1 when rendering failed, 2 for bad arguments.
+        /// </summary>
+        static int Pipeline(string[] args) {
             string midiPath = "";
             string lyricsPath = "";
             string exportPath = "";
+            string singerSpec = "1";
+            string phonemizerName = "OpenUtau.Core.DiffSinger.DiffSingerEnglishPhonemizer";
 
             // Parse the flags and their values
             for (int i = 0; i < args.Length; i++) {
-                switch (args[i].ToLower()) {
+                string flag = args[i].ToLower();
+                if (i + 1 >= args.Length) {
+                    return PipelineUsageError($"Missing value for {args[i]}.");
+                }
+                string value = args[++i]; // Skip the next argument since it's the value
+                switch (flag) {
                     case "--midi":
-                        if (i + 1 < args.Length) {
-                            midiPath = args[i + 1]; // Capture MIDI path
-                            i++; // Skip the next argument since it's the value
-                        } else {
-                            Console.WriteLine("Error: Missing value for --midi.");
-                            return;
-                        }
+                        midiPath = value;
                         break;
-
                     case "--lyrics":
-                        if (i + 1 < args.Length) {
-                            lyricsPath = args[i + 1]; // Capture lyrics string
-                            i++;
-                        } else {
-                            Console.WriteLine("Error: Missing value for --lyrics.");
-                            return;
-                        }
+                        lyricsPath = value;
                         break;
-
                     case "--export":
-                        if (i + 1 < args.Length) {
-                            exportPath = args[i + 1]; // Capture export path
-                            i++;
-                        } else {
-                            Console.WriteLine("Error: Missing value for --export.");
-                            return;
-                        }
+                        exportPath = value;
+                        break;
+                    case "--singer":
+                        singerSpec = value;
+                        break;
+                    case "--phonemizer":
+                        phonemizerName = value;
                         break;
-
                     default:
-                        Console.WriteLine($"Error: Unknown argument {args[i]}.");
-                        return;
+                        return PipelineUsageError($"Unknown argument {args[i - 1]}.");
                 }
             }
 
             // Validate that all required arguments are provided
             if (string.IsNullOrEmpty(midiPath) || string.IsNullOrEmpty(lyricsPath) || string.IsNullOrEmpty(exportPath)) {
-                Console.WriteLine("Error: Missing required arguments. Make sure to include --midi, --lyrics, and --export.");
-                return;
+                return PipelineUsageError("Missing required arguments. Make sure to include --midi, --lyrics, and --export.");
             }
 
-            
             // Initialize the core components before proceeding with the pipeline
             InitializeCoreComponentsViaPipeline();
+            SingerManager.Inst.InitializationTask?.Wait();
+
+            var stopwatch = System.Diagnostics.Stopwatch.StartNew();
+            var result = RenderJob(midiPath, lyricsPath, exportPath + ".wav", singerSpec, phonemizerName, exportPath + ".ustx");
+            if (result.error != null) {
+                Console.WriteLine($"Error: {result.error}");
+            }
+            WriteEngineResult(new {
+                id = (string?)null,
+                status = result.error == null ? "ok" : "error",
+                files = result.files,
+                error = result.error,
+                elapsedMs = stopwatch.ElapsedMilliseconds,
+            });
+            return result.error == null ? 0 : 1;
+        }
 
-            // Call the respective functions
-            Console.WriteLine($"Importing MIDI from: {midiPath}");
-            HandleImportMidi(midiPath);  // Assuming this method exists for importing MIDI
+        static int PipelineUsageError(string message) {
+            Console.WriteLine($"Error: {message}");
+            WriteEngineResult(new { id = (string?)null, status = "error", error = message });
+            return 2;
+        }
 
-            ListTracks();
-            int trackCount = DocManager.Inst.Project.tracks.Count;
-            var trackToRemove = DocManager.Inst.Project.tracks[0];
 
-            DocManager.Inst.StartUndoGroup();
-            DocManager.Inst.ExecuteCmd(new RemoveTrackCommand(DocManager.Inst.Project, trackToRemove));
-            DocManager.Inst.EndUndoGroup();
-
-            Console.WriteLine($"Track '{trackToRemove.TrackName}' has been successfully removed.");
-            ListTracks();
 
-            // Applying lyrics
-            Console.WriteLine($"Applying lyrics: {lyricsPath}");
+        // Phonemizers are kept per type so their models stay loaded between render jobs.
+        static readonly Dictionary<string, Phonemizer> warmPhonemizers = new Dictionary<string, Phonemizer>();
+        const string EngineReadyMarker = "@@READY";
+        const string EngineResultMarker = "@@RESULT ";
+        const int PhonemizeTimeoutMs = 120000;
 
-            if (!File.Exists(lyricsPath)) {
-                Console.WriteLine("Lyrics file does not exist.");
-                return;
-            }
+        /// <summary>
+        /// Long-lived render engine. Core components, singers and phonemizer models are
+        /// initialized once, then render jobs are read from stdin as one JSON object per line:
+        /// {"id": "...", "command": "render", "midi": "...", "lyrics": "...", "export": "...", "singer": "1", "phonemizer": "..."}.
+        /// Every job is answered with a single "@@RESULT {json}" line on stdout.
+        /// </summary>
+        static void Serve() {
+            InitializeCoreComponentsViaPipeline();
+            SingerManager.Inst.InitializationTask?.Wait();
+            Console.WriteLine($"Engine ready with {SingerManager.Inst.Singers.Count} singer(s).");
+            Console.WriteLine(EngineReadyMarker);
 
-            string[] lyrics = File.ReadAllLines(lyricsPath)
-                                  .SelectMany(line => line.Split(new[] { ' ', '\t', ',', '.', '!', '?' }, StringSplitOptions.RemoveEmptyEntries))
-                                  .ToArray();
+            while (true) {
+                string? line = Console.ReadLine();
+                if (line == null) {
+                    // The client closed stdin; shut down.
+                    return;
+                }
+                line = line.Trim();
+                if (string.IsNullOrEmpty(line)) continue;
 
-            if (lyrics.Length == 0) {
-                Console.WriteLine("No lyrics found in the file.");
-                return;
-            }
+                Newtonsoft.Json.Linq.JObject request;
+                try {
+                    request = Newtonsoft.Json.Linq.JObject.Parse(line);
+                } catch (Newtonsoft.Json.JsonException ex) {
+                    WriteEngineResult(new { id = (string?)null, status = "error", error = $"Invalid request: {ex.Message}" });
+                    continue;
+                }
 
-            
-            List<UVoicePart> voiceParts = project.parts.OfType<UVoicePart>().ToList();
-            if (voiceParts.Count == 0) {
-                Console.WriteLine("No voice parts available in the project.");
-                return;
+                string? id = (string?)request["id"];
+                string command = (string?)request["command"] ?? "render";
+                switch (command) {
+                    case "ping":
+                        WriteEngineResult(new { id, status = "ok" });
+                        break;
+                    case "exit":
+                        WriteEngineResult(new { id, status = "ok" });
+                        return;
+                    case "render":
+                        var stopwatch = System.Diagnostics.Stopwatch.StartNew();
+                        var result = RenderJob(
+                            (string?)request["midi"] ?? "",
+                            (string?)request["lyrics"] ?? "",
+                            (string?)request["export"] ?? "",
+                            (string?)request["singer"] ?? "1",
+                            (string?)request["phonemizer"] ?? "OpenUtau.Core.DiffSinger.DiffSingerEnglishPhonemizer");
+                        WriteEngineResult(new {
+                            id,
+                            status = result.error == null ? "ok" : "error",
+                            files = result.files,
+                            error = result.error,
+                            elapsedMs = stopwatch.ElapsedMilliseconds,
+                        });
+                        break;
+                    default:
+                        WriteEngineResult(new { id, status = "error", error = $"Unknown command '{command}'." });
+                        break;
+                }
             }
+        }
 
-            AssignLyricsToNotes(voiceParts[0], lyrics);
-
-
-            // Add singer to our track
-            UTrack selectedTrack = project.tracks[0];
-            Console.WriteLine($"You selected: {selectedTrack.TrackName}");
+        static void WriteEngineResult(object result) {
+            Console.WriteLine(EngineResultMarker + Newtonsoft.Json.JsonConvert.SerializeObject(result));
+            Console.Out.Flush();
+        }
 
-            // List available singers
-            SingerManager.Inst.SearchAllSingers();
-            var allSingers = SingerManager.Inst.SingerGroups.SelectMany(g => g.Value).ToList();
-            if (allSingers.Count == 0) {
-                Console.WriteLine("No singers available to update the track.");
-                return;
+        /// <summary>
+        /// Renders one song into a fresh project: imports the MIDI, assigns lyrics, applies singer
+        /// and phonemizer, waits for phonemization, optionally saves the project to projectPath
+        /// and exports the WAV. Returns the exported files, or an error message when a step fails.
+        /// </summary>
+        static (List<string> files, string? error) RenderJob(string midiPath, string lyricsPath, string exportPath, string singerSpec, string phonemizerName, string? projectPath = null) {
+            var files = new List<string>();
+            if (string.IsNullOrEmpty(midiPath) || string.IsNullOrEmpty(lyricsPath) || string.IsNullOrEmpty(exportPath)) {
+                return (files, "Missing required arguments: midi, lyrics and export.");
             }
-
-            Console.WriteLine("Available singers:");
-            for (int i = 0; i < allSingers.Count; i++) {
-                Console.WriteLine($"{i + 1}. {allSingers[i].LocalizedName} ({allSingers[i].SingerType})");
+            if (!File.Exists(midiPath)) {
+                return (files, $"MIDI file does not exist at {midiPath}.");
             }
-
-            USinger selectedSinger = allSingers[0];
-            Console.WriteLine($"You selected: {selectedSinger.LocalizedName}");
-
-            // Update track with new singer
-            DocManager.Inst.StartUndoGroup();
-            var singerCommand = new TrackChangeSingerCommand(project, selectedTrack, selectedSinger);
-            DocManager.Inst.ExecuteCmd(singerCommand);
-            Console.WriteLine($"Updated singer of track '{selectedTrack.TrackName}' to '{selectedSinger.LocalizedName}'.");
-
-            // You can extend this to update phonemizer and renderer here if needed
-
-            // Adding Phonemizer
-            Console.WriteLine("Available phonemizers:");
-            ListPhonemizers();
-
-            string phonemizerName = "OpenUtau.Core.DiffSinger.DiffSingerEnglishPhonemizer";
-
-            if (!TryChangePhonemizer(phonemizerName, selectedTrack)) {
-                Console.WriteLine("Failed to apply phonemizer. Check the name and try again.");
-            } else {
-                Console.WriteLine($"Phonemizer {phonemizerName} applied to track {selectedTrack.TrackName}.");
+            if (!File.Exists(lyricsPath)) {
+                return (files, $"Lyrics file does not exist at {lyricsPath}.");
             }
 
-            DocManager.Inst.EndUndoGroup();
-            DocManager.Inst.AutoSave();
-            Console.WriteLine("Track updated and project state saved.");
+            try {
+                NewProject();
+                HandleImportMidi(midiPath);
+                if (project!.tracks.Count < 2) {
+                    return (files, "MIDI import did not add a track.");
+                }
 
+                // Drop the empty default track created with the new project.
+                DocManager.Inst.StartUndoGroup();
+                DocManager.Inst.ExecuteCmd(new RemoveTrackCommand(project, project.tracks[0]));
+                DocManager.Inst.EndUndoGroup();
 
-            if (!project.Saved || string.IsNullOrEmpty(project.FilePath)) {
-                Console.WriteLine("Project is not saved or does not have an existing file path.");
+                string[] lyrics = File.ReadAllLines(lyricsPath)
+                                      .SelectMany(line => line.Split(new[] { ' ', '\t', ',', '.', '!', '?' }, StringSplitOptions.RemoveEmptyEntries))
+                                      .ToArray();
+                if (lyrics.Length == 0) {
+                    return (files, "No lyrics found in the file.");
+                }
+                List<UVoicePart> voiceParts = project.parts.OfType<UVoicePart>().ToList();
+                if (voiceParts.Count == 0) {
+                    return (files, "No voice parts available in the project.");
+                }
+                AssignLyricsToNotes(voiceParts[0], lyrics);
 
+                USinger? singer = FindSinger(singerSpec);
+                if (singer == null) {
+                    return (files, $"Singer '{singerSpec}' not found.");
+                }
+                singer.EnsureLoaded();
 
-                if (string.IsNullOrEmpty(exportPath)) {
-                    Console.WriteLine("No directory path provided. Aborting save operation.");
-                    return;
+                UTrack track = project.tracks[0];
+                DocManager.Inst.StartUndoGroup();
+                DocManager.Inst.ExecuteCmd(new TrackChangeSingerCommand(project, track, singer));
+                Phonemizer? phonemizer = GetWarmPhonemizer(phonemizerName);
+                if (phonemizer == null) {
+                    DocManager.Inst.EndUndoGroup();
+                    return (files, $"Phonemizer '{phonemizerName}' not found.");
                 }
+                DocManager.Inst.ExecuteCmd(new TrackChangePhonemizerCommand(project, track, phonemizer));
+                DocManager.Inst.EndUndoGroup();
+                Console.WriteLine($"Rendering with singer '{singer.LocalizedName}' and phonemizer {phonemizerName}.");
 
-                // Combine directory path and project name to form full file path
-                string fullPath = Path.Combine(exportPath + ".ustx"); // Assuming .ustx as the file extension
-                project.FilePath = fullPath; // Update the project's file path
-                SaveProject();
-            } else {
-                // Save the project to its existing file path
-                SaveProject();
-            }
+                if (!WaitForPhonemes(PhonemizeTimeoutMs)) {
+                    return (files, "Timed out waiting for phonemization.");
+                }
 
-            
+                if (!string.IsNullOrEmpty(projectPath)) {
+                    project.FilePath = projectPath;
+                    SaveProject();
+                }
 
-            string wavPath = Path.Combine(exportPath + ".wav");
-            HandleExportWavCommandViaPipeline(wavPath);  // Assuming this method exists for exporting WAV
-            //try {
-            //    Console.WriteLine($"Starting WAV export to {wavPath}");
-            //    if (project.tracks.Count == 0) {
-            //        Console.WriteLine("No tracks in the project.");
-            //    }
+                PlaybackManager.Inst.RenderToFiles(project, exportPath).Wait();
+                foreach (var t in project.tracks.Where(t => !t.Muted)) {
+                    string file = PathManager.Inst.GetExportPath(exportPath, t);
+                    if (File.Exists(file)) {
+                        files.Add(file);
+                    }
+                }
+                if (files.Count == 0) {
+                    return (files, "Render finished without writing a WAV file.");
+                }
+                Console.WriteLine($"Project has been successfully exported to WAV at {exportPath}.");
+                return (files, null);
+            } catch (Exception ex) {
+                Log.Error(ex, "Render job failed");
+                return (files, ex.Message);
+            }
+        }
 
-            //    await PlaybackManager.Inst.RenderToFiles(project, wavPath);
-            //    Console.WriteLine($"Project has been successfully exported to WAV at {wavPath}.");
-            //} catch (Exception ex) {
-            //    Console.WriteLine($"An error occurred during the export: {ex.Message}");
-            //}
+        static USinger? FindSinger(string singerSpec) {
+            var allSingers = SingerManager.Inst.SingerGroups.SelectMany(g => g.Value).ToList();
+            if (int.TryParse(singerSpec, out int singerIndex)) {
+                return singerIndex >= 1 && singerIndex <= allSingers.Count ? allSingers[singerIndex - 1] : null;
+            }
+            return allSingers.FirstOrDefault(s => s.Id == singerSpec || s.Name == singerSpec || s.LocalizedName == singerSpec);
         }
 
+        static Phonemizer? GetWarmPhonemizer(string phonemizerName) {
+            if (warmPhonemizers.TryGetValue(phonemizerName, out var phonemizer)) {
+                return phonemizer;
+            }
+            try {
+                var factory = DocManager.Inst.PhonemizerFactories.FirstOrDefault(factory => factory.type.FullName == phonemizerName);
+                phonemizer = factory?.Create();
+            } catch (Exception e) {
+                Log.Error(e, $"Failed to load phonemizer {phonemizerName}");
+            }
+            if (phonemizer != null) {
+                warmPhonemizers[phonemizerName] = phonemizer;
+            }
+            return phonemizer;
+        }
 
+        static bool WaitForPhonemes(int timeoutMs) {
+            var stopwatch = System.Diagnostics.Stopwatch.StartNew();
+            while (project!.parts.OfType<UVoicePart>().Any(part => !part.PhonemesUpToDate)) {
+                if (stopwatch.ElapsedMilliseconds > timeoutMs) {
+                    return false;
+                }
+                Thread.Sleep(20);
+            }
+            return true;
+        }
 
         public static void InitAudio() {
             Log.Information("Initializing audio.");
@@ -1237,6 +1329,12 @@ class Program {
                 return;
             }
 
+            // Track updates re-phonemize in the background; render only once the phonemes are in.
+            if (!WaitForPhonemes(PhonemizeTimeoutMs)) {
+                Console.WriteLine("An error occurred during the export: timed out waiting for phonemization.");
+                return;
+            }
+
             try {
                 Console.WriteLine($"Starting WAV export to {exportPath}");
                 if (project.tracks.Count == 0) {
@@ -1528,6 +1626,7 @@ class Program {
                 // General help overview
                 Console.WriteLine("OpenUtau Command Line Interface (CLI) Usage:");
                 Console.WriteLine("  --init          Initializes the CLI environment.");
+                Console.WriteLine("  --serve         Run as a warm render engine reading JSON jobs from stdin.");
                 Console.WriteLine("  --install       Install components like singers or dependencies.");
                 Console.WriteLine("  --singer        Manage and list singers.");
                 Console.WriteLine("  --track         Operations for managing tracks.");